@@ -19,6 +19,18 @@ class MessageType(StrEnum):
     SUMMARY = "summary"
 
 
+class VoiceTurnMode(StrEnum):
+    SINGLE_CALL = "single_call"  # one call returns transcript and reply
+    TWO_CALL = "two_call"  # transcribe, then generate the reply
+
+
+class VoiceIntent(StrEnum):
+    NEXT = "next"
+    DONE = "done"
+    REPEAT = "repeat"
+    TIMER = "timer"
+
+
 class Experiment(BaseModel):
     experiment_id: uuid.UUID
     protocol_id: uuid.UUID
@@ -59,6 +71,11 @@ class ExperimentConversation(BaseModel):
         from_attributes = True
 
 
+class VoiceIntentMatch(BaseModel):
+    intent: VoiceIntent
+    timer_seconds: Optional[int] = None
+
+
 # Request/Response Models
 class StartExperimentRequest(BaseModel):
     protocol_id: str
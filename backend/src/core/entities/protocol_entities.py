@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import StrEnum
 import uuid
@@ -11,6 +11,11 @@ class IngestionStatus(StrEnum):
     FAILED = "failed"
 
 
+class ExtractionStrategy(StrEnum):
+    SEPARATE = "separate"  # protocol and steps parsed by two concurrent calls
+    COMBINED = "combined"  # protocol and steps parsed by one call
+
+
 class ProtocolDocument(BaseModel):
     document_id: uuid.UUID
     document_name: str
@@ -53,11 +58,16 @@ class ProtocolStep(BaseModel):
         from_attributes = True
 
 
+class ProtocolPage(BaseModel):
+    protocols: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+
 class CreateProtocolPreviewRequest(BaseModel):
     filename: str
     file_type: str
     file_extension: str
-    file_content: bytes
+    file_stream: Any  # readable, seekable binary file object such as UploadFile.file
     file_size: Optional[int] = None
     description: Optional[str] = None
     created_by_user_id: Optional[uuid.UUID] = None
@@ -70,6 +80,80 @@ class ProtocolPreviewResponse(BaseModel):
     protocol: Protocol
     protocol_steps: List[ProtocolStep]
     object_url: str
+    stage_timings_ms: Optional[Dict[str, float]] = None
+
+    class Config:
+        from_attributes = True
+
+
+class DocumentTextCacheEntry(BaseModel):
+    content_hash: str
+    object_url: str
+    mime_type: Optional[str] = None
+    byte_size: Optional[int] = None
+    extracted_text: Optional[str] = None
+    created_at: datetime
+    last_accessed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class DocumentPageTextCacheEntry(BaseModel):
+    content_hash: str
+    first_page: int
+    last_page: int
+    extracted_text: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class IngestionJob(BaseModel):
+    document: ProtocolDocument
+    file_extension: str
+    file_size: Optional[int] = None
+    content_hash: Optional[str] = None
+
+
+class ProtocolUploadResponse(BaseModel):
+    document_id: uuid.UUID
+    ingestion_status: IngestionStatus
+    object_url: str
+
+
+class PresignedUploadRequest(BaseModel):
+    filename: str
+
+
+class PresignedUploadResponse(BaseModel):
+    object_name: str
+    upload_url: str
+    content_type: str
+    expires_in_seconds: int
+
+
+class IngestFromObjectRequest(BaseModel):
+    object_name: str
+    filename: str
+    description: Optional[str] = None
+    created_by_user_id: Optional[uuid.UUID] = None
+
+
+class PresignedDownloadResponse(BaseModel):
+    document_id: uuid.UUID
+    download_url: str
+    expires_in_seconds: int
+
+
+class ProtocolIngestionStatusResponse(BaseModel):
+    document_id: uuid.UUID
+    document_name: str
+    ingestion_status: IngestionStatus
+    object_url: str
+    protocol: Optional[Protocol] = None
+    protocol_steps: List[ProtocolStep] = []
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
@@ -0,0 +1,81 @@
+from typing import Tuple
+import io
+import logging
+import os
+import numpy as np
+from src.core.services.voice_activity import VoiceActivityDetector
+
+try:
+    import av
+except ImportError:  # PyAV is optional; without it audio is passed through untouched
+    av = None
+
+logger = logging.getLogger(__name__)
+
+# Speech models work at 16 kHz mono; anything above that is wasted payload
+TARGET_SAMPLE_RATE = 16000
+OUTPUT_MIME_TYPE = "audio/ogg"
+OUTPUT_BIT_RATE = 24000
+
+
+class AudioPreprocessor:
+    """
+    Normalizes recorded voice turns before they are sent for transcription.
+
+    Decodes whatever the browser recorded (usually 48 kHz webm/opus), downmixes
+    to mono, resamples to 16 kHz, trims leading and trailing silence and
+    re-encodes the result as 16 kHz mono Ogg/Opus. Any failure, or a missing
+    PyAV install, falls back to the original audio.
+    """
+
+    def __init__(self):
+        self.enabled = av is not None and os.getenv("AUDIO_PREPROCESSING", "true").lower() == "true"
+        self.voice_activity_detector = VoiceActivityDetector(sample_rate=TARGET_SAMPLE_RATE)
+        self.padding_ms = 200
+
+    def process(self, audio_bytes: bytes, mime_type: str) -> Tuple[bytes, str]:
+        """Return the preprocessed audio and its MIME type, or the input unchanged."""
+        if not self.enabled:
+            return audio_bytes, mime_type
+        try:
+            samples = self.decode(audio_bytes)
+            samples = self.trim_silence(samples)
+            if samples.size == 0:
+                # Nothing but silence; let the model say it didn't catch anything
+                return audio_bytes, mime_type
+            return self.encode(samples), OUTPUT_MIME_TYPE
+        except Exception as e:
+            logger.warning(f"Audio preprocessing failed, sending original audio: {e}")
+            return audio_bytes, mime_type
+
+    def decode(self, audio_bytes: bytes) -> np.ndarray:
+        """Decode any container/codec PyAV understands to 16 kHz mono int16 samples."""
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=TARGET_SAMPLE_RATE)
+        chunks = []
+        with av.open(io.BytesIO(audio_bytes)) as container:
+            for frame in container.decode(audio=0):
+                for resampled in resampler.resample(frame):
+                    chunks.append(resampled.to_ndarray().reshape(-1))
+        for resampled in resampler.resample(None):
+            chunks.append(resampled.to_ndarray().reshape(-1))
+        if not chunks:
+            return np.zeros(0, dtype=np.int16)
+        return np.concatenate(chunks)
+
+    def trim_silence(self, samples: np.ndarray) -> np.ndarray:
+        """Drop leading and trailing non-speech, keeping some padding."""
+        return self.voice_activity_detector.trim(samples, padding_ms=self.padding_ms)
+
+    def encode(self, samples: np.ndarray) -> bytes:
+        """Encode 16 kHz mono int16 samples as Ogg/Opus."""
+        output = io.BytesIO()
+        with av.open(output, mode="w", format="ogg") as container:
+            stream = container.add_stream("libopus", rate=TARGET_SAMPLE_RATE, layout="mono")
+            stream.bit_rate = OUTPUT_BIT_RATE
+            frame = av.AudioFrame.from_ndarray(samples.reshape(1, -1), format="s16", layout="mono")
+            frame.sample_rate = TARGET_SAMPLE_RATE
+            for packet in stream.encode(frame):
+                container.mux(packet)
+            for packet in stream.encode(None):
+                container.mux(packet)
+        return output.getvalue()
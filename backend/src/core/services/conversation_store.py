@@ -0,0 +1,207 @@
+from src.dal.databases.async_dal import AsyncExperimentDAL
+from src.dal.integrations.gemini_client import GeminiClientSingleton
+from src.core.services.conversation_writer import conversation_writer
+from src.core.entities.experiment_entities import ExperimentConversation, MessageType, SenderRole
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import os
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Rough token estimate; close enough to keep the prompt size bounded
+CHARS_PER_TOKEN = 4
+
+SPEAKER_LABELS = {
+    SenderRole.USER: "User",
+    SenderRole.AGENT: "Assistant",
+    SenderRole.SYSTEM: "System",
+}
+
+
+class ConversationSession:
+    """
+    Conversation state for one experiment.
+
+    Recent messages are kept verbatim in a sliding window. Once the window grows
+    past its token budget, the oldest messages are folded into a rolling summary
+    so the prompt stays roughly the same size however long the session runs.
+    """
+
+    def __init__(self, experiment_id: str, summary: str = "", messages: Optional[List[ExperimentConversation]] = None):
+        self.experiment_id = experiment_id
+        self.summary = summary
+        self.messages: List[ExperimentConversation] = messages or []
+        self.compacting = False
+
+    def token_count(self) -> int:
+        """Estimated tokens in the summary and window."""
+        return (len(self.summary) + sum(len(m.content) for m in self.messages)) // CHARS_PER_TOKEN
+
+    def render(self) -> str:
+        """Conversation context to prepend to a prompt, or "" for a new session."""
+        sections = []
+        if self.summary:
+            sections.append(f"Summary of the earlier conversation:\n{self.summary}")
+        if self.messages:
+            lines = [f"{SPEAKER_LABELS[m.sender_role]}: {m.content}" for m in self.messages]
+            sections.append("Recent conversation:\n" + "\n".join(lines))
+        return "\n\n".join(sections)
+
+
+class ConversationStore:
+    """
+    In-memory LRU of active conversation sessions.
+
+    A session is hydrated from experiment_conversations the first time an
+    experiment is seen and then served from memory, so a turn does not reload
+    the full history from Postgres. Messages are persisted through the
+    write-behind ConversationWriter, which is flushed before any hydration, so
+    evicting a session loses nothing. Rolling summaries are persisted as
+    SYSTEM/SUMMARY messages and hydration resumes from the latest one.
+    """
+
+    def __init__(self, max_sessions: Optional[int] = None, window_tokens: Optional[int] = None):
+        self.max_sessions = max_sessions or int(os.getenv("CONVERSATION_SESSIONS_MAX", "200"))
+        self.window_tokens = window_tokens or int(os.getenv("CONVERSATION_WINDOW_TOKENS", "2000"))
+        self.experiment_dal = AsyncExperimentDAL()
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._background: set = set()
+
+    async def get(self, experiment_id: str) -> ConversationSession:
+        """Get the session for an experiment, hydrating it from the database if needed."""
+        session = self._sessions.get(experiment_id)
+        if session:
+            self._sessions.move_to_end(experiment_id)
+            return session
+
+        # Concurrent turns for the same experiment share one hydration
+        loading = self._loading.get(experiment_id)
+        if loading is None:
+            loading = asyncio.create_task(self._hydrate(experiment_id))
+            self._loading[experiment_id] = loading
+        try:
+            session = await loading
+        finally:
+            self._loading.pop(experiment_id, None)
+
+        self._sessions[experiment_id] = session
+        self._sessions.move_to_end(experiment_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def discard(self, experiment_id: str) -> None:
+        """Drop a session from memory, e.g. when its experiment stops."""
+        self._sessions.pop(experiment_id, None)
+
+    def record_turn(self, session: ConversationSession, transcript: str, reply: str) -> None:
+        """Append a user/assistant exchange and compact the window if it is over budget."""
+        for sender_role, message_type, content in (
+            (SenderRole.USER, MessageType.QUESTION, transcript),
+            (SenderRole.AGENT, MessageType.RESPONSE, reply),
+        ):
+            message = ExperimentConversation(
+                message_id=uuid.uuid4(),
+                experiment_id=uuid.UUID(session.experiment_id),
+                sender_role=sender_role,
+                message_type=message_type,
+                content=content,
+                created_at=datetime.now()
+            )
+            session.messages.append(message)
+            conversation_writer.add(message)
+
+        if session.token_count() > self.window_tokens:
+            # Summarizing costs a model call; keep it off the turn's critical path
+            task = asyncio.create_task(self._compact(session))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def _hydrate(self, experiment_id: str) -> ConversationSession:
+        # Messages of an evicted session may still be queued
+        try:
+            await conversation_writer.flush()
+        except Exception as e:
+            # Load what is stored; the writer retries the rest in the background
+            logger.warning(f"Could not write queued messages before loading experiment {experiment_id}: {e}")
+        history = await self.experiment_dal.get_experiment_conversations_by_experiment_id(experiment_id)
+
+        summary = None
+        for message in history:
+            if message.message_type == MessageType.SUMMARY and message.sender_role == SenderRole.SYSTEM:
+                summary = message
+
+        # The summary covers everything up to its timestamp
+        messages = [
+            m for m in history
+            if m.message_type != MessageType.SUMMARY
+            and (summary is None or m.created_at > summary.created_at)
+        ]
+        session = ConversationSession(experiment_id, summary.content if summary else "", messages)
+        if session.token_count() > self.window_tokens:
+            await self._compact(session)
+        return session
+
+    async def _compact(self, session: ConversationSession) -> None:
+        """Fold the oldest messages into the rolling summary until the window is half its budget."""
+        if session.compacting or session.token_count() <= self.window_tokens:
+            return
+        session.compacting = True
+        try:
+            # Compact to half the budget so this doesn't run on every turn
+            excess = session.token_count() - self.window_tokens // 2
+            folded = []
+            for message in session.messages:
+                if excess <= 0:
+                    break
+                folded.append(message)
+                excess -= len(message.content) // CHARS_PER_TOKEN
+            if not folded:
+                return
+
+            # Folded messages stay in the window until their summary is ready;
+            # turns recorded meanwhile are only ever appended behind them
+            summary = await self._summarize(session.summary, folded)
+            del session.messages[:len(folded)]
+            session.summary = summary
+
+            conversation_writer.add(ExperimentConversation(
+                message_id=uuid.uuid4(),
+                experiment_id=uuid.UUID(session.experiment_id),
+                sender_role=SenderRole.SYSTEM,
+                message_type=MessageType.SUMMARY,
+                content=summary,
+                # Stamped with the last folded message so hydration knows what it covers
+                created_at=folded[-1].created_at
+            ))
+        except Exception as e:
+            logger.error(f"Error compacting conversation for experiment {session.experiment_id}: {e}")
+        finally:
+            session.compacting = False
+
+    async def _summarize(self, previous_summary: str, messages: List[ExperimentConversation]) -> str:
+        transcript = "\n".join(f"{SPEAKER_LABELS[m.sender_role]}: {m.content}" for m in messages)
+        prompt = f"""You are maintaining a running summary of a conversation between a scientist and an experiment assistant.
+
+Current summary:
+{previous_summary or "(none)"}
+
+New messages:
+{transcript}
+
+Rewrite the summary so it also covers the new messages. Keep the protocol steps completed, observations, measurements, problems and open questions. Be concise and return only the summary."""
+
+        response = await GeminiClientSingleton().client.aio.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=[{"parts": [{"text": prompt}]}]
+        )
+        return response.text.strip()
+
+
+# Shared store of active experiment conversations
+conversation_store = ConversationStore()
@@ -0,0 +1,147 @@
+from src.dal.databases.async_dal import AsyncExperimentDAL
+from src.core.entities.experiment_entities import ExperimentConversation
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import os
+import uuid
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationWriter:
+    """
+    Write-behind buffer for experiment conversation messages.
+
+    add() only queues a message, so a voice turn never waits on Postgres. A
+    background task writes the queue in one batch every flush_interval_ms, or
+    sooner once max_batch messages are waiting. flush() writes everything
+    queued before it was called, which is how stopping an experiment makes its
+    conversation durable.
+
+    A batch that fails is written again one message at a time, so one bad row
+    can't hold up the rest. Messages Postgres rejects outright (a constraint
+    or data error) are logged and dropped. Other failures keep the message
+    queued; it is dropped after max_attempts of them, not counting lost
+    connections.
+    """
+
+    def __init__(self, flush_interval_ms: Optional[int] = None, max_batch: Optional[int] = None,
+                 max_attempts: Optional[int] = None):
+        self.flush_interval = (flush_interval_ms or int(os.getenv("CONVERSATION_FLUSH_INTERVAL_MS", "500"))) / 1000
+        self.max_batch = max_batch or int(os.getenv("CONVERSATION_FLUSH_BATCH_SIZE", "50"))
+        self.max_attempts = max_attempts or int(os.getenv("CONVERSATION_WRITE_MAX_ATTEMPTS", "5"))
+        self.experiment_dal = AsyncExperimentDAL()
+        self._pending: List[ExperimentConversation] = []
+        self._attempts: Dict[uuid.UUID, int] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start the background flush task on the running event loop."""
+        if self._task:
+            return
+        self._flush_lock = asyncio.Lock()
+        self._batch_ready = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="conversation-writer")
+
+    async def stop(self) -> None:
+        """Stop the background task and write whatever is still queued."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Could not write {len(self._pending)} queued conversation messages on shutdown: {e}")
+
+    def add(self, message: ExperimentConversation) -> None:
+        """Queue a message for the next batch."""
+        self._pending.append(message)
+        if self._batch_ready and len(self._pending) >= self.max_batch:
+            self._batch_ready.set()
+
+    async def flush(self) -> None:
+        """Write every queued message. Raises if some could not be written yet; they are retried on the next flush."""
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            try:
+                await self.experiment_dal.create_experiment_conversations(batch)
+                self._attempts.clear()
+                return
+            except Exception as e:
+                if len(batch) > 1:
+                    logger.warning(f"Batch of {len(batch)} conversation messages failed, writing them one at a time: {e}")
+                    error = await self._write_each(batch)
+                else:
+                    error = self._handle_failure(batch, 0, e)
+            if error:
+                raise error
+
+    async def _write_each(self, batch: List[ExperimentConversation]) -> Optional[Exception]:
+        """Write messages one by one, stopping at the first retryable failure. Returns that failure."""
+        for index, message in enumerate(batch):
+            try:
+                await self.experiment_dal.create_experiment_conversations([message])
+                self._attempts.pop(message.message_id, None)
+            except Exception as e:
+                error = self._handle_failure(batch, index, e)
+                if error:
+                    return error
+        return None
+
+    def _handle_failure(self, batch: List[ExperimentConversation], index: int, error: Exception) -> Optional[Exception]:
+        """
+        Drop batch[index] if it can never be written, otherwise queue batch[index:] again.
+
+        Returns the error if messages were queued again.
+        """
+        message = batch[index]
+        attempts = self._attempts.pop(message.message_id, 0)
+        # Losing the connection says nothing about the message, so it doesn't count
+        if not self._caused_by(error, psycopg2.OperationalError, psycopg2.InterfaceError):
+            attempts += 1
+        if self._caused_by(error, psycopg2.IntegrityError, psycopg2.DataError, ValueError) or attempts >= self.max_attempts:
+            logger.error(
+                f"Dropping conversation message {message.message_id} for experiment {message.experiment_id} "
+                f"after {attempts} attempts: {error}"
+            )
+            return None
+        self._attempts[message.message_id] = attempts
+        # Keep arrival order so retried messages land before newer ones
+        self._pending[:0] = batch[index:]
+        return error
+
+    @staticmethod
+    def _caused_by(error: BaseException, *error_types: type) -> bool:
+        """Whether error or anything it was raised from is one of error_types."""
+        # The DAL wraps driver errors in a plain Exception; the original is its context
+        while error is not None:
+            if isinstance(error, error_types):
+                return True
+            error = error.__cause__ or error.__context__
+        return False
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error writing conversation messages, will retry: {e}")
+
+
+# Shared writer, started and stopped with the app
+conversation_writer = ConversationWriter()
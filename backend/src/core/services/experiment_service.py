@@ -1,15 +1,62 @@
 from src.dal.databases.experiment_dal import ExperimentDAL
 from src.dal.integrations.gemini_client import GeminiClientSingleton
+from src.core.entities.experiment_entities import VoiceTurnMode
+from src.core.services.conversation_store import conversation_store
+from src.core.services.audio_preprocessor import AudioPreprocessor
+from src.core.services.intent_router import IntentRouter
+from src.core.services.step_context_cache import step_context_cache
+from src.core.services.protocol_context_cache import ProtocolContextCache
 from fastapi import UploadFile
+from typing import AsyncIterator, Optional
+import asyncio
 import base64
+import json
+import os
+
+SYSTEM_PROMPT = "You are an experiment assistant guiding a scientist step-by-step through a protocol."
+
+# Markers for the plain-text single-call format used when streaming
+TRANSCRIPT_MARKER = "Transcript:"
+REPLY_MARKER = "Reply:"
+
+VOICE_TURN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "transcript": {"type": "string"},
+        "reply": {"type": "string"}
+    },
+    "required": ["transcript", "reply"]
+}
 
 class ExperimentService:
     def __init__(self):
         self.experiment_dal = ExperimentDAL()
         self.gemini_client = GeminiClientSingleton()
+        self.voice_turn_mode = VoiceTurnMode(os.getenv("VOICE_TURN_MODE", VoiceTurnMode.SINGLE_CALL))
+        self.audio_preprocessor = AudioPreprocessor()
+        self.intent_router = IntentRouter()
+        self.protocol_context_cache = ProtocolContextCache(SYSTEM_PROMPT)
 
-    async def voice_turn(self, file: UploadFile) -> dict:
+    async def voice_turn(self, file: UploadFile, experiment_id: Optional[str] = None) -> dict:
         """Process voice input and return transcript and AI reply"""
+        audio_bytes = await self.read_audio(file)
+        
+        try:
+            session, context, cached_content = await self._experiment_context(experiment_id)
+            result = await self.process_audio(audio_bytes, file.content_type, context=context, experiment_id=experiment_id,
+                                              cached_content=cached_content)
+            print(f"Reply: {result['reply']}")
+            if session:
+                conversation_store.record_turn(session, result["transcript"], result["reply"])
+            return result
+            
+        except Exception as e:
+            print(f"Error in voice_turn: {e}")
+            # Return a proper JSON response even on error
+            return {"transcript": "Error occurred", "reply": "I'm sorry, I encountered an error. Please try again."}
+
+    async def read_audio(self, file: UploadFile) -> bytes:
+        """Validate an uploaded audio clip and return its bytes"""
         
         # Check if file is provided
         if not file.filename:
@@ -19,68 +66,303 @@ class ExperimentService:
         if not file.content_type or not file.content_type.startswith('audio/'):
             raise ValueError("Invalid file type. Only audio files are allowed.")
         
+        # Read audio bytes
+        audio_bytes = await file.read()
+        print(f"Received audio file: {file.filename}, content_type: {file.content_type}, size: {len(audio_bytes)} bytes")
+        
+        if len(audio_bytes) == 0:
+            raise ValueError("Empty audio file")
+        return audio_bytes
+
+    async def stream_audio(self, audio_bytes: bytes, mime_type: str, mode: Optional[VoiceTurnMode] = None,
+                           experiment_id: Optional[str] = None) -> AsyncIterator[dict]:
+        """
+        Streaming variant of process_audio
+
+        Yields {"event": "transcript", "text": ...} once, then
+        {"event": "reply", "text": ...} for each reply chunk as it is generated,
+        and finally {"event": "done", "transcript": ..., "reply": ...}.
+        When the transcript is a navigation command the model stream is closed
+        and the local reply is sent instead; done then also carries the intent.
+        """
+        mode = mode or self.voice_turn_mode
         try:
-            # Read audio bytes
-            audio_bytes = await file.read()
-            print(f"Received audio file: {file.filename}, content_type: {file.content_type}, size: {len(audio_bytes)} bytes")
-            
-            if len(audio_bytes) == 0:
-                raise ValueError("Empty audio file")
-
-            # 1️⃣ Transcribe the audio
-            try:
-                # Encode audio as base64
-                audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-                
-                # Use correct content structure for Gemini API
-                response = self.gemini_client.client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=[
+            audio_bytes, mime_type = await self._preprocess(audio_bytes, mime_type)
+            session, context, cached_content = await self._experiment_context(experiment_id)
+            if mode == VoiceTurnMode.SINGLE_CALL:
+                events = self._stream_transcribe_and_reply(audio_bytes, mime_type, context, cached_content)
+            else:
+                events = self._stream_transcribe_then_reply(audio_bytes, mime_type, context, cached_content)
+
+            transcript, reply, routed = "", [], None
+            async for event in events:
+                if event["event"] == "transcript":
+                    transcript = event["text"]
+                    yield event
+                    routed = await self._route(transcript, experiment_id)
+                    if routed:
+                        await events.aclose()
+                        yield {"event": "reply", "text": routed["reply"]}
+                        break
+                    continue
+                reply.append(event["text"])
+                yield event
+            reply_text = routed["reply"] if routed else "".join(reply).strip()
+            print(f"Reply: {reply_text}")
+            if session:
+                conversation_store.record_turn(session, transcript, reply_text)
+            yield {"event": "done", "transcript": transcript, **(routed or {}), "reply": reply_text}
+        except Exception as e:
+            print(f"Error in streaming voice turn: {e}")
+            yield {"event": "error", "message": "I'm sorry, I encountered an error. Please try again."}
+
+    async def _stream_transcribe_and_reply(self, audio_bytes: bytes, mime_type: str, context: str = "",
+                                           cached_content: Optional[str] = None) -> AsyncIterator[dict]:
+        """
+        Transcribe and reply in one streamed call
+
+        Structured JSON can't be spoken until it is complete, so the model is
+        asked for a plain-text transcript line followed by the reply. Chunks are
+        held back until the reply marker arrives; everything after it is
+        streamed through.
+        """
+        stream = await self.gemini_client.client.aio.models.generate_content_stream(
+            model="gemini-2.5-flash",
+            contents=[
+                {
+                    "parts": [
                         {
-                            "parts": [
-                                {"text": "Transcribe the following audio:"},
-                                {
-                                    "inline_data": {
-                                        "mime_type": file.content_type,
-                                        "data": audio_base64
-                                    }
-                                }
-                            ]
-                        }
+                            "text": (
+                                f"{self._system_prompt(context, cached_content)}\n\n"
+                                f"On the first line, write '{TRANSCRIPT_MARKER}' followed by an exact transcription of the user's audio. "
+                                f"Then, on a new line, write '{REPLY_MARKER}' followed by a helpful response to guide them with their experiment. "
+                                "Keep the reply conversational and brief."
+                            )
+                        },
+                        self._audio_part(audio_bytes, mime_type)
                     ]
-                )
-                transcript = response.text.strip()
-                print(f"Transcribed: {transcript}")
-            except Exception as e:
-                print(f"Error in transcription: {e}")
-                transcript = "I couldn't understand what you said."
-                print(f"Using fallback transcript: {transcript}")
-
-            # 2️⃣ Get Gemini reply
-            try:
-                prompt = f"""You are an experiment assistant guiding a scientist step-by-step through a protocol.
+                }
+            ],
+            config=self._generation_config(cached_content)
+        )
+
+        buffer = ""
+        transcript_sent = False
+        async for chunk in stream:
+            if not chunk.text:
+                continue
+            if transcript_sent:
+                yield {"event": "reply", "text": chunk.text}
+                continue
+
+            buffer += chunk.text
+            if REPLY_MARKER not in buffer:
+                continue
+            head, tail = buffer.split(REPLY_MARKER, 1)
+            transcript_sent = True
+            transcript = head.replace(TRANSCRIPT_MARKER, "", 1).strip()
+            print(f"Transcribed: {transcript}")
+            yield {"event": "transcript", "text": transcript}
+            if tail.strip():
+                yield {"event": "reply", "text": tail.lstrip()}
+
+        if not transcript_sent:
+            # The model ignored the format; treat the whole output as the transcript
+            transcript = buffer.replace(TRANSCRIPT_MARKER, "", 1).strip() or "I couldn't understand what you said."
+            yield {"event": "transcript", "text": transcript}
+            yield {"event": "reply", "text": f"I heard you say: '{transcript}'. How can I help you with your experiment?"}
+
+    async def _stream_transcribe_then_reply(self, audio_bytes: bytes, mime_type: str, context: str = "",
+                                            cached_content: Optional[str] = None) -> AsyncIterator[dict]:
+        """Transcribe first, then stream the reply"""
+        transcript = await self._transcribe(audio_bytes, mime_type)
+        yield {"event": "transcript", "text": transcript}
+
+        stream = await self.gemini_client.client.aio.models.generate_content_stream(
+            model="gemini-2.5-flash",
+            contents=[
+                {
+                    "parts": [{"text": self._reply_prompt(transcript, context, cached_content)}]
+                }
+            ],
+            config=self._generation_config(cached_content)
+        )
+        async for chunk in stream:
+            if chunk.text:
+                yield {"event": "reply", "text": chunk.text}
+
+    async def process_audio(self, audio_bytes: bytes, mime_type: str, mode: Optional[VoiceTurnMode] = None,
+                            context: str = "", experiment_id: Optional[str] = None,
+                            cached_content: Optional[str] = None) -> dict:
+        """
+        Turn one spoken utterance into a transcript and a reply
+
+        SINGLE_CALL sends the audio once and gets both back from one structured
+        response. TWO_CALL transcribes first and then generates the reply.
+        context is the experiment's current step and conversation so far, and
+        cached_content the Gemini cache holding its protocol text, see _experiment_context.
+        With an experiment_id, navigation commands ("next step", "set a timer")
+        are answered by IntentRouter; in TWO_CALL mode this skips the reply call.
+        """
+        mode = mode or self.voice_turn_mode
+        audio_bytes, mime_type = await self._preprocess(audio_bytes, mime_type)
+        if mode == VoiceTurnMode.SINGLE_CALL:
+            result = await self._transcribe_and_reply(audio_bytes, mime_type, context, cached_content)
+            routed = await self._route(result["transcript"], experiment_id)
+            if routed:
+                result.update(routed)
+            return result
+
+        transcript = await self._transcribe(audio_bytes, mime_type)
+        routed = await self._route(transcript, experiment_id)
+        if routed:
+            return {"transcript": transcript, **routed}
+        reply = await self._generate_reply(transcript, context, cached_content)
+        return {"transcript": transcript, "reply": reply}
+
+    async def _experiment_context(self, experiment_id: Optional[str]):
+        """
+        Conversation session, prompt context and cached content name for an experiment
+
+        The context is the protocol text (unless it is in the Gemini cache), the
+        current step and then the conversation so far.
+        """
+        if not experiment_id:
+            return None, "", None
+        session, step_prompt, protocol = await asyncio.gather(
+            conversation_store.get(experiment_id),
+            step_context_cache.prompt(experiment_id),
+            self.protocol_context_cache.get(experiment_id)
+        )
+        protocol_text = protocol.inline_text() if protocol else ""
+        context = "\n\n".join(part for part in (protocol_text, step_prompt, session.render()) if part)
+        return session, context, protocol.cached_content if protocol else None
+
+    async def _route(self, transcript: str, experiment_id: Optional[str]) -> Optional[dict]:
+        """Handle a navigation command locally, or None to let the model answer"""
+        if not experiment_id or not transcript:
+            return None
+        match = self.intent_router.classify(transcript)
+        if not match:
+            return None
+        try:
+            routed = await self.intent_router.handle(experiment_id, match)
+            if routed:
+                print(f"Routed voice turn locally: {match.intent}")
+            return routed
+        except Exception as e:
+            print(f"Error routing voice intent, falling back to model: {e}")
+            return None
+
+    async def _transcribe_and_reply(self, audio_bytes: bytes, mime_type: str, context: str = "",
+                                    cached_content: Optional[str] = None) -> dict:
+        """Transcribe the audio and generate the reply in a single model round-trip"""
+        try:
+            response = await self.gemini_client.client.aio.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=[
+                    {
+                        "parts": [
+                            {
+                                "text": (
+                                    f"{self._system_prompt(context, cached_content)}\n\n"
+                                    "Transcribe the following audio from the user into 'transcript'. "
+                                    "Then write a helpful response to guide them with their experiment into 'reply'. "
+                                    "Keep the reply conversational and brief."
+                                )
+                            },
+                            self._audio_part(audio_bytes, mime_type)
+                        ]
+                    }
+                ],
+                config={
+                    "response_mime_type": "application/json",
+                    "response_schema": VOICE_TURN_SCHEMA,
+                    **(self._generation_config(cached_content) or {})
+                },
+            )
+            data = json.loads(response.text)
+            transcript = data["transcript"].strip()
+            print(f"Transcribed: {transcript}")
+            return {"transcript": transcript, "reply": data["reply"].strip()}
+        except Exception as e:
+            print(f"Error in single-call voice turn: {e}")
+            transcript = "I couldn't understand what you said."
+            return {"transcript": transcript, "reply": f"I heard you say: '{transcript}'. How can I help you with your experiment?"}
+
+    async def _transcribe(self, audio_bytes: bytes, mime_type: str) -> str:
+        """Transcribe the audio"""
+        try:
+            response = await self.gemini_client.client.aio.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=[
+                    {
+                        "parts": [
+                            {"text": "Transcribe the following audio:"},
+                            self._audio_part(audio_bytes, mime_type)
+                        ]
+                    }
+                ]
+            )
+            transcript = response.text.strip()
+            print(f"Transcribed: {transcript}")
+            return transcript
+        except Exception as e:
+            print(f"Error in transcription: {e}")
+            transcript = "I couldn't understand what you said."
+            print(f"Using fallback transcript: {transcript}")
+            return transcript
+
+    async def _generate_reply(self, transcript: str, context: str = "", cached_content: Optional[str] = None) -> str:
+        """Get Gemini reply to a transcript"""
+        try:
+            response = await self.gemini_client.client.aio.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=[
+                    {
+                        "parts": [{"text": self._reply_prompt(transcript, context, cached_content)}]
+                    }
+                ],
+                config=self._generation_config(cached_content)
+            )
+            return response.text.strip()
+        except Exception as e:
+            print(f"Error in conversation: {e}")
+            return f"I heard you say: '{transcript}'. How can I help you with your experiment?"
+
+    async def _preprocess(self, audio_bytes: bytes, mime_type: str):
+        """Downsample and trim the clip off the event loop"""
+        processed, processed_mime_type = await asyncio.to_thread(self.audio_preprocessor.process, audio_bytes, mime_type)
+        print(f"Preprocessed audio: {len(audio_bytes)} -> {len(processed)} bytes ({processed_mime_type})")
+        return processed, processed_mime_type
+
+    def _system_prompt(self, context: str, cached_content: Optional[str] = None) -> str:
+        """System prompt followed by the conversation so far, if any; cached content already carries the system prompt"""
+        if cached_content:
+            return context
+        if not context:
+            return SYSTEM_PROMPT
+        return f"{SYSTEM_PROMPT}\n\n{context}"
+
+    def _reply_prompt(self, transcript: str, context: str = "", cached_content: Optional[str] = None) -> str:
+        """Prompt for a reply to a transcribed utterance"""
+        return f"""{self._system_prompt(context, cached_content)}
 
 The user said: "{transcript}"
 
 Please provide a helpful response to guide them with their experiment. Keep it conversational and brief."""
-                
-                response = self.gemini_client.client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=[
-                        {
-                            "parts": [{"text": prompt}]
-                        }
-                    ]
-                )
-                reply = response.text.strip()
-            except Exception as e:
-                print(f"Error in conversation: {e}")
-                reply = f"I heard you say: '{transcript}'. How can I help you with your experiment?"
-            
-            print(f"Reply: {reply}")
-            return {"transcript": transcript, "reply": reply}
-            
-        except Exception as e:
-            print(f"Error in voice_turn: {e}")
-            # Return a proper JSON response even on error
-            return {"transcript": "Error occurred", "reply": "I'm sorry, I encountered an error. Please try again."}
\ No newline at end of file
+
+    def _generation_config(self, cached_content: Optional[str]) -> Optional[dict]:
+        """Request config referencing the experiment's cached protocol context, if it has one"""
+        if not cached_content:
+            return None
+        return {"cached_content": cached_content}
+
+    def _audio_part(self, audio_bytes: bytes, mime_type: str) -> dict:
+        """Inline audio content part for Gemini"""
+        return {
+            "inline_data": {
+                "mime_type": mime_type,
+                "data": base64.b64encode(audio_bytes).decode('utf-8')
+            }
+        }
@@ -0,0 +1,82 @@
+from src.core.entities.protocol_entities import IngestionJob
+from src.core.services.protocol_service import ProtocolService
+from typing import List, Optional
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionQueue:
+    """
+    In-process queue that drives protocol ingestion in the background.
+
+    A fixed number of worker tasks pull jobs off the queue, which also caps how
+    many documents are going through Gemini at once. The queue itself lives in
+    memory only: documents still pending when the process stops, queued or
+    mid-ingestion, are queued again on the next start.
+    """
+
+    def __init__(self, worker_count: Optional[int] = None):
+        self.worker_count = worker_count or int(os.getenv("INGESTION_WORKERS", "2"))
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._protocol_service: Optional[ProtocolService] = None
+
+    async def start(self) -> None:
+        """Start the worker tasks on the running event loop."""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"ingestion-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+        logger.info(f"Started {self.worker_count} ingestion workers")
+        await self._requeue_pending()
+
+    async def stop(self) -> None:
+        """Cancel the worker tasks. Unfinished jobs stay pending in the database until the next start."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def enqueue(self, job: IngestionJob) -> None:
+        """Queue a pending document for ingestion."""
+        if self._queue is None:
+            raise RuntimeError("Ingestion queue has not been started")
+        await self._queue.put(job)
+
+    async def _requeue_pending(self) -> None:
+        try:
+            jobs = await self._service().get_pending_ingestion_jobs()
+        except Exception as e:
+            logger.error(f"Could not load pending documents to re-queue: {e}")
+            return
+        for job in jobs:
+            await self._queue.put(job)
+        if jobs:
+            logger.info(f"Re-queued {len(jobs)} pending documents")
+
+    def _service(self) -> ProtocolService:
+        if self._protocol_service is None:
+            self._protocol_service = ProtocolService()
+        return self._protocol_service
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._service().ingest_protocol_document(job)
+                logger.info(f"Worker {worker_id} ingested document {job.document.document_id}")
+            except Exception as e:
+                # ingest_protocol_document already marked the document failed
+                logger.error(f"Worker {worker_id} failed document {job.document.document_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+
+# Shared queue, started and stopped with the app
+ingestion_queue = IngestionQueue()
@@ -0,0 +1,172 @@
+from src.dal.databases.async_dal import AsyncExperimentDAL
+from src.core.services.step_context_cache import step_context_cache
+from src.core.entities.experiment_entities import ExperimentStep, VoiceIntent, VoiceIntentMatch
+from src.core.entities.protocol_entities import ProtocolStep
+from datetime import datetime
+from typing import List, Optional
+import re
+import uuid
+
+# Only short utterances are routed; anything longer goes to the model
+MAX_ROUTED_WORDS = 8
+
+FILLER = r"(?:ok(?:ay)?|alright|all right|so|and|now|um+|uh+|hey|please|thanks|thank you|cool|great)"
+
+INTENT_PATTERNS = [
+    (VoiceIntent.DONE, re.compile(
+        r"^(?:(?:i'?m|i am|we'?re|we are) )?(?:all )?(?:done|finished|complete|completed)"
+        r"(?: with (?:this|that|the|it)(?: step| one)?)?$"
+        r"|^(?:that'?s|that is|this is|this step is|the step is|step is|it'?s|it is) (?:done|finished|complete)$"
+    )),
+    (VoiceIntent.NEXT, re.compile(
+        r"^(?:(?:go to |on to |onto )?(?:the )?next(?: step| one)?"
+        r"|(?:let'?s )?(?:move|go) (?:on|ahead)(?: to the next(?: step)?)?"
+        r"|moving on|continue|what'?s next|what is next|what now)$"
+    )),
+    (VoiceIntent.REPEAT, re.compile(
+        r"^(?:(?:can|could) you )?(?:repeat|say)(?: (?:that|it|the step|the instructions?|this step))?(?: again)?$"
+        r"|^(?:what was that|come again|read (?:the|that|this) step(?: again)?"
+        r"|what'?s the (?:current )?step|what is the (?:current )?step|what step (?:am i|are we) on)$"
+    )),
+]
+
+DURATION_UNIT = r"(?:seconds?|secs?|minutes?|mins?|hours?|hrs?)"
+# Commands only ("set a timer for 5 minutes", "start the timer", "timer for 90 seconds");
+# questions such as "how long is the timer for?" go to the model
+TIMER_PATTERN = re.compile(
+    r"^(?:(?:can|could|would|will) you )?"
+    r"(?:(?:set|start)(?: me)?(?: a| an| the)?(?: [\w.]+){0,3}? timer\b"
+    rf"|timer(?: (?:for|of))? (?=.*\b{DURATION_UNIT}\b)|timer$|time me\b)"
+)
+DURATION_PATTERN = re.compile(
+    r"(?P<amount>\d+(?:\.\d+)?|a|an|one|two|three|four|five|six|seven|eight|nine|ten|fifteen|twenty|thirty|forty five|forty|sixty|ninety)"
+    rf"(?P<half> and a half)? ?(?P<unit>{DURATION_UNIT})\b(?P<half_after> and a half)?"
+)
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "fifteen": 15, "twenty": 20, "thirty": 30, "forty": 40,
+    "forty five": 45, "sixty": 60, "ninety": 90,
+}
+UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600}
+
+
+class IntentRouter:
+    """
+    Answers navigation utterances locally instead of asking the model.
+
+    classify() is a pure regex match on the transcript. Short commands like
+    "next step", "done", "repeat that" or "set a timer for 5 minutes" are
+    handled against the experiment's experiment_steps rows; everything else
+    returns None and goes to Gemini as before.
+    """
+
+    def __init__(self):
+        self.experiment_dal = AsyncExperimentDAL()
+
+    def classify(self, transcript: str) -> Optional[VoiceIntentMatch]:
+        """Match a transcript to a navigation intent, or None for anything open-ended."""
+        # Keep decimal points ("1.5 minutes"); any other punctuation separates words
+        text = re.sub(r"[^\w\s'.]|\.(?!\d)|(?<!\d)\.", " ", transcript.lower())
+        text = re.sub(rf"^(?:{FILLER}\s+)+|(?:\s+{FILLER})+$", "", " ".join(text.split()))
+        if not text or len(text.split()) > MAX_ROUTED_WORDS + 2:
+            return None
+
+        if TIMER_PATTERN.search(text):
+            return VoiceIntentMatch(intent=VoiceIntent.TIMER, timer_seconds=self._parse_duration(text))
+        if len(text.split()) > MAX_ROUTED_WORDS:
+            return None
+        for intent, pattern in INTENT_PATTERNS:
+            if pattern.match(text):
+                return VoiceIntentMatch(intent=intent)
+        return None
+
+    async def handle(self, experiment_id: str, match: VoiceIntentMatch) -> Optional[dict]:
+        """Apply an intent to the experiment's steps and build the spoken reply. None if it can't be handled."""
+        protocol_steps = await step_context_cache.steps(experiment_id)
+        if not protocol_steps:
+            return None
+        experiment_steps = await self.experiment_dal.get_experiment_steps_by_experiment_id(experiment_id)
+
+        positions = {step.protocol_step_id: i for i, step in enumerate(protocol_steps)}
+        current = next((s for s in reversed(experiment_steps) if s.status == "in_progress"), None)
+        reached = [positions[s.protocol_step_id] for s in experiment_steps if s.protocol_step_id in positions]
+        next_index = max(reached) + 1 if reached else 0
+
+        if match.intent == VoiceIntent.TIMER:
+            step = protocol_steps[positions[current.protocol_step_id]] if current else None
+            seconds = match.timer_seconds
+            if seconds is None and step and step.expected_duration_minutes:
+                seconds = step.expected_duration_minutes * 60
+            if seconds is None:
+                return {"reply": "How long should I set the timer for?", "intent": match.intent}
+            return {
+                "reply": f"Timer set for {self._describe_duration(seconds)}.",
+                "intent": match.intent,
+                "timer_seconds": seconds,
+                "step_number": step.step_number if step else None
+            }
+
+        if match.intent == VoiceIntent.REPEAT:
+            if current:
+                step = protocol_steps[positions[current.protocol_step_id]]
+                return {"reply": self._describe_step(step), "intent": match.intent, "step_number": step.step_number}
+            # Nothing started yet, so "repeat" reads out the step they're about to do
+            return await self._start_step(experiment_id, protocol_steps, next_index, match.intent, prefix="")
+
+        # NEXT and DONE both close the current step and move on
+        prefix = ""
+        if current:
+            current.status = "completed"
+            current.actual_end_time = datetime.now()
+            current.updated_at = current.actual_end_time
+            await self.experiment_dal.update_experiment_step(current)
+            if match.intent == VoiceIntent.DONE:
+                prefix = f"Step {protocol_steps[positions[current.protocol_step_id]].step_number} complete. "
+        return await self._start_step(experiment_id, protocol_steps, next_index, match.intent, prefix=prefix)
+
+    async def _start_step(self, experiment_id: str, protocol_steps: List[ProtocolStep], index: int,
+                          intent: VoiceIntent, prefix: str) -> dict:
+        if index >= len(protocol_steps):
+            step_context_cache.move_to(experiment_id, None)
+            return {"reply": f"{prefix}That was the last step. The protocol is complete.", "intent": intent}
+
+        step = protocol_steps[index]
+        now = datetime.now()
+        await self.experiment_dal.create_experiment_step(ExperimentStep(
+            experiment_step_id=uuid.uuid4(),
+            experiment_id=uuid.UUID(experiment_id),
+            protocol_step_id=step.protocol_step_id,
+            actual_start_time=now,
+            status="in_progress",
+            created_at=now,
+            updated_at=now
+        ))
+        step_context_cache.move_to(experiment_id, step.protocol_step_id)
+        return {"reply": f"{prefix}{self._describe_step(step)}", "intent": intent, "step_number": step.step_number}
+
+    def _describe_step(self, step: ProtocolStep) -> str:
+        description = f"Step {step.step_number}: {step.step_name}. {step.instruction}"
+        if step.expected_duration_minutes:
+            description += f" This should take about {self._describe_duration(step.expected_duration_minutes * 60)}."
+        return description
+
+    def _parse_duration(self, text: str) -> Optional[int]:
+        """Total seconds of every duration in the text ("1 minute 30 seconds" is 90), or None if there is none."""
+        text = text.replace("half an hour", "30 minutes")
+        seconds = None
+        for match in DURATION_PATTERN.finditer(text):
+            amount = match.group("amount")
+            value = float(amount) if amount[0].isdigit() else NUMBER_WORDS[amount]
+            if match.group("half") or match.group("half_after"):
+                value += 0.5
+            seconds = (seconds or 0) + value * UNIT_SECONDS[match.group("unit")[0]]
+        return int(seconds) if seconds is not None else None
+
+    def _describe_duration(self, seconds: int) -> str:
+        for unit, size in (("hour", 3600), ("minute", 60)):
+            if seconds >= size and seconds % size == 0:
+                count = seconds // size
+                return f"{count} {unit}{'s' if count != 1 else ''}"
+        if seconds > 60:
+            return f"{self._describe_duration(seconds - seconds % 60)} {self._describe_duration(seconds % 60)}"
+        return f"{seconds} second{'s' if seconds != 1 else ''}"
@@ -0,0 +1,192 @@
+from src.dal.databases.async_dal import AsyncExperimentDAL, AsyncProtocolDAL
+from src.dal.integrations.gemini_client import GeminiClientSingleton
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Rough size estimate for deciding whether a text is worth caching
+CHARS_PER_TOKEN = 4
+
+
+class ProtocolContext:
+    """A protocol's full text, and the Gemini cached content holding it if it was big enough to cache."""
+
+    def __init__(self, protocol_id: str, text: str):
+        self.protocol_id = protocol_id
+        self.text = text
+        self.cached_content: Optional[str] = None
+        self.expires_at = 0.0
+        self.experiments: Set[str] = set()
+
+    def inline_text(self) -> str:
+        """Protocol text to put in the prompt when there is no cached content."""
+        if self.cached_content or not self.text:
+            return ""
+        return f"Protocol document:\n{self.text}"
+
+
+class ProtocolContextCache:
+    """
+    Gemini context caches for the protocol text of running experiments.
+
+    When an experiment starts, the extracted protocol text (the document's
+    description) and the system instruction are stored once as cached content,
+    and every voice turn references it by name instead of resending the text.
+    Experiments on the same protocol share one cache. It is deleted when the
+    last of them stops, and otherwise expires after ttl_seconds; the TTL is
+    extended while turns keep using it. Texts below min_tokens are too small
+    for Gemini to cache and are inlined into the prompt instead.
+
+    At most max_entries protocols and experiments are kept, least recently
+    used first out, so experiments that are abandoned without being stopped
+    don't hold their protocol text forever. An evicted experiment is simply
+    attached again on its next turn.
+    """
+
+    def __init__(self, system_instruction: str, model: str = "gemini-2.5-flash",
+                 ttl_seconds: Optional[int] = None, min_tokens: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        self.system_instruction = system_instruction
+        self.model = model
+        self.ttl_seconds = ttl_seconds or int(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+        self.min_tokens = min_tokens or int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+        self.enabled = os.getenv("GEMINI_CONTEXT_CACHE", "true").lower() == "true"
+        self.max_entries = max_entries or int(os.getenv("PROTOCOL_CONTEXT_CACHE_MAX", "100"))
+        self.gemini_client = GeminiClientSingleton()
+        self.experiment_dal = AsyncExperimentDAL()
+        self.protocol_dal = AsyncProtocolDAL()
+        self._protocols: "OrderedDict[str, ProtocolContext]" = OrderedDict()
+        self._experiments: "OrderedDict[str, str]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._background: Set[asyncio.Task] = set()
+
+    async def attach(self, experiment_id: str, protocol_id: str) -> ProtocolContext:
+        """Make the protocol's context available to an experiment, creating the cache if needed."""
+        context = self._protocols.get(protocol_id)
+        if context is None:
+            loading = self._loading.get(protocol_id)
+            if loading is None:
+                loading = asyncio.create_task(self._load(protocol_id))
+                self._loading[protocol_id] = loading
+            try:
+                context = await loading
+            finally:
+                self._loading.pop(protocol_id, None)
+            context = self._protocols.setdefault(protocol_id, context)
+        context.experiments.add(experiment_id)
+        self._remember_protocol(protocol_id, context)
+        self._remember_experiment(experiment_id, protocol_id)
+        return context
+
+    async def get(self, experiment_id: str) -> Optional[ProtocolContext]:
+        """The experiment's protocol context, with its cache TTL extended if it is running low."""
+        protocol_id = self._experiments.get(experiment_id)
+        if protocol_id is None:
+            # Not started in this process, e.g. after a restart
+            experiment = await self.experiment_dal.get_experiment(experiment_id)
+            if not experiment:
+                return None
+            return await self.attach(experiment_id, str(experiment.protocol_id))
+
+        context = self._protocols[protocol_id]
+        self._remember_protocol(protocol_id, context)
+        self._remember_experiment(experiment_id, protocol_id)
+        if context.cached_content and context.expires_at - time.monotonic() < self.ttl_seconds / 2:
+            await self._extend(context)
+        return context
+
+    async def release(self, experiment_id: str) -> None:
+        """Detach a stopped experiment and delete the cache once no experiment uses it."""
+        protocol_id = self._experiments.pop(experiment_id, None)
+        unused = self._detach(experiment_id, protocol_id) if protocol_id else None
+        if unused:
+            await self._delete(unused)
+
+    def _detach(self, experiment_id: str, protocol_id: str) -> Optional[ProtocolContext]:
+        """Remove an experiment from its protocol's context; returns the context if nothing uses it any more."""
+        context = self._protocols.get(protocol_id)
+        if context is None:
+            return None
+        context.experiments.discard(experiment_id)
+        if context.experiments:
+            return None
+        del self._protocols[protocol_id]
+        return context
+
+    def _remember_experiment(self, experiment_id: str, protocol_id: str) -> None:
+        self._experiments[experiment_id] = protocol_id
+        self._experiments.move_to_end(experiment_id)
+        while len(self._experiments) > self.max_entries:
+            evicted_id, evicted_protocol_id = self._experiments.popitem(last=False)
+            unused = self._detach(evicted_id, evicted_protocol_id)
+            if unused:
+                self._delete_in_background(unused)
+
+    def _remember_protocol(self, protocol_id: str, context: ProtocolContext) -> None:
+        self._protocols[protocol_id] = context
+        self._protocols.move_to_end(protocol_id)
+        while len(self._protocols) > self.max_entries:
+            _, evicted = self._protocols.popitem(last=False)
+            for experiment_id in evicted.experiments:
+                self._experiments.pop(experiment_id, None)
+            self._delete_in_background(evicted)
+
+    def _delete_in_background(self, context: ProtocolContext) -> None:
+        if not context.cached_content:
+            return
+        task = asyncio.create_task(self._delete(context))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _delete(self, context: ProtocolContext) -> None:
+        if not context.cached_content:
+            return
+        try:
+            await self.gemini_client.client.aio.caches.delete(name=context.cached_content)
+            logger.info(f"Deleted context cache {context.cached_content} for protocol {context.protocol_id}")
+        except Exception as e:
+            # It expires on its own after the TTL
+            logger.warning(f"Could not delete context cache {context.cached_content}: {e}")
+
+    async def _load(self, protocol_id: str) -> ProtocolContext:
+        protocol = await self.protocol_dal.get_protocol(protocol_id)
+        document = await self.protocol_dal.get_protocol_document(str(protocol.document_id)) if protocol else None
+        context = ProtocolContext(protocol_id, (document.description or "") if document else "")
+        if self.enabled and len(context.text) // CHARS_PER_TOKEN >= self.min_tokens:
+            await self._create(context)
+        return context
+
+    async def _create(self, context: ProtocolContext) -> None:
+        try:
+            cache = await self.gemini_client.client.aio.caches.create(
+                model=self.model,
+                config={
+                    "display_name": f"protocol-{context.protocol_id}",
+                    "system_instruction": self.system_instruction,
+                    "contents": [{"role": "user", "parts": [{"text": f"Protocol document:\n{context.text}"}]}],
+                    "ttl": f"{self.ttl_seconds}s",
+                }
+            )
+            context.cached_content = cache.name
+            context.expires_at = time.monotonic() + self.ttl_seconds
+            logger.info(f"Created context cache {cache.name} for protocol {context.protocol_id} ({len(context.text)} chars)")
+        except Exception as e:
+            logger.warning(f"Could not cache protocol {context.protocol_id}, sending its text inline: {e}")
+            context.cached_content = None
+
+    async def _extend(self, context: ProtocolContext) -> None:
+        try:
+            await self.gemini_client.client.aio.caches.update(
+                name=context.cached_content,
+                config={"ttl": f"{self.ttl_seconds}s"}
+            )
+            context.expires_at = time.monotonic() + self.ttl_seconds
+        except Exception as e:
+            # Most likely already expired; start a new one
+            logger.warning(f"Could not extend context cache {context.cached_content}, recreating it: {e}")
+            await self._create(context)
@@ -1,128 +1,726 @@
 from src.dal.integrations.gemini_client import GeminiClientSingleton
-from src.core.entities.protocol_entities import Protocol, CreateProtocolPreviewRequest, ProtocolDocument, IngestionStatus, ProtocolStep, ProtocolPreviewResponse
-from src.dal.databases.protocol_dal import ProtocolDAL
+from src.core.entities.protocol_entities import Protocol, CreateProtocolPreviewRequest, ProtocolDocument, IngestionStatus, ProtocolStep, ProtocolPreviewResponse, IngestionJob, ProtocolIngestionStatusResponse, DocumentTextCacheEntry, DocumentPageTextCacheEntry, ExtractionStrategy, PresignedUploadResponse, IngestFromObjectRequest, PresignedDownloadResponse
+from src.dal.databases.async_dal import AsyncProtocolDAL, AsyncDocumentCacheDAL
 from src.dal.databases.bucket_client import BucketClient
 import uuid
-from datetime import datetime
-from typing import List
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from google.genai.types import FileState
+import asyncio
+import base64
+import hashlib
+import io
 import json
+import logging
+import os
+import re
+import tempfile
+import time
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # pypdf is optional; without it PDFs are OCR'd in one request
+    PdfReader = PdfWriter = None
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_CHUNK_SIZE = 256 * 1024
+
+# Object names handed out by BucketClient.create_upload_url: "<uuid4>.<extension>"
+UPLOADED_OBJECT_NAME = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\.(?P<extension>[a-z0-9]+)$", re.IGNORECASE)
+
+# File extensions accepted for protocol documents
+ALLOWED_IMAGE_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff', 'webp']
+ALLOWED_PDF_EXTENSIONS = ['pdf']
+
+# Simplified step schema that doesn't include UUID fields
+STEP_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "step_number": {"type": "integer"},
+            "step_name": {"type": "string"},
+            "instruction": {"type": "string"},
+            "expected_duration_minutes": {"type": "integer"}
+        },
+        "required": ["step_number", "step_name", "instruction"]
+    }
+}
+
+# Protocol and steps in one response; IDs and timestamps are assigned locally
+COMBINED_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "protocol": {
+            "type": "object",
+            "properties": {
+                "protocol_name": {"type": "string"},
+                "description": {"type": "string"}
+            },
+            "required": ["protocol_name"]
+        },
+        "steps": STEP_SCHEMA
+    },
+    "required": ["protocol", "steps"]
+}
 
 class ProtocolService:
     def __init__(self):
         self.gemini_client = GeminiClientSingleton().client
-        self.protocol_dal = ProtocolDAL()
+        self.protocol_dal = AsyncProtocolDAL()
+        self.document_cache_dal = AsyncDocumentCacheDAL()
         self.bucket_client = BucketClient()
+        self.document_cache_max_entries = int(os.getenv("DOCUMENT_CACHE_MAX_ENTRIES", "1000"))
+        # Inline requests are capped at 20 MB including base64 overhead
+        self.gemini_inline_max_bytes = int(os.getenv("GEMINI_INLINE_MAX_BYTES", str(10 * 1024 * 1024)))
+        self.gemini_file_processing_timeout = float(os.getenv("GEMINI_FILE_PROCESSING_TIMEOUT_SECONDS", "300"))
+        self.extraction_strategy = ExtractionStrategy(os.getenv("PROTOCOL_EXTRACTION_STRATEGY", ExtractionStrategy.SEPARATE))
+        # Multi-page PDFs are OCR'd in page ranges of this size, at most ocr_concurrency at a time
+        self.ocr_pages_per_chunk = int(os.getenv("OCR_PAGES_PER_CHUNK", "4"))
+        self.ocr_concurrency = int(os.getenv("OCR_CONCURRENCY", "4"))
+        self._ocr_semaphore: Optional[asyncio.Semaphore] = None
+        # PDF pages whose embedded text passes _has_usable_text_layer skip OCR entirely
+        self.text_layer_enabled = os.getenv("OCR_TEXT_LAYER", "true").lower() == "true"
+        self.ocr_text_layer_min_chars = int(os.getenv("OCR_TEXT_LAYER_MIN_CHARS", "200"))
+        self.ocr_text_layer_empty_chars = int(os.getenv("OCR_TEXT_LAYER_EMPTY_CHARS", "20"))
+        self.ocr_text_layer_min_alnum_ratio = float(os.getenv("OCR_TEXT_LAYER_MIN_ALNUM_RATIO", "0.7"))
+        self.presigned_url_expiry = timedelta(seconds=int(os.getenv("PRESIGNED_URL_EXPIRY_SECONDS", "900")))
 
-    def create_protocol_preview(self, request: CreateProtocolPreviewRequest) -> ProtocolPreviewResponse:
-        """Create a protocol preview from uploaded file"""
+    async def start_protocol_ingestion(self, request: CreateProtocolPreviewRequest) -> IngestionJob:
+        """
+        Store the uploaded file and record a pending protocol document.
+
+        Files are content-addressed by SHA-256: a file that was uploaded before
+        reuses the stored object instead of writing another copy. Returns the
+        job for the ingestion queue, which runs OCR and parsing in the
+        background through ingest_protocol_document.
+        """
         try:
             # Determine content type based on file extension
             content_type = "application/pdf" if request.file_extension == "pdf" else f"image/{request.file_extension}"
-            
-            # Upload file to object storage
-            object_url = self.bucket_client.upload_file(
-                file_content=request.file_content,
-                filename=request.filename,
-                content_type=content_type
-            )
-            
-            # Create protocol document
-            document_id = uuid.uuid4()
-            protocol_id = uuid.uuid4()
 
-            # Extract text from file using Gemini AI
-            extracted_text = self._get_text_from_file(request.file_content, request.file_extension)
-            
-            # Create ProtocolDocument with extracted text in description
+            content_hash = await asyncio.to_thread(self._hash_stream, request.file_stream)
+            cache_entry = await self.document_cache_dal.get_entry(content_hash)
+
+            if cache_entry:
+                object_url = cache_entry.object_url
+                logger.info(f"Reusing stored object for {request.filename} ({content_hash})")
+            else:
+                # Stream the file to object storage
+                object_url = await asyncio.to_thread(
+                    self.bucket_client.upload_stream,
+                    stream=request.file_stream,
+                    filename=request.filename,
+                    content_type=content_type,
+                    length=request.file_size
+                )
+                now = datetime.now()
+                cache_entry = await self.document_cache_dal.create_entry(DocumentTextCacheEntry(
+                    content_hash=content_hash,
+                    object_url=object_url,
+                    mime_type=content_type,
+                    byte_size=request.file_size,
+                    created_at=now,
+                    last_accessed_at=now
+                ))
+                if cache_entry.object_url != object_url:
+                    # A concurrent upload of the same file won the race; keep its object
+                    await asyncio.to_thread(self.bucket_client.delete_file, object_url)
+                    object_url = cache_entry.object_url
+
+            now = datetime.now()
             protocol_document = ProtocolDocument(
-                document_id=document_id,
+                document_id=uuid.uuid4(),
                 document_name=request.filename,
-                description=extracted_text,  # Store extracted text from AI
+                description=request.description,
                 object_url=object_url,
                 mime_type=content_type,
-                ingestion_status=IngestionStatus.INGESTED,  # Mark as ingested since we extracted text
-                ingested_at=datetime.now(),
-                created_at=datetime.now(),
-                updated_at=datetime.now()
+                ingestion_status=IngestionStatus.PENDING,
+                ingested_at=None,
+                created_at=now,
+                updated_at=now
             )
-            
-            # Save protocol document to database
-            saved_document = self.protocol_dal.create_protocol_document(protocol_document)
-            
-            # Parse protocol using AI to extract structured information
-            protocol = self._parse_protocol(extracted_text, saved_document.document_id, protocol_id)
-            
-            # Parse protocol steps using AI
-            protocol_steps = self._parse_protocol_steps(extracted_text, protocol_id)
-            
-            # Save protocol to database
-            saved_protocol = self.protocol_dal.create_protocol(protocol)
-            
-            # Save protocol steps to database
-            for step in protocol_steps:
-                self.protocol_dal.create_protocol_step(step)
-            
-            # Return both protocol and steps with object URL
+            saved_document = await self.protocol_dal.create_protocol_document(protocol_document)
+
+            return IngestionJob(
+                document=saved_document,
+                file_extension=request.file_extension,
+                file_size=request.file_size,
+                content_hash=content_hash
+            )
+
+        except Exception as e:
+            raise Exception(f"Failed to start protocol ingestion: {str(e)}")
+
+    async def get_pending_ingestion_jobs(self) -> List[IngestionJob]:
+        """
+        Rebuild ingestion jobs for documents still pending, e.g. after a restart
+
+        The in-process queue doesn't survive the process, so anything queued or
+        mid-ingestion when it stopped is left pending in the database.
+        """
+        documents = await self.protocol_dal.get_protocol_documents_by_status(IngestionStatus.PENDING.value)
+        jobs = []
+        for document in documents:
+            # Stored objects are named "<uuid>.<extension of the uploaded file>"
+            file_extension = os.path.splitext(self.bucket_client.object_name(document.object_url))[1].lstrip(".")
+            cache_entry = await self.document_cache_dal.get_entry_by_object_url(document.object_url)
+            jobs.append(IngestionJob(
+                document=document,
+                file_extension=file_extension.lower(),
+                content_hash=cache_entry.content_hash if cache_entry else None
+            ))
+        return jobs
+
+    async def create_upload_url(self, filename: str, file_extension: str) -> PresignedUploadResponse:
+        """
+        Presign a direct-to-storage upload for a protocol document.
+
+        The browser PUTs the file to upload_url with the returned content type
+        and then calls start_ingestion_from_object with the object name, so the
+        file never passes through the API.
+        """
+        try:
+            object_name, upload_url = await asyncio.to_thread(
+                self.bucket_client.create_upload_url, filename, self.presigned_url_expiry
+            )
+            return PresignedUploadResponse(
+                object_name=object_name,
+                upload_url=upload_url,
+                content_type=self._get_mime_type(file_extension),
+                expires_in_seconds=int(self.presigned_url_expiry.total_seconds())
+            )
+        except Exception as e:
+            raise Exception(f"Failed to create upload URL: {str(e)}")
+
+    async def start_ingestion_from_object(self, request: IngestFromObjectRequest) -> IngestionJob:
+        """
+        Record a pending protocol document for a file uploaded straight to storage.
+
+        Only the object's metadata is read here; the ingestion worker streams
+        the object itself from storage if OCR needs it. The file is not hashed,
+        so unlike start_protocol_ingestion it is not deduplicated against
+        earlier uploads or served from the OCR cache.
+        """
+        match = UPLOADED_OBJECT_NAME.match(request.object_name)
+        if not match:
+            raise ValueError(f"Invalid object name: {request.object_name}")
+        file_extension = match.group("extension").lower()
+        if file_extension not in ALLOWED_IMAGE_EXTENSIONS + ALLOWED_PDF_EXTENSIONS:
+            raise ValueError(f"Invalid file type: {file_extension}")
+
+        object_url = self.bucket_client.object_url(request.object_name)
+        file_info = await asyncio.to_thread(self.bucket_client.get_file_info, object_url)
+        if not file_info:
+            raise ValueError(f"Uploaded object not found: {request.object_name}")
+
+        try:
+            now = datetime.now()
+            protocol_document = ProtocolDocument(
+                document_id=uuid.uuid4(),
+                document_name=request.filename,
+                description=request.description,
+                object_url=object_url,
+                mime_type=self._get_mime_type(file_extension),
+                ingestion_status=IngestionStatus.PENDING,
+                ingested_at=None,
+                created_at=now,
+                updated_at=now
+            )
+            saved_document = await self.protocol_dal.create_protocol_document(protocol_document)
+
+            return IngestionJob(
+                document=saved_document,
+                file_extension=file_extension,
+                file_size=file_info["size"]
+            )
+
+        except Exception as e:
+            raise Exception(f"Failed to start protocol ingestion: {str(e)}")
+
+    async def get_download_url(self, document_id: str) -> Optional[PresignedDownloadResponse]:
+        """Presign a direct-from-storage download of a protocol document, or None if it doesn't exist."""
+        try:
+            document = await self.protocol_dal.get_protocol_document(document_id)
+            if not document:
+                return None
+
+            download_url = await asyncio.to_thread(
+                self.bucket_client.create_download_url,
+                document.object_url,
+                self.presigned_url_expiry,
+                filename=document.document_name,
+                content_type=document.mime_type
+            )
+            return PresignedDownloadResponse(
+                document_id=document.document_id,
+                download_url=download_url,
+                expires_in_seconds=int(self.presigned_url_expiry.total_seconds())
+            )
+
+        except Exception as e:
+            raise Exception(f"Failed to create download URL: {str(e)}")
+
+    async def get_protocol_document_file(self, protocol_id: str) -> Optional[Tuple[ProtocolDocument, dict]]:
+        """A protocol's source document and its storage metadata (see BucketClient.get_file_info), or None."""
+        try:
+            protocol = await self.protocol_dal.get_protocol(protocol_id)
+            if not protocol:
+                return None
+            document = await self.protocol_dal.get_protocol_document(str(protocol.document_id))
+            if not document:
+                return None
+            file_info = await asyncio.to_thread(self.bucket_client.get_file_info, document.object_url)
+            if not file_info:
+                return None
+            return document, file_info
+
+        except Exception as e:
+            raise Exception(f"Failed to get protocol document: {str(e)}")
+
+    async def open_document_stream(self, document: ProtocolDocument, offset: int = 0, length: Optional[int] = None,
+                                   chunk_size: int = DOCUMENT_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Open a document, or a byte range of it, in storage and return an iterator over its chunks
+
+        The object is opened here, so a missing object fails before any bytes
+        are sent. The connection goes back to the pool once the iterator is
+        exhausted or closed.
+        """
+        response = await asyncio.to_thread(self.bucket_client.open_object, document.object_url, offset, length)
+
+        def chunks() -> Iterator[bytes]:
+            try:
+                yield from response.stream(chunk_size)
+            finally:
+                response.close()
+                response.release_conn()
+
+        return chunks()
+
+    async def ingest_protocol_document(self, job: IngestionJob) -> ProtocolPreviewResponse:
+        """
+        Extract, parse and save the protocol for a pending document
+
+        Stages run as a small DAG so independent work overlaps:
+        OCR  ->  parse (see _extract_protocol)  ->  save document, protocol and steps in one transaction
+
+        The document is marked failed if any stage raises.
+        """
+        document = job.document
+        try:
+            timings: Dict[str, float] = {}
+            pipeline_start = time.perf_counter()
+            protocol_id = uuid.uuid4()
+
+            # Extract text from file using Gemini AI, unless this exact file was extracted before
+            extracted_text = await self._timed(timings, "ocr", self._get_cached_text_from_file(job))
+
+            protocol, protocol_steps = await self._timed(timings, "parse", self._extract_protocol(
+                extracted_text, document.document_id, protocol_id
+            ))
+
+            # Mark the document ingested with the extracted text in its description,
+            # then write it, the protocol and every step in one transaction
+            now = datetime.now()
+            document = document.model_copy(update={
+                "description": extracted_text,
+                "ingestion_status": IngestionStatus.INGESTED,
+                "ingested_at": now,
+                "updated_at": now,
+            })
+            saved_protocol, saved_steps = await self._timed(timings, "save", self.protocol_dal.create_protocol_with_steps(
+                protocol, protocol_steps, document=document
+            ))
+
+            timings["total"] = round((time.perf_counter() - pipeline_start) * 1000, 1)
+            logger.info(f"Ingestion pipeline timings (ms) for {document.document_name}: {timings}")
+
             return ProtocolPreviewResponse(
                 protocol=saved_protocol,
-                protocol_steps=protocol_steps,
-                object_url=object_url
+                protocol_steps=saved_steps,
+                object_url=document.object_url,
+                stage_timings_ms=timings
+            )
+
+        except Exception as e:
+            logger.error(f"Failed to ingest document {document.document_id}: {e}")
+            failed_document = job.document.model_copy(update={
+                "ingestion_status": IngestionStatus.FAILED,
+                "updated_at": datetime.now(),
+            })
+            await self.protocol_dal.create_protocol_document(failed_document)
+            raise Exception(f"Failed to ingest protocol document: {str(e)}")
+
+    async def get_ingestion_status(self, document_id: str) -> Optional[ProtocolIngestionStatusResponse]:
+        """Return a document's ingestion status, with the parsed protocol once it is ingested."""
+        try:
+            document = await self.protocol_dal.get_protocol_document(document_id)
+            if not document:
+                return None
+
+            protocol = None
+            protocol_steps: List[ProtocolStep] = []
+            if document.ingestion_status == IngestionStatus.INGESTED:
+                protocols = await self.protocol_dal.get_protocols_by_document_id(document_id)
+                if protocols:
+                    protocol = protocols[0]
+                    protocol_steps = await self.protocol_dal.get_protocol_steps_by_protocol_id(str(protocol.protocol_id))
+
+            return ProtocolIngestionStatusResponse(
+                document_id=document.document_id,
+                document_name=document.document_name,
+                ingestion_status=document.ingestion_status,
+                object_url=document.object_url,
+                protocol=protocol,
+                protocol_steps=protocol_steps
             )
+
+        except Exception as e:
+            raise Exception(f"Failed to get ingestion status: {str(e)}")
+
+    async def _get_cached_text_from_file(self, job: IngestionJob) -> str:
+        """Return extracted text from the document cache, running OCR and filling the cache on a miss."""
+        if job.content_hash:
+            cache_entry = await self.document_cache_dal.get_entry(job.content_hash)
+            if cache_entry and cache_entry.extracted_text:
+                logger.info(f"OCR cache hit for {job.content_hash}")
+                return cache_entry.extracted_text
+
+        # Only a cache miss needs the file itself, so fetch it from storage here
+        if job.file_extension.lower() == "pdf" and PdfReader is not None:
+            extracted_text = await self._get_text_from_pdf_pages(job)
+        else:
+            document_part, gemini_file_name = await self._prepare_document_part(job)
+            try:
+                extracted_text = await self._get_text_from_file(document_part)
+            finally:
+                if gemini_file_name:
+                    await self._delete_gemini_file(gemini_file_name)
+
+        if job.content_hash:
+            await self.document_cache_dal.set_extracted_text(job.content_hash, extracted_text)
+            await self.document_cache_dal.delete_page_texts(job.content_hash)
+            await self.document_cache_dal.evict_least_recently_used(self.document_cache_max_entries)
+        return extracted_text
+
+    async def _get_text_from_pdf_pages(self, job: IngestionJob) -> str:
+        """
+        Extract a PDF's text page by page, OCR'ing only the pages that need it
+
+        Pages with a usable embedded text layer (see _has_usable_text_layer)
+        are read locally with pypdf. The rest are grouped into ranges of up to
+        ocr_pages_per_chunk consecutive pages and OCR'd concurrently, at most
+        ocr_concurrency at a time, so latency stays close to that of one range
+        however long the document is. Finished ranges are cached by content
+        hash; if any range fails, the document fails, but ingesting the same
+        file again only redoes the ranges that failed. PDFs that pypdf can't
+        read, or whose pages all need OCR and fit in one range, are sent whole.
+        """
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as temp_file:
+            await asyncio.to_thread(self.bucket_client.download_to_file, job.document.object_url, temp_file.name)
+            try:
+                page_texts, chunks = await asyncio.to_thread(self._split_pdf, temp_file.name)
+            except Exception as e:
+                logger.warning(f"Could not split {job.document.document_name}, OCR'ing it whole: {e}")
+                page_texts, chunks = {}, None
+            if chunks is None or (not page_texts and len(chunks) == 1):
+                document_part, gemini_file_name = await self._document_part_from_file(
+                    temp_file.name, "application/pdf", job.document.document_name
+                )
+                try:
+                    return await self._get_text_from_file(document_part)
+                finally:
+                    if gemini_file_name:
+                        await self._delete_gemini_file(gemini_file_name)
+
+        cached = {}
+        if chunks and job.content_hash:
+            cached = {
+                (entry.first_page, entry.last_page): entry.extracted_text
+                for entry in await self.document_cache_dal.get_page_texts(job.content_hash)
+            }
+        texts = await asyncio.gather(
+            *(self._get_text_from_pdf_chunk(job, first, last, data, cached) for first, last, data in chunks),
+            return_exceptions=True
+        )
+
+        failed = [f"{first + 1}-{last + 1}" for (first, last, _), text in zip(chunks, texts) if isinstance(text, Exception)]
+        if failed:
+            error = next(text for text in texts if isinstance(text, Exception))
+            raise Exception(f"OCR failed for pages {', '.join(failed)}: {error}")
+
+        ocr_page_count = sum(last - first + 1 for first, last, _ in chunks)
+        logger.info(
+            f"Extracted {job.document.document_name}: {len(page_texts)} pages from the text layer, "
+            f"{ocr_page_count} OCR'd in {len(chunks)} page ranges"
+        )
+        pages = sorted([*page_texts.items(), *((first, text) for (first, _, _), text in zip(chunks, texts))])
+        return "\n\n".join(text for _, text in pages if text.strip())
+
+    async def _get_text_from_pdf_chunk(self, job: IngestionJob, first_page: int, last_page: int, data: bytes,
+                                       cached: Dict[Tuple[int, int], str]) -> str:
+        """OCR one page range, or return it from the page cache"""
+        if (first_page, last_page) in cached:
+            return cached[(first_page, last_page)]
+
+        if self._ocr_semaphore is None:
+            self._ocr_semaphore = asyncio.Semaphore(self.ocr_concurrency)
+        async with self._ocr_semaphore:
+            with tempfile.NamedTemporaryFile(suffix=".pdf") as temp_file:
+                temp_file.write(data)
+                temp_file.flush()
+                document_part, gemini_file_name = await self._document_part_from_file(
+                    temp_file.name, "application/pdf", f"{job.document.document_name} pages {first_page + 1}-{last_page + 1}"
+                )
+            try:
+                text = await self._get_text_from_file(document_part)
+            finally:
+                if gemini_file_name:
+                    await self._delete_gemini_file(gemini_file_name)
+
+        if job.content_hash:
+            try:
+                await self.document_cache_dal.set_page_text(DocumentPageTextCacheEntry(
+                    content_hash=job.content_hash,
+                    first_page=first_page,
+                    last_page=last_page,
+                    extracted_text=text,
+                    created_at=datetime.now()
+                ))
+            except Exception as e:
+                # Only costs a re-OCR of these pages if the document is retried
+                logger.warning(f"Could not cache OCR of pages {first_page + 1}-{last_page + 1}: {e}")
+        return text
+
+    def _split_pdf(self, path: str) -> Tuple[Dict[int, str], List[Tuple[int, int, bytes]]]:
+        """
+        Read a PDF's usable text layer and split the remaining pages into ranges to OCR
+
+        Returns:
+            Text by page number for pages that don't need OCR, and the pages
+            that do as standalone PDFs: (first page, last page, bytes). Page
+            numbers are 0-based and ranges inclusive.
+        """
+        reader = PdfReader(path)
+        if reader.is_encrypted:
+            reader.decrypt("")
+
+        page_texts = {}
+        ocr_pages = []
+        for page_number, page in enumerate(reader.pages):
+            if self.text_layer_enabled:
+                try:
+                    text = page.extract_text() or ""
+                except Exception as e:
+                    logger.debug(f"Could not read the text layer of page {page_number + 1}: {e}")
+                    text = None
+                if text is not None and self._has_usable_text_layer(page, text):
+                    page_texts[page_number] = text
+                    continue
+            ocr_pages.append(page_number)
+
+        # Consecutive pages that need OCR share a range, up to ocr_pages_per_chunk pages
+        ranges: List[List[int]] = []
+        for page_number in ocr_pages:
+            if ranges and ranges[-1][-1] == page_number - 1 and len(ranges[-1]) < self.ocr_pages_per_chunk:
+                ranges[-1].append(page_number)
+            else:
+                ranges.append([page_number])
+
+        chunks = []
+        for page_numbers in ranges:
+            writer = PdfWriter()
+            for page_number in page_numbers:
+                writer.add_page(reader.pages[page_number])
+            output = io.BytesIO()
+            writer.write(output)
+            chunks.append((page_numbers[0], page_numbers[-1], output.getvalue()))
+        return page_texts, chunks
+
+    def _has_usable_text_layer(self, page, text: str) -> bool:
+        """
+        Whether a page's embedded text can stand in for OCR
+
+        Pages with (almost) no text always go to OCR: a scan can hide its
+        image in ways that are easy to miss, and a truly blank page only costs
+        one small request. Pages with images need at least
+        ocr_text_layer_min_chars of text; with less they are scans, or
+        figures whose content only OCR can read. The text must also be mostly
+        letters and digits: fonts without a Unicode mapping extract as symbols.
+        """
+        characters = "".join(text.split())
+        if not characters or len(characters) < self.ocr_text_layer_empty_chars:
+            return False
+        if len(characters) < self.ocr_text_layer_min_chars and self._page_has_images(page):
+            return False
+        alphanumeric = sum(character.isalnum() for character in characters)
+        return alphanumeric / len(characters) >= self.ocr_text_layer_min_alnum_ratio
+
+    @staticmethod
+    def _page_has_images(page) -> bool:
+        """Whether a pypdf page draws any images, including inline images and images inside forms."""
+        try:
+            # Only lists the images; nothing is decoded
+            return len(page.images) > 0
+        except Exception as e:
+            logger.debug(f"Could not list page images, assuming there are some: {e}")
+            return True
+
+    @staticmethod
+    def _hash_stream(stream, chunk_size: int = 1024 * 1024) -> str:
+        """SHA-256 a file object in chunks and rewind it for the upload."""
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: stream.read(chunk_size), b""):
+            digest.update(chunk)
+        stream.seek(0)
+        return digest.hexdigest()
+
+    async def _timed(self, timings: Dict[str, float], stage: str, awaitable):
+        """Await a pipeline stage and record its wall-clock duration in milliseconds."""
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            timings[stage] = round((time.perf_counter() - start) * 1000, 1)
+
+    async def _extract_protocol(
+        self,
+        text: str,
+        document_id: uuid.UUID,
+        protocol_id: uuid.UUID,
+        strategy: Optional[ExtractionStrategy] = None,
+        usage: Optional[Dict[str, int]] = None
+    ) -> Tuple[Protocol, List[ProtocolStep]]:
+        """
+        Turn extracted text into a protocol and its steps using the configured strategy
+
+        SEPARATE runs the protocol and step parses as two concurrent calls.
+        COMBINED asks for both in one call, so the text is only sent once.
+        """
+        strategy = strategy or self.extraction_strategy
+        if strategy == ExtractionStrategy.COMBINED:
+            return await self._parse_protocol_with_steps(text, document_id, protocol_id, usage=usage)
+
+        # Both parse calls only depend on the extracted text
+        protocol, protocol_steps = await asyncio.gather(
+            self._parse_protocol(text, document_id, protocol_id, usage=usage),
+            self._parse_protocol_steps(text, protocol_id, usage=usage),
+        )
+        return protocol, protocol_steps
+
+    async def _prepare_document_part(self, job: IngestionJob) -> Tuple[dict, Optional[str]]:
+        """
+        Build the Gemini content part that refers to a job's stored document
+        
+        Small files are sent inline as base64. Files larger than
+        GEMINI_INLINE_MAX_BYTES are streamed from storage to a temporary file,
+        uploaded once through the Gemini Files API and referenced by URI, so
+        every stage that needs the document reuses that one upload.
+        
+        Args:
+            job: Ingestion job for the stored document
             
+        Returns:
+            The content part, and the Gemini file name to delete afterwards (None for inline parts)
+        """
+        mime_type = self._get_mime_type(job.file_extension)
+        file_size = job.file_size
+        if file_size is None:
+            file_info = await asyncio.to_thread(self.bucket_client.get_file_info, job.document.object_url)
+            file_size = file_info["size"] if file_info else 0
+
+        if file_size <= self.gemini_inline_max_bytes:
+            file_content = await asyncio.to_thread(self.bucket_client.download_file, job.document.object_url)
+            encoded_file = base64.b64encode(file_content).decode("utf-8")
+            return {"inline_data": {"mime_type": mime_type, "data": encoded_file}}, None
+
+        with tempfile.NamedTemporaryFile(suffix=f".{job.file_extension}") as temp_file:
+            await asyncio.to_thread(self.bucket_client.download_to_file, job.document.object_url, temp_file.name)
+            return await self._document_part_from_file(temp_file.name, mime_type, job.document.document_name)
+
+    async def _document_part_from_file(self, path: str, mime_type: str, display_name: str) -> Tuple[dict, Optional[str]]:
+        """Content part for a local file: inline if it is small enough, otherwise uploaded through the Files API"""
+        file_size = os.path.getsize(path)
+        if file_size <= self.gemini_inline_max_bytes:
+            with open(path, "rb") as file:
+                encoded_file = base64.b64encode(file.read()).decode("utf-8")
+            return {"inline_data": {"mime_type": mime_type, "data": encoded_file}}, None
+
+        uploaded_file = await self.gemini_client.aio.files.upload(
+            file=path,
+            config={"mime_type": mime_type, "display_name": display_name}
+        )
+
+        # Large PDFs are processed asynchronously on Gemini's side before they can be used
+        try:
+            deadline = time.monotonic() + self.gemini_file_processing_timeout
+            while uploaded_file.state == FileState.PROCESSING:
+                if time.monotonic() >= deadline:
+                    raise Exception(
+                        f"Gemini did not finish processing uploaded file {uploaded_file.name} "
+                        f"within {self.gemini_file_processing_timeout:g}s"
+                    )
+                await asyncio.sleep(1)
+                uploaded_file = await self.gemini_client.aio.files.get(name=uploaded_file.name)
+            if uploaded_file.state == FileState.FAILED:
+                raise Exception(f"Gemini could not process uploaded file {uploaded_file.name}")
+        except Exception:
+            # The caller never sees the name, so clean up here
+            await self._delete_gemini_file(uploaded_file.name)
+            raise
+
+        logger.info(f"Uploaded {display_name} ({file_size} bytes) to Gemini as {uploaded_file.name}")
+        return {"file_data": {"mime_type": mime_type, "file_uri": uploaded_file.uri}}, uploaded_file.name
+
+    async def _delete_gemini_file(self, name: str) -> None:
+        """Delete a file uploaded through the Gemini Files API; it would otherwise expire after 48 hours."""
+        try:
+            await self.gemini_client.aio.files.delete(name=name)
         except Exception as e:
-            raise Exception(f"Failed to create protocol preview: {str(e)}")
+            logger.warning(f"Failed to delete Gemini file {name}: {e}")
 
+    def _get_mime_type(self, file_extension: str) -> str:
+        """Determine MIME type based on file extension"""
+        if file_extension.lower() == 'pdf':
+            return "application/pdf"
+        elif file_extension.lower() in ['jpg', 'jpeg']:
+            return "image/jpeg"
+        elif file_extension.lower() == 'png':
+            return "image/png"
+        elif file_extension.lower() == 'gif':
+            return "image/gif"
+        elif file_extension.lower() == 'bmp':
+            return "image/bmp"
+        elif file_extension.lower() == 'tiff':
+            return "image/tiff"
+        elif file_extension.lower() == 'webp':
+            return "image/webp"
+        else:
+            return f"image/{file_extension}"
 
-    def _get_text_from_file(self, file_content: bytes, file_extension: str) -> str:
+    async def _get_text_from_file(self, document_part: dict) -> str:
         """
         Extract text from PDF or image using Gemini AI
         
         Args:
-            file_content: Raw file content as bytes
-            file_extension: File extension (pdf, jpg, png, etc.)
+            document_part: Inline or file-URI content part from _prepare_document_part
             
         Returns:
             str: Extracted text from the file
         """
         try:
-            import base64
-            
-            # file_content is already bytes, so we can encode it directly
-            encoded_file = base64.b64encode(file_content).decode("utf-8")
-            
-            # Determine MIME type based on file extension
-            if file_extension.lower() == 'pdf':
-                mime_type = "application/pdf"
-            elif file_extension.lower() in ['jpg', 'jpeg']:
-                mime_type = "image/jpeg"
-            elif file_extension.lower() == 'png':
-                mime_type = "image/png"
-            elif file_extension.lower() == 'gif':
-                mime_type = "image/gif"
-            elif file_extension.lower() == 'bmp':
-                mime_type = "image/bmp"
-            elif file_extension.lower() == 'tiff':
-                mime_type = "image/tiff"
-            elif file_extension.lower() == 'webp':
-                mime_type = "image/webp"
-            else:
-                mime_type = f"image/{file_extension}"
-            
             # Choose model (Gemini 2.5 Pro supports both PDF and image input)
             model_name = "gemini-2.5-pro"
             
             # Send request to extract text from file
-            response = self.gemini_client.models.generate_content(
+            response = await self.gemini_client.aio.models.generate_content(
                 model=model_name,
                 contents=[
                     {
                         "parts": [
-                            {
-                                "inline_data": {
-                                    "mime_type": mime_type,
-                                    "data": encoded_file
-                                }
-                            },
+                            document_part,
                             {
                                 "text": "Extract all text from this document. Preserve line breaks, formatting, and structure if possible. If this is a scientific protocol, focus on extracting the step-by-step instructions, materials, and procedures."
                             }
@@ -136,13 +734,14 @@ class ProtocolService:
         except Exception as e:
             raise Exception(f"Failed to extract text from file: {str(e)}")
 
-    def _parse_protocol_steps(self, text: str, protocol_id: uuid.UUID) -> List[ProtocolStep]:
+    async def _parse_protocol_steps(self, text: str, protocol_id: uuid.UUID, usage: Optional[Dict[str, int]] = None) -> List[ProtocolStep]:
         """
         Parse protocol text and extract structured protocol steps using Gemini AI
         
         Args:
             text: Extracted text from the protocol document
             protocol_id: UUID of the protocol these steps belong to
+            usage: Optional dict that token counts are added to
             
         Returns:
             List[ProtocolStep]: List of structured protocol steps
@@ -150,22 +749,7 @@ class ProtocolService:
         try:
             now = datetime.now()
             
-            # Create a simplified schema that doesn't include UUID fields
-            step_schema = {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "step_number": {"type": "integer"},
-                        "step_name": {"type": "string"},
-                        "instruction": {"type": "string"},
-                        "expected_duration_minutes": {"type": "integer"}
-                    },
-                    "required": ["step_number", "step_name", "instruction"]
-                }
-            }
-            
-            response = self.gemini_client.models.generate_content(
+            response = await self.gemini_client.aio.models.generate_content(
                 model="gemini-2.5-flash",
                 contents=[
                     {
@@ -184,33 +768,36 @@ class ProtocolService:
                 ],
                 config={
                     "response_mime_type": "application/json",
-                    "response_schema": step_schema,
+                    "response_schema": STEP_SCHEMA,
                 },
             )
             
             # Parse the JSON response and create ProtocolStep objects with proper UUIDs
-            steps_data = json.loads(response.text)
-            protocol_steps = []
-            
-            for step_data in steps_data:
-                protocol_step = ProtocolStep(
-                    protocol_step_id=uuid.uuid4(),  # Generate proper UUID
-                    protocol_id=protocol_id,
-                    step_number=step_data["step_number"],
-                    step_name=step_data["step_name"],
-                    instruction=step_data["instruction"],
-                    expected_duration_minutes=step_data.get("expected_duration_minutes"),
-                    created_at=now,
-                    updated_at=now
-                )
-                protocol_steps.append(protocol_step)
+            protocol_steps = self._build_protocol_steps(json.loads(response.text), protocol_id, now)
             
+            self._record_usage(usage, response)
             return protocol_steps
             
         except Exception as e:
             raise Exception(f"Failed to parse protocol steps: {str(e)}")
 
-    def _parse_protocol(self, text: str, document_id: uuid.UUID, protocol_id: uuid.UUID) -> Protocol:
+    def _build_protocol_steps(self, steps_data: List[dict], protocol_id: uuid.UUID, now: datetime) -> List[ProtocolStep]:
+        """Create ProtocolStep objects with generated UUIDs from parsed step JSON."""
+        return [
+            ProtocolStep(
+                protocol_step_id=uuid.uuid4(),  # Generate proper UUID
+                protocol_id=protocol_id,
+                step_number=step_data["step_number"],
+                step_name=step_data["step_name"],
+                instruction=step_data["instruction"],
+                expected_duration_minutes=step_data.get("expected_duration_minutes"),
+                created_at=now,
+                updated_at=now
+            )
+            for step_data in steps_data
+        ]
+
+    async def _parse_protocol(self, text: str, document_id: uuid.UUID, protocol_id: uuid.UUID, usage: Optional[Dict[str, int]] = None) -> Protocol:
         """
         Parse protocol text and extract structured protocol information using Gemini AI
         
@@ -218,6 +805,7 @@ class ProtocolService:
             text: Extracted text from the protocol document
             document_id: UUID of the document
             protocol_id: UUID of the protocol
+            usage: Optional dict that token counts are added to
             
         Returns:
             Protocol: Structured protocol object
@@ -225,7 +813,7 @@ class ProtocolService:
         try:
             now = datetime.now()
             
-            response = self.gemini_client.models.generate_content(
+            response = await self.gemini_client.aio.models.generate_content(
                 model="gemini-2.5-flash",
                 contents=[
                     {
@@ -254,8 +842,79 @@ class ProtocolService:
             protocol_data = json.loads(response.text)
             protocol = Protocol(**protocol_data)
             
+            self._record_usage(usage, response)
             return protocol
             
         except Exception as e:
             raise Exception(f"Failed to parse protocol: {str(e)}")
 
+    async def _parse_protocol_with_steps(
+        self,
+        text: str,
+        document_id: uuid.UUID,
+        protocol_id: uuid.UUID,
+        usage: Optional[Dict[str, int]] = None
+    ) -> Tuple[Protocol, List[ProtocolStep]]:
+        """
+        Parse protocol metadata and steps from protocol text in a single Gemini call
+        
+        Args:
+            text: Extracted text from the protocol document
+            document_id: UUID of the document
+            protocol_id: UUID of the protocol
+            usage: Optional dict that token counts are added to
+            
+        Returns:
+            Tuple[Protocol, List[ProtocolStep]]: Structured protocol and its steps
+        """
+        try:
+            now = datetime.now()
+            
+            response = await self.gemini_client.aio.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=[
+                    {
+                        "role": "user",
+                        "parts": [
+                            {
+                                "text": (
+                                    f"Given the following protocol text, produce JSON matching the schema with the protocol and each of its steps.\n"
+                                    f"The protocol description should be a concise summary of what is accomplished in the experiment.\n"
+                                    f"There will often be a step with sub steps; in that case treat every step as its own step number.\n"
+                                    f"If there is a time range given vs an exact time, select the upper bound of the time range.\n"
+                                    f"Text:\n{text}"
+                                )
+                            }
+                        ],
+                    }
+                ],
+                config={
+                    "response_mime_type": "application/json",
+                    "response_schema": COMBINED_SCHEMA,
+                },
+            )
+            
+            data = json.loads(response.text)
+            protocol = Protocol(
+                protocol_id=protocol_id,
+                document_id=document_id,
+                protocol_name=data["protocol"]["protocol_name"],
+                description=data["protocol"].get("description"),
+                created_at=now,
+                updated_at=now
+            )
+            protocol_steps = self._build_protocol_steps(data["steps"], protocol_id, now)
+            
+            self._record_usage(usage, response)
+            return protocol, protocol_steps
+            
+        except Exception as e:
+            raise Exception(f"Failed to parse protocol with steps: {str(e)}")
+
+    def _record_usage(self, usage: Optional[Dict[str, int]], response) -> None:
+        """Add a response's token counts to a usage accumulator."""
+        metadata = getattr(response, "usage_metadata", None)
+        if usage is None or metadata is None:
+            return
+        for key, field in (("prompt_tokens", "prompt_token_count"), ("output_tokens", "candidates_token_count"), ("total_tokens", "total_token_count")):
+            usage[key] = usage.get(key, 0) + (getattr(metadata, field, None) or 0)
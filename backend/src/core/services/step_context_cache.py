@@ -0,0 +1,182 @@
+from src.dal.databases.async_dal import AsyncExperimentDAL, AsyncProtocolDAL
+from src.core.entities.protocol_entities import ProtocolStep
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import os
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class ProtocolPromptContext:
+    """
+    Prompt prefixes for every step of one protocol, rendered when it is loaded.
+
+    Each step gets two prefixes, mirroring build_prompt() in the realtime test:
+    one for when the step is about to begin and one for while it is underway.
+    """
+
+    def __init__(self, protocol_id: str, steps: List[ProtocolStep]):
+        self.protocol_id = protocol_id
+        self.steps = steps
+        self.active: Dict[uuid.UUID, str] = {}
+        self.upcoming: Dict[uuid.UUID, str] = {}
+        if not steps:
+            self.overview = self.complete = ""
+            return
+
+        self.overview = "Protocol steps:\n" + "\n".join(f"{s.step_number}. {s.step_name}" for s in steps)
+        for step in steps:
+            description = f"step {step.step_number}: '{step.step_name}' — {step.instruction}"
+            if step.expected_duration_minutes:
+                description += f" (about {step.expected_duration_minutes} minutes)"
+            self.upcoming[step.protocol_step_id] = (
+                f"{self.overview}\n\nThe experiment is about to begin {description}. "
+                "Confirm the scientist is ready before they start."
+            )
+            self.active[step.protocol_step_id] = (
+                f"{self.overview}\n\nThe scientist is currently on {description}. "
+                "Help them complete it. When they say it is done, move on to the next step."
+            )
+        self.complete = f"{self.overview}\n\nAll steps are complete. Congratulate the scientist and wrap up the run."
+
+    def render(self, step_id: Optional[uuid.UUID], in_progress: bool) -> str:
+        """Prefix for a position in the protocol; step_id None means every step is done."""
+        if step_id is None:
+            return self.complete
+        prompts = self.active if in_progress else self.upcoming
+        return prompts.get(step_id, self.overview)
+
+
+class ExperimentPosition:
+    """Which protocol an experiment runs and where in it the scientist is."""
+
+    def __init__(self, protocol_id: str, step_id: Optional[uuid.UUID], in_progress: bool):
+        self.protocol_id = protocol_id
+        self.step_id = step_id
+        self.in_progress = in_progress
+
+
+class StepContextCache:
+    """
+    In-memory cache of per-step prompt context for running experiments.
+
+    Protocol steps are loaded and rendered once per protocol, normally when an
+    experiment starts, and shared by every experiment on that protocol. Each
+    experiment only tracks its current step, which IntentRouter moves as steps
+    are completed, so a voice turn picks its prompt prefix without touching
+    Postgres. Experiments that aren't cached yet (e.g. after a restart) are
+    loaded on first use. invalidate_protocol() drops a protocol's rendered
+    steps when it is edited; they are rebuilt on the next turn.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or int(os.getenv("STEP_CONTEXT_CACHE_MAX", "200"))
+        self.experiment_dal = AsyncExperimentDAL()
+        self.protocol_dal = AsyncProtocolDAL()
+        self._protocols: "OrderedDict[str, ProtocolPromptContext]" = OrderedDict()
+        self._experiments: "OrderedDict[str, ExperimentPosition]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+
+    async def load(self, experiment_id: str, protocol_id: str) -> None:
+        """Cache a newly started experiment, positioned before its first step."""
+        protocol = await self._protocol(protocol_id)
+        first_step = protocol.steps[0].protocol_step_id if protocol.steps else None
+        self._remember(self._experiments, experiment_id, ExperimentPosition(protocol_id, first_step, in_progress=False))
+
+    async def prompt(self, experiment_id: str) -> str:
+        """Prompt prefix for the experiment's current step, or "" if it is unknown."""
+        position = await self._position(experiment_id)
+        if position is None:
+            return ""
+        protocol = await self._protocol(position.protocol_id)
+        return protocol.render(position.step_id, position.in_progress)
+
+    async def steps(self, experiment_id: str) -> Optional[List[ProtocolStep]]:
+        """The experiment's protocol steps, or None if the experiment doesn't exist."""
+        position = await self._position(experiment_id)
+        if position is None:
+            return None
+        return (await self._protocol(position.protocol_id)).steps
+
+    async def has_experiment(self, experiment_id: str) -> bool:
+        """Whether the experiment exists; only queries Postgres the first time."""
+        return await self._position(experiment_id) is not None
+
+    def move_to(self, experiment_id: str, step_id: Optional[uuid.UUID], in_progress: bool = True) -> None:
+        """Record the experiment's new current step; step_id None once the protocol is complete."""
+        position = self._experiments.get(experiment_id)
+        if position:
+            position.step_id = step_id
+            position.in_progress = in_progress
+
+    def invalidate_protocol(self, protocol_id: str) -> None:
+        """Drop a protocol's rendered steps so they are reloaded on next use."""
+        self._protocols.pop(protocol_id, None)
+
+    def discard(self, experiment_id: str) -> None:
+        """Forget an experiment, e.g. when it stops."""
+        self._experiments.pop(experiment_id, None)
+
+    async def _position(self, experiment_id: str) -> Optional[ExperimentPosition]:
+        position = self._experiments.get(experiment_id)
+        if position is None:
+            position = await self._shared_load(f"experiment:{experiment_id}", self._load_position(experiment_id))
+            if position is None:
+                return None
+        self._remember(self._experiments, experiment_id, position)
+        return position
+
+    async def _protocol(self, protocol_id: str) -> ProtocolPromptContext:
+        protocol = self._protocols.get(protocol_id)
+        if protocol is None:
+            protocol = await self._shared_load(f"protocol:{protocol_id}", self._load_protocol(protocol_id))
+        self._remember(self._protocols, protocol_id, protocol)
+        return protocol
+
+    async def _shared_load(self, key: str, coroutine):
+        # Concurrent turns for the same experiment or protocol share one query
+        loading = self._loading.get(key)
+        if loading is None:
+            loading = asyncio.create_task(coroutine)
+            self._loading[key] = loading
+        else:
+            coroutine.close()
+        try:
+            return await loading
+        finally:
+            self._loading.pop(key, None)
+
+    async def _load_protocol(self, protocol_id: str) -> ProtocolPromptContext:
+        steps = await self.protocol_dal.get_protocol_steps_by_protocol_id(protocol_id)
+        logger.info(f"Rendered step context for protocol {protocol_id} ({len(steps)} steps)")
+        return ProtocolPromptContext(protocol_id, steps)
+
+    async def _load_position(self, experiment_id: str) -> Optional[ExperimentPosition]:
+        experiment = await self.experiment_dal.get_experiment(experiment_id)
+        if not experiment:
+            return None
+        protocol_id = str(experiment.protocol_id)
+        protocol = await self._protocol(protocol_id)
+        experiment_steps = await self.experiment_dal.get_experiment_steps_by_experiment_id(experiment_id)
+
+        current = next((s for s in reversed(experiment_steps) if s.status == "in_progress"), None)
+        if current:
+            return ExperimentPosition(protocol_id, current.protocol_step_id, in_progress=True)
+        positions = {s.protocol_step_id: i for i, s in enumerate(protocol.steps)}
+        reached = [positions[s.protocol_step_id] for s in experiment_steps if s.protocol_step_id in positions]
+        next_index = max(reached) + 1 if reached else 0
+        if next_index >= len(protocol.steps):
+            return ExperimentPosition(protocol_id, None, in_progress=False)
+        return ExperimentPosition(protocol_id, protocol.steps[next_index].protocol_step_id, in_progress=False)
+
+    def _remember(self, entries: OrderedDict, key: str, value) -> None:
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+
+step_context_cache = StepContextCache()
@@ -0,0 +1,160 @@
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Optional
+import numpy as np
+
+
+class VoiceActivityDetector:
+    """
+    Energy and zero-crossing voice activity detection over 16-bit mono PCM.
+
+    Audio is cut into fixed frames and every frame gets an energy (dBFS) and a
+    zero-crossing rate, computed for the whole buffer at once. The noise floor
+    is tracked as the minimum frame energy over a sliding window, so it follows
+    a fume hood switching on or a centrifuge spinning down. A frame is speech
+    when it is clearly above the floor and doesn't look like broadband hiss.
+    Speech runs shorter than min_speech_ms (clicks, bumps) are dropped and
+    hangover_ms of trailing frames are kept so pauses between words don't split
+    an utterance.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 20,
+        margin_db: float = 12.0,
+        min_energy_db: float = -55.0,
+        max_zero_crossing_rate: float = 0.45,
+        noise_window_ms: int = 1500,
+        min_speech_ms: int = 60,
+        hangover_ms: int = 300,
+    ):
+        self.sample_rate = sample_rate
+        self.frame_length = sample_rate * frame_ms // 1000
+        self.margin_db = margin_db
+        self.min_energy_db = min_energy_db
+        self.max_zero_crossing_rate = max_zero_crossing_rate
+        self.noise_window = max(noise_window_ms // frame_ms, 1)
+        self.min_speech_frames = max(min_speech_ms // frame_ms, 1)
+        self.hangover_frames = hangover_ms // frame_ms
+
+    def frame_features(self, samples: np.ndarray):
+        """Energy in dBFS and zero-crossing rate for every whole frame of samples."""
+        frame_count = samples.size // self.frame_length
+        frames = samples[:frame_count * self.frame_length].reshape(frame_count, self.frame_length).astype(np.float32)
+        rms = np.sqrt(np.mean(frames ** 2, axis=1))
+        energy_db = 20 * np.log10(np.maximum(rms, 1.0) / 32768.0)
+        signs = np.signbit(frames)
+        zero_crossing_rate = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_length - 1)
+        return energy_db, zero_crossing_rate
+
+    def noise_floor(self, energy_db: np.ndarray) -> np.ndarray:
+        """
+        Minimum energy over a window centred on each frame.
+
+        Whole buffers can look ahead, so a clip that opens mid-sentence still
+        gets a floor from the pause that follows.
+        """
+        half = self.noise_window // 2
+        padded = np.pad(energy_db, (half, self.noise_window - 1 - half), mode="edge")
+        return sliding_window_view(padded, self.noise_window).min(axis=1)
+
+    def classify(self, energy_db: np.ndarray, zero_crossing_rate: np.ndarray, noise_floor: np.ndarray) -> np.ndarray:
+        """Raw per-frame speech decision, before run filtering and hangover."""
+        return (
+            (energy_db > noise_floor + self.margin_db)
+            & (energy_db > self.min_energy_db)
+            & (zero_crossing_rate < self.max_zero_crossing_rate)
+        )
+
+    def smooth(self, speech: np.ndarray) -> np.ndarray:
+        """Drop speech runs shorter than min_speech_frames, then extend each run by the hangover."""
+        edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        keep = (ends - starts) >= self.min_speech_frames
+
+        smoothed = np.zeros(speech.size, dtype=bool)
+        if not keep.any():
+            return smoothed
+        # Paint the kept runs, padded by the hangover, back onto the frame axis
+        coverage = np.zeros(speech.size + 1, dtype=np.int32)
+        np.add.at(coverage, starts[keep], 1)
+        np.add.at(coverage, np.minimum(ends[keep] + self.hangover_frames, speech.size), -1)
+        return np.cumsum(coverage[:-1]) > 0
+
+    def detect(self, samples: np.ndarray) -> np.ndarray:
+        """Per-frame speech mask for a whole buffer of int16 samples."""
+        energy_db, zero_crossing_rate = self.frame_features(samples)
+        if energy_db.size == 0:
+            return np.zeros(0, dtype=bool)
+        speech = self.classify(energy_db, zero_crossing_rate, self.noise_floor(energy_db))
+        return self.smooth(speech)
+
+    def trim(self, samples: np.ndarray, padding_ms: int = 200) -> np.ndarray:
+        """Cut leading and trailing non-speech, keeping padding_ms around the speech."""
+        speech = np.flatnonzero(self.detect(samples))
+        if speech.size == 0:
+            return samples[:0]
+        padding = self.sample_rate * padding_ms // 1000
+        start = max(speech[0] * self.frame_length - padding, 0)
+        end = min((speech[-1] + 1) * self.frame_length + padding, samples.size)
+        return samples[start:end]
+
+
+class StreamingVoiceActivityDetector:
+    """
+    Incremental turn segmentation for live audio built on VoiceActivityDetector.
+
+    Chunks of any size are fed in as they arrive. Features are computed for all
+    complete frames in the chunk at once; the noise floor only looks back, over
+    the last noise_window frames. process() reports "speech_start" when a run of
+    speech reaches min_speech_ms and "speech_end" once hangover_ms of silence
+    has followed it.
+    """
+
+    def __init__(self, detector: Optional[VoiceActivityDetector] = None, initial_noise_floor_db: float = -50.0):
+        self.detector = detector or VoiceActivityDetector()
+        self._remainder = np.zeros(0, dtype=np.int16)
+        self._history = np.full(self.detector.noise_window, initial_noise_floor_db, dtype=np.float32)
+        self._speech_run = 0
+        self._silence_run = 0
+        self.speaking = False
+
+    def process(self, samples: np.ndarray) -> List[str]:
+        """Feed int16 samples and return the turn events they trigger, in order."""
+        samples = np.concatenate((self._remainder, samples))
+        usable = samples.size - samples.size % self.detector.frame_length
+        self._remainder = samples[usable:]
+        energy_db, zero_crossing_rate = self.detector.frame_features(samples[:usable])
+        if energy_db.size == 0:
+            return []
+
+        # Causal floor: minimum over the trailing window, including frames before this chunk
+        window = self.detector.noise_window
+        history = np.concatenate((self._history, energy_db))
+        noise_floor = sliding_window_view(history, window)[1:].min(axis=1)
+        self._history = history[-window:]
+        speech = self.detector.classify(energy_db, zero_crossing_rate, noise_floor)
+
+        events = []
+        for is_speech in speech:
+            if is_speech:
+                self._speech_run += 1
+                self._silence_run = 0
+                if not self.speaking and self._speech_run >= self.detector.min_speech_frames:
+                    self.speaking = True
+                    events.append("speech_start")
+            else:
+                self._speech_run = 0
+                self._silence_run += 1
+                if self.speaking and self._silence_run > self.detector.hangover_frames:
+                    self.speaking = False
+                    events.append("speech_end")
+        return events
+
+    def reset(self) -> None:
+        """Forget the current utterance but keep the learned noise floor."""
+        self._remainder = np.zeros(0, dtype=np.int16)
+        self._speech_run = 0
+        self._silence_run = 0
+        self.speaking = False
@@ -0,0 +1,199 @@
+from src.dal.integrations.gemini_client import GeminiClientSingleton
+from src.core.services.experiment_service import SYSTEM_PROMPT
+from src.core.services.conversation_store import ConversationSession, conversation_store
+from src.core.services.step_context_cache import step_context_cache
+from src.core.services.voice_activity import StreamingVoiceActivityDetector, VoiceActivityDetector
+from fastapi import WebSocket, WebSocketDisconnect
+from google.genai import types
+from collections import deque
+import asyncio
+import json
+import logging
+import os
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Clients stream raw 16-bit little-endian mono PCM at this rate
+INPUT_SAMPLE_RATE = 16000
+INPUT_MIME_TYPE = f"audio/pcm;rate={INPUT_SAMPLE_RATE}"
+
+# Audio kept from before speech is detected so the first syllable isn't clipped
+PREROLL_MS = 500
+
+LIVE_CONFIG = {
+    "response_modalities": ["TEXT"],
+    "input_audio_transcription": {},
+}
+
+
+class TurnSegmenter:
+    """
+    Marks user turns on a Live session with local voice activity detection.
+
+    Audio is only forwarded between activity_start and activity_end, together
+    with a short pre-roll, so silence and bench noise never reach the model and
+    the end of a turn is signalled as soon as the hangover expires.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.vad = StreamingVoiceActivityDetector(VoiceActivityDetector(sample_rate=INPUT_SAMPLE_RATE))
+        self.preroll = deque()
+        self.preroll_bytes = 0
+        self.max_preroll_bytes = INPUT_SAMPLE_RATE * 2 * PREROLL_MS // 1000
+        # Trailing byte of a frame that split a 16-bit sample, prepended to the next frame
+        self.carry = b""
+
+    async def feed(self, chunk: bytes) -> None:
+        chunk = self.carry + chunk
+        aligned = len(chunk) - len(chunk) % 2
+        chunk, self.carry = chunk[:aligned], chunk[aligned:]
+        if not chunk:
+            return
+
+        was_speaking = self.vad.speaking
+        events = self.vad.process(np.frombuffer(chunk, dtype=np.int16))
+
+        if was_speaking:
+            await self._send(chunk)
+        else:
+            self.preroll.append(chunk)
+            self.preroll_bytes += len(chunk)
+            while self.preroll_bytes - len(self.preroll[0]) >= self.max_preroll_bytes:
+                self.preroll_bytes -= len(self.preroll.popleft())
+
+        for event in events:
+            if event == "speech_start":
+                await self.session.send_realtime_input(activity_start=types.ActivityStart())
+                while self.preroll:
+                    await self._send(self.preroll.popleft())
+                self.preroll_bytes = 0
+            else:
+                await self.session.send_realtime_input(activity_end=types.ActivityEnd())
+
+    async def end(self) -> None:
+        """Close the current turn early, e.g. when the client pauses its microphone."""
+        if self.vad.speaking:
+            await self.session.send_realtime_input(activity_end=types.ActivityEnd())
+        self.vad.reset()
+        self.preroll.clear()
+        self.preroll_bytes = 0
+        self.carry = b""
+
+    async def _send(self, chunk: bytes) -> None:
+        await self.session.send_realtime_input(audio=types.Blob(data=chunk, mime_type=INPUT_MIME_TYPE))
+
+
+class VoiceStreamService:
+    """
+    Relays a browser audio stream to a Gemini Live session.
+
+    Binary WebSocket frames carry PCM audio. With VOICE_STREAM_VAD=local (the
+    default) turns are segmented here by TurnSegmenter; with "server" every
+    frame is forwarded and the Live API's own voice activity detection decides
+    when the user has finished. Partial transcripts and reply tokens are pushed
+    back to the client as JSON messages:
+
+        {"type": "transcript", "text": ...}   partial transcription of the user
+        {"type": "reply", "text": ...}        next chunk of the model reply
+        {"type": "turn_complete", "transcript": ..., "reply": ...}
+        {"type": "error", "message": ...}
+
+    The client may send {"type": "audio_stream_end"} when the microphone pauses
+    and {"type": "stop"} to end the session.
+    """
+
+    def __init__(self):
+        self.gemini_client = GeminiClientSingleton()
+        self.model = os.getenv("GEMINI_LIVE_MODEL", "gemini-live-2.5-flash-preview")
+        self.local_vad = os.getenv("VOICE_STREAM_VAD", "local").lower() == "local"
+
+    async def relay(self, websocket: WebSocket, experiment_id: str) -> None:
+        """Run one Live session for the lifetime of the WebSocket."""
+        conversation, step_prompt = await asyncio.gather(
+            conversation_store.get(experiment_id),
+            step_context_cache.prompt(experiment_id)
+        )
+        # The Live session keeps its own history once connected; seed it with the experiment's
+        sections = [f"{SYSTEM_PROMPT} Keep replies conversational and brief.", step_prompt, conversation.render()]
+        system_instruction = "\n\n".join(section for section in sections if section)
+        config = {**LIVE_CONFIG, "system_instruction": system_instruction}
+        if self.local_vad:
+            config["realtime_input_config"] = {"automatic_activity_detection": {"disabled": True}}
+
+        async with self.gemini_client.client.aio.live.connect(model=self.model, config=config) as session:
+            tasks = [
+                asyncio.create_task(self._forward_audio(websocket, session)),
+                asyncio.create_task(self._forward_responses(websocket, session, conversation)),
+            ]
+            try:
+                # Either side finishing (client stop, disconnect or error) ends the session
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _forward_audio(self, websocket: WebSocket, session) -> None:
+        """Forward client audio frames and control messages to the Live session."""
+        segmenter = TurnSegmenter(session) if self.local_vad else None
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            if message.get("bytes"):
+                if segmenter:
+                    await segmenter.feed(message["bytes"])
+                else:
+                    await session.send_realtime_input(audio=types.Blob(data=message["bytes"], mime_type=INPUT_MIME_TYPE))
+                continue
+
+            if message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    control = None
+                if not isinstance(control, dict):
+                    # A bad control frame shouldn't end the session
+                    logger.warning(f"Ignoring malformed control message: {message['text'][:200]!r}")
+                    continue
+                if control.get("type") == "stop":
+                    return
+                if control.get("type") == "audio_stream_end":
+                    if segmenter:
+                        await segmenter.end()
+                    else:
+                        await session.send_realtime_input(audio_stream_end=True)
+
+    async def _forward_responses(self, websocket: WebSocket, session, conversation: ConversationSession) -> None:
+        """Push partial transcripts and reply chunks to the client as they arrive."""
+        while True:
+            user_text, model_text = [], []
+            # receive() yields the messages of a single turn
+            async for message in session.receive():
+                server_content = message.server_content
+                if not server_content:
+                    continue
+
+                transcription = server_content.input_transcription
+                if transcription and transcription.text and transcription.text.strip().lower() != "[noise]":
+                    user_text.append(transcription.text)
+                    await websocket.send_json({"type": "transcript", "text": transcription.text})
+
+                turn = server_content.model_turn
+                if turn and turn.parts:
+                    for part in turn.parts:
+                        if part.text:
+                            model_text.append(part.text)
+                            await websocket.send_json({"type": "reply", "text": part.text})
+
+                if server_content.turn_complete:
+                    transcript = "".join(user_text).strip()
+                    reply = "".join(model_text).strip()
+                    logger.info(f"Live turn complete: {transcript!r} -> {reply!r}")
+                    await websocket.send_json({"type": "turn_complete", "transcript": transcript, "reply": reply})
+                    conversation_store.record_turn(conversation, transcript, reply)
@@ -0,0 +1,56 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from .protocol_dal import ProtocolDAL
+from .experiment_dal import ExperimentDAL
+from .document_cache_dal import DocumentCacheDAL
+
+# One worker per pooled connection; extra threads would only queue on the pool.
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+    thread_name_prefix="dal",
+)
+
+
+class AsyncDAL:
+    """
+    Awaitable facade over a synchronous DAL.
+
+    Every public method of the wrapped DAL is exposed as a coroutine with the
+    same name and arguments. Calls run on a dedicated thread pool sized to the
+    PostgreSQL connection pool, so a slow query only occupies one worker thread
+    and never blocks the event loop.
+    """
+
+    def __init__(self, dal):
+        self._dal = dal
+
+    def __getattr__(self, name):
+        attr = getattr(self._dal, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def run(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_executor, functools.partial(attr, *args, **kwargs))
+
+        # Cache the wrapper so repeated lookups skip __getattr__
+        setattr(self, name, run)
+        return run
+
+
+class AsyncProtocolDAL(AsyncDAL):
+    def __init__(self):
+        super().__init__(ProtocolDAL())
+
+
+class AsyncExperimentDAL(AsyncDAL):
+    def __init__(self):
+        super().__init__(ExperimentDAL())
+
+
+class AsyncDocumentCacheDAL(AsyncDAL):
+    def __init__(self):
+        super().__init__(DocumentCacheDAL())
@@ -1,32 +1,101 @@
 import os
 import uuid
-from typing import Optional
+from datetime import timedelta
+from threading import Lock
+from typing import BinaryIO, Optional, Tuple
+import certifi
+import urllib3
 from minio import Minio
 from minio.error import S3Error
 import logging
 from io import BytesIO
+from urllib.parse import quote
 
 logger = logging.getLogger(__name__)
 
 class BucketClient:
+    """
+    Process-wide MinIO client.
+
+    Every BucketClient() returns the same instance, so all requests share one
+    Minio client and its urllib3 connection pool instead of opening new
+    connections per upload. Minio clients are thread-safe. The bucket is
+    checked once, at startup or on first use, and the result is cached.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(BucketClient, cls).__new__(cls)
+        return cls._instance
+
     def __init__(self):
-        # MinIO configuration
-        self.endpoint = os.getenv('MINIO_ENDPOINT', 'localhost:9000')
-        self.access_key = os.getenv('MINIO_ACCESS_KEY', 'minioadmin')
-        self.secret_key = os.getenv('MINIO_SECRET_KEY', 'minioadmin')
-        self.bucket_name = os.getenv('MINIO_BUCKET_NAME', 'protocols')
-        self.secure = os.getenv('MINIO_SECURE', 'false').lower() == 'true'
-        
-        # Initialize MinIO client
-        self.client = Minio(
-            self.endpoint,
-            access_key=self.access_key,
-            secret_key=self.secret_key,
-            secure=self.secure
+        with self._lock:
+            if hasattr(self, "_initialized"):
+                return
+            # MinIO configuration
+            self.endpoint = os.getenv('MINIO_ENDPOINT', 'localhost:9000')
+            self.access_key = os.getenv('MINIO_ACCESS_KEY', 'minioadmin')
+            self.secret_key = os.getenv('MINIO_SECRET_KEY', 'minioadmin')
+            self.bucket_name = os.getenv('MINIO_BUCKET_NAME', 'protocols')
+            self.secure = os.getenv('MINIO_SECURE', 'false').lower() == 'true'
+            # Streamed uploads buffer roughly part_size * parallel_uploads * 2 bytes
+            # (S3 minimum part size is 5 MiB)
+            self.part_size = int(os.getenv('MINIO_PART_SIZE', str(5 * 1024 * 1024)))
+            self.parallel_uploads = int(os.getenv('MINIO_PARALLEL_UPLOADS', '1'))
+            # Connections kept open per host; concurrent uploads beyond this open throwaway connections
+            self.max_connections = int(os.getenv('MINIO_MAX_CONNECTIONS', '32'))
+            self.connect_timeout = float(os.getenv('MINIO_CONNECT_TIMEOUT', '5'))
+            self.read_timeout = float(os.getenv('MINIO_READ_TIMEOUT', '60'))
+            # Presigned URLs are used by the browser, so they are signed for the external endpoint
+            self.external_endpoint = os.getenv('MINIO_EXTERNAL_ENDPOINT', 'localhost:9000')
+            self.region = os.getenv('MINIO_REGION', 'us-east-1')
+
+            # Initialize MinIO client on a shared, keep-alive connection pool
+            self.client = Minio(
+                self.endpoint,
+                access_key=self.access_key,
+                secret_key=self.secret_key,
+                secure=self.secure,
+                http_client=self._create_http_client()
+            )
+            # Signing is offline once the region is known, so this client never opens a connection
+            self.presign_client = Minio(
+                self.external_endpoint,
+                access_key=self.access_key,
+                secret_key=self.secret_key,
+                secure=self.secure,
+                region=self.region
+            )
+            self._bucket_checked = False
+            self._bucket_lock = Lock()
+            self._initialized = True
+
+    def _create_http_client(self) -> urllib3.PoolManager:
+        """Connection pool sized for concurrent requests, with Minio's default retry policy"""
+        return urllib3.PoolManager(
+            timeout=urllib3.Timeout(connect=self.connect_timeout, read=self.read_timeout),
+            maxsize=self.max_connections,
+            cert_reqs='CERT_REQUIRED',
+            ca_certs=os.environ.get('SSL_CERT_FILE') or certifi.where(),
+            retries=urllib3.Retry(
+                total=5,
+                backoff_factor=0.2,
+                status_forcelist=[500, 502, 503, 504]
+            )
         )
-        
-        # Ensure bucket exists
-        self._ensure_bucket_exists()
+
+    def ensure_bucket(self):
+        """Create the bucket if it doesn't exist; only the first successful call goes to MinIO"""
+        if self._bucket_checked:
+            return
+        with self._bucket_lock:
+            if self._bucket_checked:
+                return
+            self._ensure_bucket_exists()
+            self._bucket_checked = True
     
     def _ensure_bucket_exists(self):
         """Create bucket if it doesn't exist"""
@@ -49,27 +118,41 @@ class BucketClient:
             filename: Original filename
             content_type: MIME type of the file
             
+        Returns:
+            str: Object URL for the uploaded file
+        """
+        return self.upload_stream(BytesIO(file_content), filename, content_type, length=len(file_content))
+    
+    def upload_stream(self, stream: BinaryIO, filename: str, content_type: str, length: Optional[int] = None) -> str:
+        """
+        Stream a file object to MinIO without loading it into memory and return the object URL
+        
+        Args:
+            stream: Readable binary file object positioned at the start of the data
+            filename: Original filename
+            content_type: MIME type of the file
+            length: Size in bytes, or None if unknown (forces a multipart upload)
+            
         Returns:
             str: Object URL for the uploaded file
         """
         try:
-            # Generate unique object name
-            file_extension = filename.split('.')[-1] if '.' in filename else ''
-            object_name = f"{uuid.uuid4()}.{file_extension}"
+            self.ensure_bucket()
+
+            object_name = self._new_object_name(filename)
             
-            # Upload file - wrap bytes in BytesIO for MinIO client
-            file_data = BytesIO(file_content)
+            # MinIO reads the stream one part at a time, so at most part_size bytes are buffered
             self.client.put_object(
                 bucket_name=self.bucket_name,
                 object_name=object_name,
-                data=file_data,
-                length=len(file_content),
-                content_type=content_type
+                data=stream,
+                length=length if length is not None else -1,
+                content_type=content_type,
+                part_size=self.part_size,
+                num_parallel_uploads=self.parallel_uploads
             )
             
-            # Generate object URL - use external endpoint for frontend access
-            external_endpoint = os.getenv('MINIO_EXTERNAL_ENDPOINT', 'localhost:9000')
-            object_url = f"{'https' if self.secure else 'http'}://{external_endpoint}/{self.bucket_name}/{object_name}"
+            object_url = self.object_url(object_name)
             
             logger.info(f"Successfully uploaded file: {object_name}")
             return object_url
@@ -89,8 +172,7 @@ class BucketClient:
             bytes: File content
         """
         try:
-            # Extract object name from URL
-            object_name = object_url.split(f"/{self.bucket_name}/")[-1]
+            object_name = self.object_name(object_url)
             
             # Download file
             response = self.client.get_object(self.bucket_name, object_name)
@@ -105,6 +187,45 @@ class BucketClient:
             logger.error(f"Error downloading file: {e}")
             raise Exception(f"Failed to download file: {str(e)}")
     
+    def open_object(self, object_url: str, offset: int = 0, length: Optional[int] = None):
+        """
+        Open an object, or a byte range of it, for streaming without reading it into memory
+        
+        Args:
+            object_url: Full URL of the object
+            offset: First byte to read
+            length: Number of bytes to read, or None to read to the end
+            
+        Returns:
+            urllib3.BaseHTTPResponse: Read it with stream(), then close() and release_conn()
+        """
+        try:
+            object_name = self.object_name(object_url)
+            return self.client.get_object(self.bucket_name, object_name, offset=offset, length=length or 0)
+            
+        except S3Error as e:
+            logger.error(f"Error opening file: {e}")
+            raise Exception(f"Failed to open file: {str(e)}")
+    
+    def download_to_file(self, object_url: str, file_path: str) -> None:
+        """
+        Stream a file from MinIO to a local path without holding it in memory
+        
+        Args:
+            object_url: Full URL of the object
+            file_path: Local path to write to
+        """
+        try:
+            object_name = self.object_name(object_url)
+            
+            self.client.fget_object(self.bucket_name, object_name, file_path)
+            
+            logger.info(f"Successfully downloaded file: {object_name} to {file_path}")
+            
+        except S3Error as e:
+            logger.error(f"Error downloading file: {e}")
+            raise Exception(f"Failed to download file: {str(e)}")
+    
     def delete_file(self, object_url: str) -> bool:
         """
         Delete a file from MinIO using object URL
@@ -116,8 +237,7 @@ class BucketClient:
             bool: True if successful, False otherwise
         """
         try:
-            # Extract object name from URL
-            object_name = object_url.split(f"/{self.bucket_name}/")[-1]
+            object_name = self.object_name(object_url)
             
             # Delete file
             self.client.remove_object(self.bucket_name, object_name)
@@ -140,8 +260,7 @@ class BucketClient:
             dict: File information or None if not found
         """
         try:
-            # Extract object name from URL
-            object_name = object_url.split(f"/{self.bucket_name}/")[-1]
+            object_name = self.object_name(object_url)
             
             # Get object stats
             stat = self.client.stat_object(self.bucket_name, object_name)
@@ -157,3 +276,59 @@ class BucketClient:
         except S3Error as e:
             logger.error(f"Error getting file info: {e}")
             return None
+
+    def create_upload_url(self, filename: str, expires: timedelta) -> Tuple[str, str]:
+        """
+        Presign a PUT for a new object so the browser can upload straight to MinIO
+        
+        Args:
+            filename: Original filename, used for the object's extension
+            expires: How long the URL stays valid
+            
+        Returns:
+            Tuple[str, str]: Object name to report back once uploaded, and the presigned PUT URL
+        """
+        self.ensure_bucket()
+        object_name = self._new_object_name(filename)
+        upload_url = self.presign_client.presigned_put_object(self.bucket_name, object_name, expires=expires)
+        return object_name, upload_url
+    
+    def create_download_url(self, object_url: str, expires: timedelta, filename: Optional[str] = None,
+                            content_type: Optional[str] = None) -> str:
+        """
+        Presign a GET so the browser can read an object straight from MinIO
+        
+        Args:
+            object_url: Full URL of the object
+            expires: How long the URL stays valid
+            filename: Name to show the object under when it is saved
+            content_type: Content type to serve the object with
+            
+        Returns:
+            str: Presigned GET URL
+        """
+        response_headers = {}
+        if content_type:
+            response_headers['response-content-type'] = content_type
+        if filename:
+            # RFC 5987 encoding, so non-ASCII names survive (same as the document endpoint)
+            response_headers['response-content-disposition'] = f"inline; filename*=UTF-8''{quote(filename, safe='')}"
+        return self.presign_client.presigned_get_object(
+            self.bucket_name,
+            self.object_name(object_url),
+            expires=expires,
+            response_headers=response_headers or None
+        )
+    
+    def object_url(self, object_name: str) -> str:
+        """Object URL for an object name - uses the external endpoint for frontend access"""
+        return f"{'https' if self.secure else 'http'}://{self.external_endpoint}/{self.bucket_name}/{object_name}"
+    
+    def object_name(self, object_url: str) -> str:
+        """Extract the object name from an object URL"""
+        return object_url.split(f"/{self.bucket_name}/")[-1]
+    
+    def _new_object_name(self, filename: str) -> str:
+        """Generate a unique object name that keeps the file's extension"""
+        file_extension = filename.split('.')[-1] if '.' in filename else ''
+        return f"{uuid.uuid4()}.{file_extension}"
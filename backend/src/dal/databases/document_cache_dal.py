@@ -0,0 +1,160 @@
+from typing import List, Optional
+from psycopg2.extras import RealDictCursor
+from .psql_client import PostgreSQLClient
+from ...core.entities.protocol_entities import DocumentTextCacheEntry, DocumentPageTextCacheEntry
+
+
+class DocumentCacheDAL:
+    """Content-addressed cache of stored objects and their extracted text, keyed by SHA-256."""
+
+    def __init__(self):
+        self.db_client = PostgreSQLClient()
+
+    def get_entry(self, content_hash: str) -> Optional[DocumentTextCacheEntry]:
+        """Get a cache entry by content hash and mark it as recently used."""
+        try:
+            with self.db_client.connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    sql = """
+                        UPDATE document_text_cache
+                        SET last_accessed_at = CURRENT_TIMESTAMP
+                        WHERE content_hash = %s
+                        RETURNING *
+                    """
+                    cursor.execute(sql, (content_hash,))
+                    result = cursor.fetchone()
+
+                    if result:
+                        return DocumentTextCacheEntry(**dict(result))
+                    return None
+        except Exception as e:
+            raise Exception(f"Error getting document cache entry: {e}")
+
+    def get_entry_by_object_url(self, object_url: str) -> Optional[DocumentTextCacheEntry]:
+        """Get the cache entry for a stored object, without marking it as used."""
+        try:
+            with self.db_client.connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    sql = "SELECT * FROM document_text_cache WHERE object_url = %s"
+                    cursor.execute(sql, (object_url,))
+                    result = cursor.fetchone()
+
+                    if result:
+                        return DocumentTextCacheEntry(**dict(result))
+                    return None
+        except Exception as e:
+            raise Exception(f"Error getting document cache entry by object URL: {e}")
+
+    def create_entry(self, entry: DocumentTextCacheEntry) -> DocumentTextCacheEntry:
+        """Record a stored object for a content hash, keeping the first object if one already exists."""
+        try:
+            with self.db_client.connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    sql = """
+                        INSERT INTO document_text_cache
+                        (content_hash, object_url, mime_type, byte_size, extracted_text,
+                         created_at, last_accessed_at)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                        ON CONFLICT (content_hash) DO UPDATE SET
+                            last_accessed_at = EXCLUDED.last_accessed_at
+                        RETURNING *
+                    """
+                    cursor.execute(sql, (
+                        entry.content_hash,
+                        entry.object_url,
+                        entry.mime_type,
+                        entry.byte_size,
+                        entry.extracted_text,
+                        entry.created_at,
+                        entry.last_accessed_at
+                    ))
+                    result = cursor.fetchone()
+
+                    return DocumentTextCacheEntry(**dict(result))
+        except Exception as e:
+            raise Exception(f"Error creating document cache entry: {e}")
+
+    def set_extracted_text(self, content_hash: str, extracted_text: str) -> bool:
+        """Store the OCR result for a content hash."""
+        try:
+            with self.db_client.connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    sql = """
+                        UPDATE document_text_cache
+                        SET extracted_text = %s, last_accessed_at = CURRENT_TIMESTAMP
+                        WHERE content_hash = %s
+                    """
+                    cursor.execute(sql, (extracted_text, content_hash))
+
+                    return cursor.rowcount > 0
+        except Exception as e:
+            raise Exception(f"Error setting extracted text: {e}")
+
+    def evict_least_recently_used(self, max_entries: int) -> int:
+        """Delete the least recently used entries beyond max_entries. Stored objects are left in place."""
+        try:
+            with self.db_client.connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    sql = """
+                        DELETE FROM document_text_cache
+                        WHERE content_hash IN (
+                            SELECT content_hash FROM document_text_cache
+                            ORDER BY last_accessed_at DESC
+                            OFFSET %s
+                        )
+                    """
+                    cursor.execute(sql, (max_entries,))
+
+                    return cursor.rowcount
+        except Exception as e:
+            raise Exception(f"Error evicting document cache entries: {e}")
+
+    def get_page_texts(self, content_hash: str) -> List[DocumentPageTextCacheEntry]:
+        """Get the page ranges already OCR'd for a document whose full OCR hasn't finished."""
+        try:
+            with self.db_client.connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    sql = """
+                        SELECT * FROM document_page_text_cache
+                        WHERE content_hash = %s
+                        ORDER BY first_page
+                    """
+                    cursor.execute(sql, (content_hash,))
+
+                    return [DocumentPageTextCacheEntry(**dict(row)) for row in cursor.fetchall()]
+        except Exception as e:
+            raise Exception(f"Error getting page text cache entries: {e}")
+
+    def set_page_text(self, entry: DocumentPageTextCacheEntry) -> None:
+        """Store the OCR result for one page range of a document."""
+        try:
+            with self.db_client.connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    sql = """
+                        INSERT INTO document_page_text_cache
+                        (content_hash, first_page, last_page, extracted_text, created_at)
+                        VALUES (%s, %s, %s, %s, %s)
+                        ON CONFLICT (content_hash, first_page, last_page) DO UPDATE SET
+                            extracted_text = EXCLUDED.extracted_text
+                    """
+                    cursor.execute(sql, (
+                        entry.content_hash,
+                        entry.first_page,
+                        entry.last_page,
+                        entry.extracted_text,
+                        entry.created_at
+                    ))
+        except Exception as e:
+            raise Exception(f"Error setting page text: {e}")
+
+    def delete_page_texts(self, content_hash: str) -> int:
+        """Drop a document's page results once its full text is cached."""
+        try:
+            with self.db_client.connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    sql = "DELETE FROM document_page_text_cache WHERE content_hash = %s"
+                    cursor.execute(sql, (content_hash,))
+
+                    return cursor.rowcount
+        except Exception as e:
+            raise Exception(f"Error deleting page text cache entries: {e}")
@@ -1,8 +1,11 @@
 from dotenv import load_dotenv
 import psycopg2
-from psycopg2 import Error, OperationalError
+from psycopg2 import Error, OperationalError, InterfaceError
+from psycopg2.pool import ThreadedConnectionPool
+from contextlib import contextmanager
 import os
-from threading import Lock
+import time
+from threading import Lock, BoundedSemaphore
 
 load_dotenv()
 
@@ -17,48 +20,119 @@ class PostgreSQLClient:
         return cls._instance
 
     def __init__(self):
-        if not hasattr(self, "_initialized"):
-            self.database_url = os.getenv("DATABASE_URL")
-            self.connection = None
-            self._initialized = True
-            self.connect()
+        with self._lock:
+            if not hasattr(self, "_initialized"):
+                self.database_url = os.getenv("DATABASE_URL")
+                # psycopg2 closes connections above min_size when they are returned,
+                # so min_size is the number of connections kept warm.
+                self.min_size = int(os.getenv("DB_POOL_MIN_SIZE", "4"))
+                self.max_size = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+                self.checkout_timeout = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+                self.healthcheck_idle_seconds = float(os.getenv("DB_POOL_HEALTHCHECK_IDLE", "30"))
+                self.pool = None
+                self._last_used = {}
+                # ThreadedConnectionPool raises instead of waiting when exhausted,
+                # so checkouts are gated by a semaphore sized to the pool.
+                self._slots = BoundedSemaphore(self.max_size)
+                self._initialized = True
+                self._create_pool()
 
-    def connect(self):
-        """Establish or re-establish the connection."""
-        if self.connection and not self.connection.closed:
-            return self.connection
+    def _create_pool(self):
+        """Create the connection pool if it does not exist yet."""
+        if self.pool is not None and not self.pool.closed:
+            return self.pool
         try:
-            self.connection = psycopg2.connect(self.database_url)
-            self.connection.autocommit = False
-            print("Connected to PostgreSQL successfully.")
+            self.pool = ThreadedConnectionPool(self.min_size, self.max_size, self.database_url)
+            print(f"Connected to PostgreSQL successfully (pool size {self.min_size}-{self.max_size}).")
         except Error as e:
             print(f"Connection failed: {e}")
-            self.connection = None
-        return self.connection
-
-    def execute_sql(self, sql: str, params=None):
-        """Execute SQL, keeping persistent connection alive."""
-        conn = self.connect()
-        if not conn:
-            print("No active connection.")
-            return
+            self.pool = None
+        return self.pool
 
+    def _is_healthy(self, conn) -> bool:
+        """Liveness check run on checkout; connections used recently skip the ping."""
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.healthcheck_idle_seconds:
+            return True
         try:
             with conn.cursor() as cursor:
-                statements = [stmt.strip() for stmt in sql.split(";") if stmt.strip()]
-                for stmt in statements:
-                    cursor.execute(stmt, params)
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except (OperationalError, InterfaceError):
+            return False
+
+    def _checkout(self):
+        """Take a healthy connection from the pool, replacing dead ones."""
+        with self._lock:
+            pool = self._create_pool()
+        if pool is None:
+            # OperationalError like any other lost connection, so callers can tell it from a bad query
+            raise OperationalError("No active database connection")
+
+        conn = pool.getconn()
+        if not self._is_healthy(conn):
+            self._last_used.pop(id(conn), None)
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+        conn.autocommit = False
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a pooled connection for the duration of a ``with`` block.
+
+        The transaction is committed when the block exits cleanly and rolled
+        back if it raises. The connection always goes back to the pool.
+        """
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise OperationalError(
+                f"Timed out after {self.checkout_timeout}s waiting for a database connection"
+            )
+        conn = None
+        try:
+            conn = self._checkout()
+            try:
+                yield conn
                 conn.commit()
+            except Exception:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+        finally:
+            if conn is not None and self.pool is not None:
+                if conn.closed:
+                    self._last_used.pop(id(conn), None)
+                else:
+                    self._last_used[id(conn)] = time.monotonic()
+                self.pool.putconn(conn, close=conn.closed != 0)
+            self._slots.release()
+
+    def connect(self):
+        """Ensure the pool exists and return it (kept for scripts that only need a ping)."""
+        with self._lock:
+            return self._create_pool()
+
+    def execute_sql(self, sql: str, params=None):
+        """Execute a semicolon separated SQL script in a single transaction."""
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    statements = [stmt.strip() for stmt in sql.split(";") if stmt.strip()]
+                    for stmt in statements:
+                        cursor.execute(stmt, params)
         except (Error, OperationalError) as e:
             print(f"Error executing SQL: {e}")
-            if conn:
-                conn.rollback()
-                # Try reconnecting if connection dropped
-                self.connection = None
         return
 
     def close(self):
-        """Manually close the connection."""
-        if self.connection and not self.connection.closed:
-            self.connection.close()
-            print("Connection closed.")
+        """Close every pooled connection."""
+        with self._lock:
+            if self.pool is not None and not self.pool.closed:
+                self.pool.closeall()
+                print("Connection pool closed.")
+            self.pool = None
+            self._last_used.clear()
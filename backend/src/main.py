@@ -1,9 +1,29 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from src.web.routers import healthcheck_router
 from src.web.routers import protocols_router
 from src.web.routers import experiment_router
+from src.core.services.ingestion_queue import ingestion_queue
+from src.core.services.conversation_writer import conversation_writer
+from src.dal.databases.bucket_client import BucketClient
+import asyncio
 
-app = FastAPI(title="Protocol Copilot API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        # Check the bucket once up front instead of on the first upload
+        await asyncio.to_thread(BucketClient().ensure_bucket)
+    except Exception as e:
+        print(f"Bucket check failed, retrying on first upload: {e}")
+    await ingestion_queue.start()
+    await conversation_writer.start()
+    yield
+    await conversation_writer.stop()
+    await ingestion_queue.stop()
+
+
+app = FastAPI(title="Protocol Copilot API", lifespan=lifespan)
 
 # All routes go under /api
 app.include_router(healthcheck_router.router, prefix="/api")
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from src.dal.databases.experiment_dal import ExperimentDAL
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from src.dal.databases.async_dal import AsyncExperimentDAL
 from src.core.entities.experiment_entities import (
     Experiment, 
     StartExperimentRequest, 
@@ -8,21 +9,27 @@ from src.core.entities.experiment_entities import (
     StopExperimentResponse
 )
 from src.core.services.experiment_service import ExperimentService
+from src.core.services.voice_stream_service import VoiceStreamService
+from src.core.services.conversation_store import conversation_store
+from src.core.services.conversation_writer import conversation_writer
+from src.core.services.step_context_cache import step_context_cache
+from starlette.websockets import WebSocketState
+from typing import Optional
 from datetime import datetime
+import asyncio
+import json
 import uuid
 
 router = APIRouter(prefix="/experiments")
 
 # Initialize experiment DAL
-experiment_dal = ExperimentDAL()
+experiment_dal = AsyncExperimentDAL()
 
 # Initialize experiment service
 experiment_service = ExperimentService()
 
-# Global conversation state - in production this should be session-based
-conversation = [
-    {"role": "system", "content": "You are an experiment assistant guiding a scientist step-by-step through a protocol."}
-]
+# Initialize live voice streaming service
+voice_stream_service = VoiceStreamService()
 
 @router.post("/start", response_model=StartExperimentResponse)
 async def start_experiment(request: StartExperimentRequest):
@@ -45,7 +52,19 @@ async def start_experiment(request: StartExperimentRequest):
         )
         
         # Save to database
-        saved_experiment = experiment_dal.create_experiment(experiment)
+        saved_experiment = await experiment_dal.create_experiment(experiment)
+
+        # Render the step prompts and cache the protocol text now so voice turns don't have to;
+        # both are loaded lazily on the first turn if this fails
+        experiment_key, protocol_key = str(saved_experiment.experiment_id), str(saved_experiment.protocol_id)
+        results = await asyncio.gather(
+            step_context_cache.load(experiment_key, protocol_key),
+            experiment_service.protocol_context_cache.attach(experiment_key, protocol_key),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"Error preparing context for experiment {experiment_key}: {result}")
         
         return StartExperimentResponse(
             experiment_id=str(saved_experiment.experiment_id),
@@ -63,19 +82,31 @@ async def stop_experiment(request: StopExperimentRequest):
     """Stop an existing experiment"""
     try:
         # Get the existing experiment
-        experiment = experiment_dal.get_experiment(request.experiment_id)
+        experiment = await experiment_dal.get_experiment(request.experiment_id)
         if not experiment:
             raise HTTPException(status_code=404, detail=f"Experiment {request.experiment_id} not found")
         
-        # Update experiment with end time
-        end_time = request.end_time if request.end_time else datetime.now()
-        experiment.end_time = end_time
-        experiment.status = "completed"
-        experiment.updated_at = datetime.now()
-        
-        # Save updated experiment
-        updated_experiment = experiment_dal.update_experiment(experiment)
-        
+        try:
+            # Make the experiment's conversation durable before marking it completed.
+            # Messages that can't be written yet stay queued and the writer retries them.
+            try:
+                await conversation_writer.flush()
+            except Exception as e:
+                print(f"Error flushing conversation for experiment {request.experiment_id}: {e}")
+
+            # Update experiment with end time
+            end_time = request.end_time if request.end_time else datetime.now()
+            experiment.end_time = end_time
+            experiment.status = "completed"
+            experiment.updated_at = datetime.now()
+
+            # Save updated experiment
+            updated_experiment = await experiment_dal.update_experiment(experiment)
+        finally:
+            conversation_store.discard(request.experiment_id)
+            step_context_cache.discard(request.experiment_id)
+            await experiment_service.protocol_context_cache.release(request.experiment_id)
+
         return StopExperimentResponse(
             experiment_id=str(updated_experiment.experiment_id),
             status=updated_experiment.status,
@@ -93,7 +124,7 @@ async def stop_experiment(request: StopExperimentRequest):
 async def get_experiment(experiment_id: str):
     """Get experiment details by ID"""
     try:
-        experiment = experiment_dal.get_experiment(experiment_id)
+        experiment = await experiment_dal.get_experiment(experiment_id)
         if not experiment:
             raise HTTPException(status_code=404, detail=f"Experiment {experiment_id} not found")
         
@@ -119,7 +150,7 @@ async def get_experiment(experiment_id: str):
 async def get_experiments_by_protocol(protocol_id: str):
     """Get all experiments for a specific protocol"""
     try:
-        experiments = experiment_dal.get_experiments_by_protocol_id(protocol_id)
+        experiments = await experiment_dal.get_experiments_by_protocol_id(protocol_id)
         
         return {
             "protocol_id": protocol_id,
@@ -142,13 +173,70 @@ async def get_experiments_by_protocol(protocol_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting experiments by protocol: {str(e)}")
 
+async def _check_experiment(experiment_id: Optional[str]) -> None:
+    """404 for an experiment_id that doesn't exist; its conversation rows could never be saved"""
+    if experiment_id is None:
+        return
+    try:
+        uuid.UUID(experiment_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid UUID format: {experiment_id}")
+    if not await step_context_cache.has_experiment(experiment_id):
+        raise HTTPException(status_code=404, detail=f"Experiment {experiment_id} not found")
+
 @router.post("/voice-turn")
-async def voice_turn(file: UploadFile = File(...)):
+async def voice_turn(file: UploadFile = File(...), experiment_id: Optional[str] = Form(None)):
     """Process voice input and return transcript and AI reply"""
+    await _check_experiment(experiment_id)
     try:
-        return await experiment_service.voice_turn(file)
+        return await experiment_service.voice_turn(file, experiment_id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error in voice_turn endpoint: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing voice input: {str(e)}")
+
+@router.post("/voice-turn/stream")
+async def voice_turn_stream(file: UploadFile = File(...), experiment_id: Optional[str] = Form(None)):
+    """Process voice input and stream the transcript and reply as Server-Sent Events"""
+    await _check_experiment(experiment_id)
+    try:
+        audio_bytes = await experiment_service.read_audio(file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def events():
+        async for event in experiment_service.stream_audio(audio_bytes, file.content_type, experiment_id=experiment_id):
+            name = event.pop("event")
+            yield f"event: {name}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/{experiment_id}/voice-stream")
+async def voice_stream(websocket: WebSocket, experiment_id: str):
+    """Stream 16 kHz PCM audio in and partial transcripts and reply tokens out"""
+    try:
+        experiment = await experiment_dal.get_experiment(experiment_id)
+    except Exception as e:
+        print(f"Error loading experiment for voice stream: {e}")
+        experiment = None
+    if not experiment:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=f"Experiment {experiment_id} not found")
+        return
+
+    await websocket.accept()
+    try:
+        await voice_stream_service.relay(websocket, experiment_id)
+    except WebSocketDisconnect:
+        return
+    except Exception as e:
+        print(f"Error in voice_stream endpoint: {e}")
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.send_json({"type": "error", "message": f"Error streaming voice input: {str(e)}"})
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+    await websocket.close()
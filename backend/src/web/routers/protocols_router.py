@@ -1,22 +1,141 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from typing import List
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Tuple
+from email.utils import format_datetime, parsedate_to_datetime
+from urllib.parse import quote
+import base64
+import json
+import re
 import uuid
-from datetime import datetime
-from src.core.entities.protocol_entities import Protocol, ProtocolStep, ProtocolDocument, IngestionStatus, CreateProtocolPreviewRequest, ProtocolPreviewResponse
-from src.dal.databases.protocol_dal import ProtocolDAL
-from src.core.services.protocol_service import ProtocolService
+from datetime import datetime, timezone
+from src.core.entities.protocol_entities import Protocol, ProtocolStep, ProtocolDocument, IngestionStatus, CreateProtocolPreviewRequest, ProtocolPreviewResponse, ProtocolPage, ProtocolUploadResponse, ProtocolIngestionStatusResponse, PresignedUploadRequest, PresignedUploadResponse, IngestFromObjectRequest, PresignedDownloadResponse
+from src.dal.databases.async_dal import AsyncProtocolDAL
+from src.core.services.protocol_service import ProtocolService, ALLOWED_IMAGE_EXTENSIONS, ALLOWED_PDF_EXTENSIONS
+from src.core.services.ingestion_queue import ingestion_queue
+from src.core.services.step_context_cache import step_context_cache
 
 router = APIRouter()
 
+# Initialize async protocol DAL
+protocol_dal = AsyncProtocolDAL()
+
+# Initialize protocol service; it holds the shared bucket and Gemini clients
+protocol_service = ProtocolService()
+
 # Fake data removed - now using real database endpoints
 
-@router.get("/protocols", tags=["protocols"], response_model=List[Protocol])
-async def get_protocols():
-    """Get all protocols from database"""
+def _encode_protocol_cursor(key: Tuple[datetime, str]) -> str:
+    """Encode a (created_at, protocol_id) keyset as an opaque cursor"""
+    created_at, protocol_id = key
+    payload = json.dumps([created_at.isoformat(), protocol_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def _decode_protocol_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode an opaque cursor back into a (created_at, protocol_id) keyset"""
+    created_at, protocol_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.fromisoformat(created_at), str(uuid.UUID(protocol_id))
+
+def _get_upload_file_type(filename: str) -> Tuple[str, str]:
+    """Validate an uploaded file's extension and return its file type ("image" or "pdf") and extension"""
+    # Get file extension
+    file_extension = filename.lower().split('.')[-1] if '.' in filename else ''
+    
+    # Validate file type
+    is_image = file_extension in ALLOWED_IMAGE_EXTENSIONS
+    is_pdf = file_extension in ALLOWED_PDF_EXTENSIONS
+    
+    if not (is_image or is_pdf):
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Invalid file type. Only images ({', '.join(ALLOWED_IMAGE_EXTENSIONS)}) and PDFs are allowed."
+        )
+    
+    # Determine file type
+    return ("image" if is_image else "pdf"), file_extension
+
+def _parse_http_date(value: str) -> Optional[datetime]:
+    """Parse an HTTP date as an aware UTC datetime, or None if it isn't one"""
     try:
-        protocol_dal = ProtocolDAL()
-        protocols = protocol_dal.get_all_protocols()
-        return protocols
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    # HTTP dates are always GMT, but a "-0000" zone parses as naive
+    return _as_utc(parsed)
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def _is_not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    """Whether a conditional GET can be answered with 304; If-None-Match takes precedence over If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = _parse_http_date(request.headers.get("if-modified-since", ""))
+    return if_modified_since is not None and _as_utc(last_modified).replace(microsecond=0) <= if_modified_since
+
+def _if_range_matches(if_range: Optional[str], etag: str, last_modified: datetime) -> bool:
+    """Whether a Range request applies to the current version of the document"""
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    return _parse_http_date(if_range) == _as_utc(last_modified).replace(microsecond=0)
+
+def _parse_byte_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=" range into inclusive (start, end) offsets
+
+    Returns None when the header should be ignored and the whole document
+    sent (malformed, multiple ranges). Raises 416 if it can't be satisfied.
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+        if int(last) == 0:
+            start = size
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+
+    if start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+@router.get("/protocols", tags=["protocols"], response_model=ProtocolPage)
+async def get_protocols(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Get a page of protocols, newest first. Pass next_cursor back to get the following page."""
+    try:
+        after = _decode_protocol_cursor(cursor) if cursor else None
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    try:
+        field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+        protocols, next_key = await protocol_dal.get_protocols_page(limit, after=after, fields=field_list)
+        return ProtocolPage(
+            protocols=protocols,
+            next_cursor=_encode_protocol_cursor(next_key) if next_key else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching protocols: {str(e)}")
 
@@ -29,8 +148,7 @@ async def get_protocol_by_id(protocol_id: str):
         raise HTTPException(status_code=400, detail="Invalid protocol ID format")
     
     try:
-        protocol_dal = ProtocolDAL()
-        protocol = protocol_dal.get_protocol(str(protocol_uuid))
+        protocol = await protocol_dal.get_protocol(str(protocol_uuid))
         
         if not protocol:
             raise HTTPException(status_code=404, detail="Protocol not found")
@@ -41,69 +159,179 @@ async def get_protocol_by_id(protocol_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching protocol: {str(e)}")
 
-@router.post("/protocols/upload", tags=["protocols"], response_model=ProtocolPreviewResponse)
-async def upload_protocol(file: UploadFile = File(...)):
-    """Upload a protocol document and validate file type"""
+@router.get("/protocols/{protocol_id}/document", tags=["protocols"], response_class=StreamingResponse)
+async def get_protocol_document(protocol_id: str, request: Request):
+    """Stream a protocol's source document, with Range and conditional request support"""
+    try:
+        protocol_uuid = uuid.UUID(protocol_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid protocol ID format")
     
-    # Check if file is provided
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No file provided")
+    try:
+        found = await protocol_service.get_protocol_document_file(str(protocol_uuid))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching protocol document: {str(e)}")
+    if not found:
+        raise HTTPException(status_code=404, detail="Protocol document not found")
     
-    # Get file extension
-    file_extension = file.filename.lower().split('.')[-1] if '.' in file.filename else ''
+    document, file_info = found
+    size = file_info["size"]
+    etag = f'"{file_info["etag"]}"'
+    last_modified = file_info["last_modified"]
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        # Cache, but check the ETag before every reuse
+        "Cache-Control": "private, no-cache",
+    }
+    if _is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
     
-    # Validate file type
-    allowed_image_extensions = ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff', 'webp']
-    allowed_pdf_extensions = ['pdf']
+    byte_range = None
+    range_header = request.headers.get("range")
+    if range_header and _if_range_matches(request.headers.get("if-range"), etag, last_modified):
+        byte_range = _parse_byte_range(range_header, size)
     
-    is_image = file_extension in allowed_image_extensions
-    is_pdf = file_extension in allowed_pdf_extensions
+    headers["Content-Disposition"] = f"inline; filename*=UTF-8''{quote(document.document_name, safe='')}"
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        status_code = 206
+    else:
+        start, end = 0, size - 1
+        headers["Content-Length"] = str(size)
+        status_code = 200
     
-    if not (is_image or is_pdf):
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Invalid file type. Only images ({', '.join(allowed_image_extensions)}) and PDFs are allowed."
-        )
+    try:
+        chunks = await protocol_service.open_document_stream(document, offset=start, length=end - start + 1 if byte_range else None)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading protocol document: {str(e)}")
     
-    # Determine file type
-    file_type = "image" if is_image else "pdf"
+    return StreamingResponse(
+        chunks,
+        status_code=status_code,
+        media_type=document.mime_type or file_info["content_type"],
+        headers=headers
+    )
+
+@router.post("/protocols/upload", tags=["protocols"], response_model=ProtocolUploadResponse, status_code=202)
+async def upload_protocol(file: UploadFile = File(...)):
+    """Upload a protocol document and queue it for background ingestion"""
+    
+    # Check if file is provided
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+    
+    file_type, file_extension = _get_upload_file_type(file.filename)
     
     try:
-        # Read file content
-        file_content = await file.read()
-        
-        # Create request object
+        # Hand the spooled upload straight to the service instead of reading it into memory
         request = CreateProtocolPreviewRequest(
             filename=file.filename,
             file_type=file_type,
             file_extension=file_extension,
-            file_content=file_content,
-            file_size=len(file_content),
+            file_stream=file.file,
+            file_size=file.size,
             description=None,  # Can be added later if needed
             created_by_user_id=None  # Can be added later if needed
         )
         
-        # Call protocol service
-        protocol_service = ProtocolService()
-        protocol = protocol_service.create_protocol_preview(request)
+        # Store the file and record a pending document, then ingest in the background
+        job = await protocol_service.start_protocol_ingestion(request)
+        await ingestion_queue.enqueue(job)
         
-        return protocol
+        return ProtocolUploadResponse(
+            document_id=job.document.document_id,
+            ingestion_status=job.document.ingestion_status,
+            object_url=job.document.object_url
+        )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
+@router.post("/protocols/uploads/presign", tags=["protocols"], response_model=PresignedUploadResponse)
+async def presign_protocol_upload(request: PresignedUploadRequest):
+    """Get a presigned URL to upload a protocol document straight to storage"""
+    _, file_extension = _get_upload_file_type(request.filename)
+    
+    try:
+        return await protocol_service.create_upload_url(request.filename, file_extension)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating upload URL: {str(e)}")
+
+@router.post("/protocols/uploads/ingest", tags=["protocols"], response_model=ProtocolUploadResponse, status_code=202)
+async def ingest_uploaded_protocol(request: IngestFromObjectRequest):
+    """Queue a protocol document uploaded through a presigned URL for background ingestion"""
+    _get_upload_file_type(request.filename)
+    
+    try:
+        job = await protocol_service.start_ingestion_from_object(request)
+        await ingestion_queue.enqueue(job)
+        
+        return ProtocolUploadResponse(
+            document_id=job.document.document_id,
+            ingestion_status=job.document.ingestion_status,
+            object_url=job.document.object_url
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+
+@router.get("/protocols/documents/{document_id}/download-url", tags=["protocols"], response_model=PresignedDownloadResponse)
+async def get_document_download_url(document_id: str):
+    """Get a presigned URL to read a protocol document straight from storage"""
+    try:
+        document_uuid = uuid.UUID(document_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid document ID format")
+    
+    try:
+        download = await protocol_service.get_download_url(str(document_uuid))
+        
+        if not download:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        return download
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating download URL: {str(e)}")
+
+@router.get("/protocols/documents/{document_id}/status", tags=["protocols"], response_model=ProtocolIngestionStatusResponse)
+async def get_ingestion_status(document_id: str):
+    """Poll the ingestion status of an uploaded protocol document"""
+    try:
+        document_uuid = uuid.UUID(document_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid document ID format")
+    
+    try:
+        status = await protocol_service.get_ingestion_status(str(document_uuid))
+        
+        if not status:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        return status
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching ingestion status: {str(e)}")
+
 @router.post("/protocols/create", tags=["protocols"], response_model=ProtocolPreviewResponse)
 async def create_protocol(protocol: Protocol, protocol_steps: List[ProtocolStep]):
     """Create a new protocol with its steps"""
     
     try:
         # TODO: should be service method 
-        protocol_dal = ProtocolDAL()
-        saved_protocol = protocol_dal.create_protocol(protocol)
-        for step in protocol_steps:
-            protocol_dal.create_protocol_step(step)
+        saved_protocol, saved_steps = await protocol_dal.create_protocol_with_steps(protocol, protocol_steps)
+        # Running experiments re-render this protocol's step prompts on their next turn
+        step_context_cache.invalidate_protocol(str(saved_protocol.protocol_id))
         
-        return ProtocolPreviewResponse(protocol=saved_protocol, protocol_steps=protocol_steps, object_url="")
+        return ProtocolPreviewResponse(protocol=saved_protocol, protocol_steps=saved_steps, object_url="")
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating protocol: {str(e)}")
@@ -117,8 +345,7 @@ async def get_protocol_steps(protocol_id: str):
         raise HTTPException(status_code=400, detail="Invalid protocol ID format")
     
     try:
-        protocol_dal = ProtocolDAL()
-        steps = protocol_dal.get_protocol_steps_by_protocol_id(str(protocol_uuid))
+        steps = await protocol_dal.get_protocol_steps_by_protocol_id(str(protocol_uuid))
         return steps
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching protocol steps: {str(e)}")
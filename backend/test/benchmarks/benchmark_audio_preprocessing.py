@@ -0,0 +1,93 @@
+"""
+Measure voice turn audio preprocessing on bench recordings.
+
+Runs each AudioPreprocessor stage (decode + resample, silence trim, encode) on
+every recording and reports stage latency, duration and payload size before
+and after.
+
+Usage (from backend/):
+    python test/benchmarks/benchmark_audio_preprocessing.py [recording.webm ...] [--runs 5]
+
+Without recordings, synthetic 48 kHz stereo webm/opus clips with leading and
+trailing room noise are generated.
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+import av
+import numpy as np
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.core.services.audio_preprocessor import AudioPreprocessor, TARGET_SAMPLE_RATE
+
+
+def synthesize_recording(speech_seconds: float, silence_seconds: float, seed: int, rate: int = 48000) -> bytes:
+    """A browser-like webm/opus stereo clip: noise, an amplitude-modulated tone, noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(speech_seconds * rate)) / rate
+    speech = 8000 * np.sin(2 * np.pi * 220 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+    silence = np.zeros(int(silence_seconds * rate))
+    mono = np.concatenate([silence, speech, silence])
+    mono += rng.normal(0, 200, mono.size)
+    stereo = np.clip(np.stack([mono, mono]), -32768, 32767).astype(np.int16)
+
+    output = io.BytesIO()
+    with av.open(output, mode="w", format="webm") as container:
+        stream = container.add_stream("libopus", rate=rate, layout="stereo")
+        frame = av.AudioFrame.from_ndarray(stereo.T.reshape(1, -1).copy(), format="s16", layout="stereo")
+        frame.sample_rate = rate
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return output.getvalue()
+
+
+def load_recordings(paths):
+    if paths:
+        for path in paths:
+            with open(path, "rb") as f:
+                yield os.path.basename(path), f.read()
+        return
+    for speech_seconds, silence_seconds in [(1.5, 0.5), (3.0, 1.0), (8.0, 1.5)]:
+        name = f"synthetic {speech_seconds:.1f}s+{2 * silence_seconds:.1f}s"
+        yield name, synthesize_recording(speech_seconds, silence_seconds, seed=int(speech_seconds * 10))
+
+
+def run(paths, runs: int) -> None:
+    preprocessor = AudioPreprocessor()
+    print(f"{'recording':<24} {'in s':>6} {'out s':>6} {'in KB':>7} {'out KB':>7} "
+          f"{'decode ms':>10} {'trim ms':>8} {'encode ms':>10} {'total ms':>9}")
+    for name, audio_bytes in load_recordings(paths):
+        timings = {"decode": [], "trim": [], "encode": []}
+        for _ in range(runs):
+            start = time.perf_counter()
+            samples = preprocessor.decode(audio_bytes)
+            decoded = time.perf_counter()
+            trimmed = preprocessor.trim_silence(samples)
+            trimmed_at = time.perf_counter()
+            encoded = preprocessor.encode(trimmed)
+            timings["decode"].append((decoded - start) * 1000)
+            timings["trim"].append((trimmed_at - decoded) * 1000)
+            timings["encode"].append((time.perf_counter() - trimmed_at) * 1000)
+
+        medians = {stage: statistics.median(values) for stage, values in timings.items()}
+        print(
+            f"{name[:24]:<24} {samples.size / TARGET_SAMPLE_RATE:>6.2f} {trimmed.size / TARGET_SAMPLE_RATE:>6.2f} "
+            f"{len(audio_bytes) / 1024:>7.1f} {len(encoded) / 1024:>7.1f} "
+            f"{medians['decode']:>10.1f} {medians['trim']:>8.2f} {medians['encode']:>10.1f} {sum(medians.values()):>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recordings", nargs="*", help="Recorded voice turns (webm, wav, ogg, ...)")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per recording")
+    args = parser.parse_args()
+    run(args.recordings, args.runs)
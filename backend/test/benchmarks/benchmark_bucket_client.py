@@ -0,0 +1,80 @@
+"""
+Compare per-request MinIO clients with the shared BucketClient.
+
+The old upload path built a new Minio client (and connection pool) for every
+request and checked the bucket before uploading. This uploads the same file
+with both approaches, sequentially and from concurrent threads, and reports
+per-upload latency and throughput.
+
+Usage (from backend/, with MinIO running):
+    python test/benchmarks/benchmark_bucket_client.py [--uploads 50] [--concurrency 8] [--size-kb 256]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from minio import Minio
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.dal.databases.bucket_client import BucketClient
+
+
+def upload_with_fresh_client(bucket: BucketClient, payload: bytes, name: str) -> None:
+    """What every upload used to do: new client, bucket check, then the upload."""
+    client = Minio(bucket.endpoint, access_key=bucket.access_key, secret_key=bucket.secret_key, secure=bucket.secure)
+    if not client.bucket_exists(bucket.bucket_name):
+        client.make_bucket(bucket.bucket_name)
+    client.put_object(bucket.bucket_name, name, BytesIO(payload), len(payload), content_type="application/pdf")
+
+
+def upload_with_shared_client(bucket: BucketClient, payload: bytes, name: str) -> None:
+    bucket.ensure_bucket()
+    bucket.client.put_object(bucket.bucket_name, name, BytesIO(payload), len(payload), content_type="application/pdf")
+
+
+def measure(upload, bucket: BucketClient, payload: bytes, uploads: int, concurrency: int):
+    def timed(i: int) -> float:
+        start = time.perf_counter()
+        upload(bucket, payload, f"benchmark/{upload.__name__}-{i}.pdf")
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, range(uploads)))
+    elapsed = time.perf_counter() - start
+    return statistics.median(latencies), sorted(latencies)[int(len(latencies) * 0.95) - 1], uploads / elapsed
+
+
+def cleanup(bucket: BucketClient) -> None:
+    for obj in bucket.client.list_objects(bucket.bucket_name, prefix="benchmark/", recursive=True):
+        bucket.client.remove_object(bucket.bucket_name, obj.object_name)
+
+
+def run(uploads: int, concurrency: int, size_kb: int) -> None:
+    bucket = BucketClient()
+    bucket.ensure_bucket()
+    payload = os.urandom(size_kb * 1024)
+
+    print(f"{'client':<8} {'threads':>7} {'p50 ms':>8} {'p95 ms':>8} {'uploads/s':>10}")
+    try:
+        for threads in sorted({1, concurrency}):
+            for label, upload in (("fresh", upload_with_fresh_client), ("shared", upload_with_shared_client)):
+                p50, p95, rate = measure(upload, bucket, payload, uploads, threads)
+                print(f"{label:<8} {threads:>7} {p50:>8.1f} {p95:>8.1f} {rate:>10.1f}")
+    finally:
+        cleanup(bucket)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=50, help="Uploads per configuration")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent upload threads")
+    parser.add_argument("--size-kb", type=int, default=256, help="Size of each uploaded file")
+    args = parser.parse_args()
+    run(args.uploads, args.concurrency, args.size_kb)
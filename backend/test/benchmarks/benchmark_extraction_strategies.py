@@ -0,0 +1,69 @@
+"""
+Compare protocol extraction strategies on the same OCR text.
+
+Runs ProtocolService._extract_protocol with each ExtractionStrategy and reports
+wall-clock latency and Gemini token usage per strategy.
+
+Usage (from backend/):
+    python test/benchmarks/benchmark_extraction_strategies.py [--text-file ocr.txt] [--runs 3]
+
+Without --text-file the sample western blot PDF is OCR'd once and reused.
+"""
+import argparse
+import asyncio
+import base64
+import os
+import statistics
+import sys
+import time
+import uuid
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.core.entities.protocol_entities import ExtractionStrategy
+from src.core.services.protocol_service import ProtocolService
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), '..', 'gemini', 'western_blott.pdf')
+
+
+async def load_text(service: ProtocolService, text_file: str) -> str:
+    if text_file:
+        with open(text_file, "r", encoding="utf-8") as f:
+            return f.read()
+    with open(SAMPLE_PDF, "rb") as f:
+        encoded_pdf = base64.b64encode(f.read()).decode("utf-8")
+    print("📄 OCR'ing sample PDF once...")
+    return await service._get_text_from_file({"inline_data": {"mime_type": "application/pdf", "data": encoded_pdf}})
+
+
+async def run(text_file: str, runs: int) -> None:
+    service = ProtocolService()
+    text = await load_text(service, text_file)
+    print(f"Input text: {len(text)} characters\n")
+
+    print(f"{'strategy':<10} {'median ms':>10} {'min ms':>8} {'prompt tok':>11} {'output tok':>11} {'steps':>6}")
+    for strategy in ExtractionStrategy:
+        latencies, usages, step_counts = [], [], []
+        for _ in range(runs):
+            usage = {}
+            start = time.perf_counter()
+            _, steps = await service._extract_protocol(text, uuid.uuid4(), uuid.uuid4(), strategy=strategy, usage=usage)
+            latencies.append((time.perf_counter() - start) * 1000)
+            usages.append(usage)
+            step_counts.append(len(steps))
+
+        print(
+            f"{strategy.value:<10} {statistics.median(latencies):>10.0f} {min(latencies):>8.0f} "
+            f"{statistics.mean(u.get('prompt_tokens', 0) for u in usages):>11.0f} "
+            f"{statistics.mean(u.get('output_tokens', 0) for u in usages):>11.0f} "
+            f"{statistics.median(step_counts):>6.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--text-file", help="File with already extracted protocol text")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per strategy")
+    args = parser.parse_args()
+    asyncio.run(run(args.text_file, args.runs))
@@ -0,0 +1,106 @@
+"""
+Compare whole-document OCR with page-chunked OCR for multi-page PDFs.
+
+Builds PDFs of increasing length by repeating the pages of the sample western
+blot PDF, then OCRs each one as a single Gemini request and as concurrent page
+ranges (ProtocolService._split_pdf / _get_text_from_pdf_chunk), and reports the
+wall-clock latency of both. The text-layer fast path is turned off so every
+page is OCR'd. Nothing is uploaded to storage or cached.
+
+Usage (from backend/):
+    python test/benchmarks/benchmark_pdf_ocr_chunking.py [--pages 1 4 8 16] [--pages-per-chunk 4] [--concurrency 4] [--runs 1]
+"""
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from pypdf import PdfReader, PdfWriter
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.core.entities.protocol_entities import IngestionJob, ProtocolDocument
+from src.core.services.protocol_service import ProtocolService
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), '..', 'gemini', 'western_blott.pdf')
+
+
+def build_pdf(page_count: int) -> bytes:
+    """A PDF of page_count pages, cycling through the sample PDF's pages."""
+    reader = PdfReader(SAMPLE_PDF)
+    writer = PdfWriter()
+    for i in range(page_count):
+        writer.add_page(reader.pages[i % len(reader.pages)])
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+async def ocr_whole(service: ProtocolService, path: str) -> str:
+    document_part, gemini_file_name = await service._document_part_from_file(path, "application/pdf", "benchmark.pdf")
+    try:
+        return await service._get_text_from_file(document_part)
+    finally:
+        if gemini_file_name:
+            await service._delete_gemini_file(gemini_file_name)
+
+
+async def ocr_chunked(service: ProtocolService, job: IngestionJob, path: str) -> str:
+    _, chunks = await asyncio.to_thread(service._split_pdf, path)
+    texts = await asyncio.gather(
+        *(service._get_text_from_pdf_chunk(job, first, last, data, {}) for first, last, data in chunks)
+    )
+    return "\n\n".join(texts)
+
+
+async def run(page_counts, pages_per_chunk: int, concurrency: int, runs: int) -> None:
+    service = ProtocolService()
+    service.ocr_pages_per_chunk = pages_per_chunk
+    service.ocr_concurrency = concurrency
+    service.text_layer_enabled = False
+    now = datetime.now()
+    job = IngestionJob(
+        document=ProtocolDocument(document_id=uuid.uuid4(), document_name="benchmark.pdf", object_url="",
+                                  created_at=now, updated_at=now),
+        file_extension="pdf"
+    )
+
+    print(f"{'pages':>5} {'chunks':>6} {'whole ms':>9} {'chunked ms':>11} {'speedup':>8} {'whole chars':>12} {'chunked chars':>14}")
+    for page_count in page_counts:
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as temp_file:
+            temp_file.write(build_pdf(page_count))
+            temp_file.flush()
+
+            whole, chunked = [], []
+            for _ in range(runs):
+                start = time.perf_counter()
+                whole_text = await ocr_whole(service, temp_file.name)
+                whole.append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                chunked_text = await ocr_chunked(service, job, temp_file.name)
+                chunked.append((time.perf_counter() - start) * 1000)
+
+        chunk_count = -(-page_count // pages_per_chunk)
+        whole_ms, chunked_ms = statistics.median(whole), statistics.median(chunked)
+        print(
+            f"{page_count:>5} {chunk_count:>6} {whole_ms:>9.0f} {chunked_ms:>11.0f} {whole_ms / chunked_ms:>7.1f}x "
+            f"{len(whole_text):>12} {len(chunked_text):>14}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 4, 8, 16], help="Page counts to test")
+    parser.add_argument("--pages-per-chunk", type=int, default=4, help="Pages per OCR request (OCR_PAGES_PER_CHUNK)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent OCR requests (OCR_CONCURRENCY)")
+    parser.add_argument("--runs", type=int, default=1, help="Runs per page count; the median is reported")
+    args = parser.parse_args()
+    asyncio.run(run(args.pages, args.pages_per_chunk, args.concurrency, args.runs))
@@ -0,0 +1,104 @@
+"""
+Compare the local PDF text-layer fast path with Gemini OCR.
+
+For each PDF, shows which pages ProtocolService._split_pdf reads from the
+embedded text layer and which it sends to OCR. It then times the full text
+extraction with the fast path on and off (OCR_TEXT_LAYER) and counts the
+Gemini requests each makes. A similarity score between the two texts shows
+how closely the text layer matches the OCR output. Nothing is uploaded to
+storage or cached.
+
+Usage (from backend/):
+    python test/benchmarks/benchmark_pdf_text_layer.py [--pdf a.pdf b.pdf] [--runs 1]
+
+Without --pdf the sample western blot PDF is used.
+"""
+import argparse
+import asyncio
+import difflib
+import os
+import shutil
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from pypdf import PdfReader
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.core.entities.protocol_entities import IngestionJob, ProtocolDocument
+from src.core.services.protocol_service import ProtocolService
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), '..', 'gemini', 'western_blott.pdf')
+
+
+def describe_pages(service: ProtocolService, path: str) -> None:
+    reader = PdfReader(path)
+    print(f"{'page':>4} {'chars':>6} {'alnum':>6} {'images':>6}  source")
+    for page_number, page in enumerate(reader.pages):
+        text = page.extract_text() or ""
+        characters = "".join(text.split())
+        alphanumeric = sum(character.isalnum() for character in characters) / len(characters) if characters else 0
+        source = "text layer" if service._has_usable_text_layer(page, text) else "OCR"
+        print(f"{page_number + 1:>4} {len(characters):>6} {alphanumeric:>6.2f} {str(service._page_has_images(page)):>6}  {source}")
+
+
+async def extract(service: ProtocolService, path: str):
+    """Run _get_text_from_pdf_pages on a local file, counting Gemini OCR requests."""
+    now = datetime.now()
+    job = IngestionJob(
+        document=ProtocolDocument(document_id=uuid.uuid4(), document_name=os.path.basename(path), object_url=path,
+                                  created_at=now, updated_at=now),
+        file_extension="pdf"
+    )
+    requests = 0
+    get_text_from_file = service._get_text_from_file
+
+    async def counted(document_part: dict) -> str:
+        nonlocal requests
+        requests += 1
+        return await get_text_from_file(document_part)
+
+    service._get_text_from_file = counted
+    try:
+        start = time.perf_counter()
+        text = await service._get_text_from_pdf_pages(job)
+        return text, (time.perf_counter() - start) * 1000, requests
+    finally:
+        service._get_text_from_file = get_text_from_file
+
+
+async def run(paths, runs: int) -> None:
+    service = ProtocolService()
+    # Read the "stored" document straight from disk
+    service.bucket_client.download_to_file = lambda object_url, file_path: shutil.copyfile(object_url, file_path)
+
+    for path in paths:
+        print(f"\n📄 {path}")
+        describe_pages(service, path)
+
+        results = {}
+        for label, enabled in (("text layer", True), ("OCR only", False)):
+            service.text_layer_enabled = enabled
+            latencies = []
+            for _ in range(runs):
+                text, latency, requests = await extract(service, path)
+                latencies.append(latency)
+            results[label] = (text, statistics.median(latencies), requests)
+
+        print(f"\n{'mode':<11} {'median ms':>10} {'requests':>9} {'chars':>7}")
+        for label, (text, latency, requests) in results.items():
+            print(f"{label:<11} {latency:>10.0f} {requests:>9} {len(text):>7}")
+        similarity = difflib.SequenceMatcher(None, results["text layer"][0], results["OCR only"][0], autojunk=False).ratio()
+        print(f"Text similarity: {similarity:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", nargs="+", default=[SAMPLE_PDF], help="PDFs to extract")
+    parser.add_argument("--runs", type=int, default=1, help="Runs per mode; the median is reported")
+    args = parser.parse_args()
+    asyncio.run(run(args.pdf, args.runs))
@@ -0,0 +1,157 @@
+"""
+Compare VoiceActivityDetector with the old mean-amplitude is_silent check.
+
+Scores frame-level speech detection against ground truth on synthetic
+lab-noise fixtures (quiet room, fume hood, centrifuge, pipette clicks, mains
+hum) and reports throughput for whole-buffer and streaming detection.
+
+Usage (from backend/):
+    python test/benchmarks/benchmark_voice_activity.py [recording.wav ...] [--runs 5]
+
+Recordings have no ground truth, so only their speech ratio and throughput are
+reported. They are decoded with PyAV.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.core.services.voice_activity import StreamingVoiceActivityDetector, VoiceActivityDetector
+
+RATE = 16000
+CHUNK = 1024  # chunk size used by test/gemini/test_real_time_with_prompt.py
+
+
+def is_silent(audio_bytes, threshold=20):
+    """The original check from test_real_time_with_prompt.py."""
+    samples = np.frombuffer(audio_bytes, dtype=np.int16)
+    return np.abs(samples).mean() < threshold
+
+
+def speech(seconds: float, rng) -> np.ndarray:
+    """Voiced syllables on a 180 Hz fundamental with short fricative bursts between them."""
+    t = np.arange(int(seconds * RATE)) / RATE
+    envelope = np.clip(np.sin(2 * np.pi * 2.5 * t), 0, 1)
+    voiced = sum(np.sin(2 * np.pi * 180 * k * t) / k for k in range(1, 6)) * 5000 * envelope
+    fricative = rng.normal(0, 1500, t.size) * (np.clip(-np.sin(2 * np.pi * 2.5 * t), 0, 1) > 0.9)
+    return voiced + fricative
+
+
+def lab_noise(kind: str, seconds: float, rng) -> np.ndarray:
+    n = int(seconds * RATE)
+    t = np.arange(n) / RATE
+    if kind == "quiet room":
+        return rng.normal(0, 60, n)
+    if kind == "fume hood":
+        # Broadband airflow, low-passed to roughly pink
+        return np.convolve(rng.normal(0, 1200, n), np.ones(8) / 8, mode="same")
+    if kind == "centrifuge":
+        return 900 * np.sin(2 * np.pi * 140 * t) + 400 * np.sin(2 * np.pi * 2870 * t) + rng.normal(0, 300, n)
+    if kind == "pipette clicks":
+        noise = rng.normal(0, 80, n)
+        for start in rng.integers(0, n - 160, size=int(seconds * 2)):
+            noise[start:start + 160] += rng.normal(0, 12000, 160) * np.exp(-np.arange(160) / 30)
+        return noise
+    if kind == "mains hum":
+        return 700 * np.sin(2 * np.pi * 60 * t) + 300 * np.sin(2 * np.pi * 180 * t) + rng.normal(0, 80, n)
+    raise ValueError(kind)
+
+
+def fixture(kind: str, seed: int):
+    """Noise, speech, noise, speech, noise, with a per-sample ground truth mask."""
+    rng = np.random.default_rng(seed)
+    layout = [(1.5, False), (2.0, True), (1.2, False), (1.0, True), (1.5, False)]
+    total = sum(seconds for seconds, _ in layout)
+    audio = lab_noise(kind, total, rng)
+    truth = np.zeros(audio.size, dtype=bool)
+    offset = 0
+    for seconds, is_speech in layout:
+        n = int(seconds * RATE)
+        if is_speech:
+            audio[offset:offset + n] += speech(seconds, rng)
+            truth[offset:offset + n] = True
+        offset += n
+    return np.clip(audio, -32768, 32767).astype(np.int16), truth
+
+
+def legacy_mask(samples: np.ndarray) -> np.ndarray:
+    """Per-sample speech mask from is_silent over CHUNK-sized blocks."""
+    mask = np.zeros(samples.size, dtype=bool)
+    for start in range(0, samples.size, CHUNK):
+        mask[start:start + CHUNK] = not is_silent(samples[start:start + CHUNK].tobytes())
+    return mask
+
+
+def vad_mask(detector: VoiceActivityDetector, samples: np.ndarray) -> np.ndarray:
+    frames = detector.detect(samples)
+    mask = np.zeros(samples.size, dtype=bool)
+    mask[:frames.size * detector.frame_length] = np.repeat(frames, detector.frame_length)
+    return mask
+
+
+def score(mask: np.ndarray, truth: np.ndarray):
+    true_positive = np.count_nonzero(mask & truth)
+    precision = true_positive / max(np.count_nonzero(mask), 1)
+    recall = true_positive / max(np.count_nonzero(truth), 1)
+    return precision, recall
+
+
+def time_ms(fn, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def stream(samples: np.ndarray, chunk: int = 1600) -> None:
+    streaming = StreamingVoiceActivityDetector()
+    for start in range(0, samples.size, chunk):
+        streaming.process(samples[start:start + chunk])
+
+
+def load_recording(path: str) -> np.ndarray:
+    from src.core.services.audio_preprocessor import AudioPreprocessor
+    with open(path, "rb") as f:
+        return AudioPreprocessor().decode(f.read())
+
+
+def run(paths, runs: int) -> None:
+    detector = VoiceActivityDetector(sample_rate=RATE)
+
+    print(f"{'fixture':<16} {'legacy P':>9} {'legacy R':>9} {'vad P':>7} {'vad R':>7} "
+          f"{'legacy ms':>10} {'vad ms':>8} {'stream ms':>10}")
+    for seed, kind in enumerate(["quiet room", "fume hood", "centrifuge", "pipette clicks", "mains hum"]):
+        samples, truth = fixture(kind, seed)
+        legacy_precision, legacy_recall = score(legacy_mask(samples), truth)
+        vad_precision, vad_recall = score(vad_mask(detector, samples), truth)
+        print(
+            f"{kind:<16} {legacy_precision:>9.2f} {legacy_recall:>9.2f} {vad_precision:>7.2f} {vad_recall:>7.2f} "
+            f"{time_ms(lambda: legacy_mask(samples), runs):>10.2f} "
+            f"{time_ms(lambda: detector.detect(samples), runs):>8.2f} "
+            f"{time_ms(lambda: stream(samples), runs):>10.2f}"
+        )
+
+    for path in paths:
+        samples = load_recording(path)
+        speech_ratio = np.count_nonzero(vad_mask(detector, samples)) / max(samples.size, 1)
+        print(
+            f"{os.path.basename(path)[:16]:<16} {samples.size / RATE:>6.1f}s speech {speech_ratio:>5.0%} "
+            f"vad {time_ms(lambda: detector.detect(samples), runs):.2f} ms "
+            f"stream {time_ms(lambda: stream(samples), runs):.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recordings", nargs="*", help="Recorded lab audio (wav, webm, ...)")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per fixture")
+    args = parser.parse_args()
+    run(args.recordings, args.runs)
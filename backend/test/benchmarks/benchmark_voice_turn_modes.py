@@ -0,0 +1,52 @@
+"""
+Compare voice turn modes on the same recorded utterance.
+
+Runs ExperimentService.process_audio with each VoiceTurnMode and reports
+wall-clock latency per mode.
+
+Usage (from backend/):
+    python test/benchmarks/benchmark_voice_turn_modes.py --audio-file turn.webm [--runs 5]
+"""
+import argparse
+import asyncio
+import mimetypes
+import os
+import statistics
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.core.entities.experiment_entities import VoiceTurnMode
+from src.core.services.experiment_service import ExperimentService
+
+
+async def run(audio_file: str, runs: int) -> None:
+    service = ExperimentService()
+    with open(audio_file, "rb") as f:
+        audio_bytes = f.read()
+    mime_type = mimetypes.guess_type(audio_file)[0] or "audio/webm"
+    print(f"Input audio: {len(audio_bytes)} bytes ({mime_type})\n")
+
+    print(f"{'mode':<12} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for mode in VoiceTurnMode:
+        latencies = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = await service.process_audio(audio_bytes, mime_type, mode=mode)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        print(
+            f"{mode.value:<12} {statistics.median(latencies):>10.0f} "
+            f"{min(latencies):>8.0f} {max(latencies):>8.0f}"
+        )
+        print(f"  last transcript: {result['transcript']!r}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio-file", required=True, help="Recorded utterance (webm, wav, mp3, ...)")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per mode")
+    args = parser.parse_args()
+    asyncio.run(run(args.audio_file, args.runs))
@@ -0,0 +1,136 @@
+"""
+Checks that ConversationWriter keeps, retries or drops messages depending on why a write failed.
+
+The writer runs against stand-in DALs that fail the way ExperimentDAL does:
+the driver error wrapped in a plain Exception. Nothing is written to Postgres.
+
+Usage (from backend/):
+    python -m pytest test/services/test_conversation_writer.py
+    python test/services/test_conversation_writer.py
+"""
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime
+from threading import BoundedSemaphore
+
+import psycopg2
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.core.entities.experiment_entities import ExperimentConversation, MessageType, SenderRole
+from src.core.services.conversation_writer import ConversationWriter
+from src.dal.databases.psql_client import PostgreSQLClient
+
+
+class FlakyDAL:
+    """Fails every write with the error error_for(batch) returns, or writes the batch if it returns None."""
+
+    def __init__(self, error_for):
+        self.error_for = error_for
+        self.written = []
+        self.calls = 0
+
+    async def create_experiment_conversations(self, batch):
+        self.calls += 1
+        error = self.error_for(batch)
+        if error is not None:
+            try:
+                raise error
+            except Exception as e:
+                # Same wrapping as ExperimentDAL
+                raise Exception(f"Error creating experiment conversations: {e}")
+        self.written.extend(batch)
+        return len(batch)
+
+
+def message(content: str) -> ExperimentConversation:
+    return ExperimentConversation(
+        message_id=uuid.uuid4(),
+        experiment_id=uuid.uuid4(),
+        sender_role=SenderRole.USER,
+        message_type=MessageType.OBSERVATION,
+        content=content,
+        created_at=datetime.now()
+    )
+
+
+async def run_writer(dal: FlakyDAL, messages, seconds: float = 0.3) -> ConversationWriter:
+    writer = ConversationWriter(flush_interval_ms=10, max_attempts=3)
+    writer.experiment_dal = dal
+    await writer.start()
+    for m in messages:
+        writer.add(m)
+    await asyncio.sleep(seconds)
+    return writer
+
+
+def test_messages_survive_a_database_outage():
+    async def scenario():
+        database_up = False
+        dal = FlakyDAL(lambda batch: None if database_up else psycopg2.OperationalError("No active database connection"))
+        messages = [message("first"), message("second")]
+        writer = await run_writer(dal, messages)
+        # Far more failed flushes than max_attempts, and nothing dropped
+        assert dal.calls > 3 * writer.max_attempts
+        assert writer._pending == messages and dal.written == []
+
+        database_up = True
+        await asyncio.sleep(0.1)
+        assert writer._pending == [] and dal.written == messages
+        await writer.stop()
+
+    asyncio.run(scenario())
+
+
+def test_rejected_messages_are_dropped_and_the_rest_written():
+    async def scenario():
+        bad = message("bad")
+        dal = FlakyDAL(lambda batch: psycopg2.IntegrityError("violates foreign key") if bad in batch else None)
+        good = [message("one"), message("two")]
+        writer = await run_writer(dal, [good[0], bad, good[1]])
+        assert writer._pending == [] and dal.written == good
+        await writer.stop()
+
+    asyncio.run(scenario())
+
+
+def test_other_failures_are_retried_a_limited_number_of_times():
+    async def scenario():
+        dal = FlakyDAL(lambda batch: RuntimeError("something unexpected"))
+        writer = await run_writer(dal, [message("stuck")])
+        assert writer._pending == [] and dal.calls == writer.max_attempts
+        await writer.stop()
+
+    asyncio.run(scenario())
+
+
+def test_pool_errors_are_operational_errors():
+    # A client that never got a pool, and one whose checkout slots are all taken
+    client = object.__new__(PostgreSQLClient)
+    client.pool = None
+    client._create_pool = lambda: None
+    try:
+        client._checkout()
+        raise AssertionError("checkout without a pool should fail")
+    except psycopg2.OperationalError:
+        pass
+
+    client._slots = BoundedSemaphore(1)
+    client._slots.acquire()
+    client.checkout_timeout = 0.01
+    try:
+        with client.connection():
+            pass
+        raise AssertionError("checkout with no free slot should time out")
+    except psycopg2.OperationalError:
+        pass
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
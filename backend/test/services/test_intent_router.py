@@ -0,0 +1,89 @@
+"""
+Checks for IntentRouter's transcript classification and duration parsing.
+
+Neither needs Postgres or Gemini.
+
+Usage (from backend/):
+    python -m pytest test/services/test_intent_router.py
+    python test/services/test_intent_router.py
+"""
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.core.entities.experiment_entities import VoiceIntent
+from src.core.services.intent_router import IntentRouter
+
+router = IntentRouter()
+
+
+def intent_of(transcript: str):
+    match = router.classify(transcript)
+    return match.intent if match else None
+
+
+def test_navigation_commands():
+    cases = {
+        "Next step.": VoiceIntent.NEXT,
+        "okay, let's move on": VoiceIntent.NEXT,
+        "I'm done with this step": VoiceIntent.DONE,
+        "that's finished": VoiceIntent.DONE,
+        "Can you repeat that?": VoiceIntent.REPEAT,
+        "what step am I on": VoiceIntent.REPEAT,
+    }
+    for transcript, intent in cases.items():
+        assert intent_of(transcript) == intent, transcript
+
+
+def test_timer_commands():
+    cases = {
+        "Set a timer for 5 minutes": 300,
+        "set me a timer for 1 minute 30 seconds": 90,
+        "start a timer for an hour and a half": 5400,
+        "timer for 90 seconds please": 90,
+        "could you set a 10 minute timer": 600,
+        "set a timer for half an hour": 1800,
+        "set a timer for 1.5 minutes": 90,
+        "start the timer": None,
+        "time me": None,
+    }
+    for transcript, seconds in cases.items():
+        match = router.classify(transcript)
+        assert match is not None and match.intent == VoiceIntent.TIMER, transcript
+        assert match.timer_seconds == seconds, transcript
+
+
+def test_questions_go_to_the_model():
+    for transcript in (
+        "How long is the timer for the incubation step again?",
+        "What is the timer for?",
+        "Is the timer for five minutes?",
+        "why do we need a timer for this",
+        "what temperature should the incubator be at",
+        "I think the next step needs a fresh buffer made up before we start",
+    ):
+        assert router.classify(transcript) is None, transcript
+
+
+def test_parse_duration():
+    cases = {
+        "5 minutes": 300,
+        "1 minute 30 seconds": 90,
+        "1 hour and 15 minutes": 4500,
+        "two and a half minutes": 150,
+        "a minute and a half": 90,
+        "forty five seconds": 45,
+        "2 hrs": 7200,
+        "no duration here": None,
+    }
+    for text, seconds in cases.items():
+        assert router._parse_duration(text) == seconds, text
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
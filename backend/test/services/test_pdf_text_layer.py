@@ -0,0 +1,117 @@
+"""
+Checks which PDF pages ProtocolService reads from the text layer and which it OCRs.
+
+Builds small PDFs with pypdf: born-digital pages from the sample western blot
+PDF, and "scanned" pages whose only content is an image, drawn directly, from
+inside a Form XObject, or inline. Nothing is sent to Gemini.
+
+Usage (from backend/):
+    python -m pytest test/services/test_pdf_text_layer.py
+    python test/services/test_pdf_text_layer.py
+"""
+import io
+import os
+import sys
+import tempfile
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DecodedStreamObject, DictionaryObject, FloatObject, NameObject, NumberObject
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# ProtocolService builds its Gemini client on creation; these checks never call it
+os.environ.setdefault("GEMINI_API_KEY", "unused")
+
+from src.core.services.protocol_service import ProtocolService
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), '..', 'gemini', 'western_blott.pdf')
+PAGE_SIZE = 200
+
+service = ProtocolService()
+
+
+def stream(writer: PdfWriter, data: bytes, **entries):
+    obj = DecodedStreamObject()
+    obj.set_data(data)
+    obj.update({NameObject(f"/{key}"): value for key, value in entries.items()})
+    return writer._add_object(obj)
+
+
+def image(writer: PdfWriter):
+    return stream(
+        writer, b"\x80" * 4, Type=NameObject("/XObject"), Subtype=NameObject("/Image"), Width=NumberObject(2),
+        Height=NumberObject(2), ColorSpace=NameObject("/DeviceGray"), BitsPerComponent=NumberObject(8)
+    )
+
+
+def xobjects(**entries) -> DictionaryObject:
+    return DictionaryObject({NameObject("/XObject"): DictionaryObject({NameObject(f"/{k}"): v for k, v in entries.items()})})
+
+
+def add_scanned_page(writer: PdfWriter, kind: str) -> None:
+    page = writer.add_blank_page(PAGE_SIZE, PAGE_SIZE)
+    draw_image = f"q {PAGE_SIZE} 0 0 {PAGE_SIZE} 0 0 cm /Im0 Do Q".encode()
+    if kind == "image":
+        page[NameObject("/Resources")] = xobjects(Im0=image(writer))
+        content = draw_image
+    elif kind == "form":
+        form = stream(
+            writer, draw_image, Type=NameObject("/XObject"), Subtype=NameObject("/Form"),
+            BBox=ArrayObject([FloatObject(0), FloatObject(0), FloatObject(PAGE_SIZE), FloatObject(PAGE_SIZE)]),
+            Resources=xobjects(Im0=image(writer))
+        )
+        page[NameObject("/Resources")] = xobjects(Fm0=form)
+        content = b"/Fm0 Do"
+    else:
+        content = f"q {PAGE_SIZE} 0 0 {PAGE_SIZE} 0 0 cm BI /W 2 /H 2 /CS /G /BPC 8 ID ".encode() + b"\x80" * 4 + b" EI Q"
+    page[NameObject("/Contents")] = stream(writer, content)
+
+
+def split(*kinds: str):
+    """Run _split_pdf on a PDF with one page per kind: text, blank, image, form or inline."""
+    sample = PdfReader(SAMPLE_PDF)
+    writer = PdfWriter()
+    for kind in kinds:
+        if kind == "text":
+            writer.add_page(sample.pages[0])
+        elif kind == "blank":
+            writer.add_blank_page(PAGE_SIZE, PAGE_SIZE)
+        else:
+            add_scanned_page(writer, kind)
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as temp_file:
+        writer.write(temp_file)
+        temp_file.flush()
+        page_texts, chunks = service._split_pdf(temp_file.name)
+    return sorted(page_texts), [(first, last) for first, last, _ in chunks]
+
+
+def test_born_digital_pages_skip_ocr():
+    assert split("text", "text") == ([0, 1], [])
+
+
+def test_image_only_pages_are_ocrd():
+    for kind in ("image", "form", "inline", "blank"):
+        assert split(kind) == ([], [(0, 0)]), kind
+
+
+def test_mixed_document():
+    assert split("text", "form", "inline", "blank", "text", "image") == ([0, 4], [(1, 3), (5, 5)])
+
+
+def test_page_has_images():
+    writer = PdfWriter()
+    for kind in ("image", "form", "inline"):
+        add_scanned_page(writer, kind)
+    writer.add_blank_page(PAGE_SIZE, PAGE_SIZE)
+    output = io.BytesIO()
+    writer.write(output)
+    pages = PdfReader(output).pages
+    assert [ProtocolService._page_has_images(page) for page in pages] == [True, True, True, False]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,116 @@
+"""
+Checks for the Range and conditional-request helpers of GET /protocols/{id}/document.
+
+They are pure functions of the request headers and the stored object's size,
+ETag and modification time, so nothing is read from Postgres or MinIO.
+
+Usage (from backend/):
+    python -m pytest test/web/test_protocol_document_headers.py
+    python test/web/test_protocol_document_headers.py
+"""
+import os
+import sys
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+from starlette.requests import Request
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# The router builds its Gemini client on import; these checks never call it
+os.environ.setdefault("GEMINI_API_KEY", "unused")
+
+from src.web.routers.protocols_router import _if_range_matches, _is_not_modified, _parse_byte_range, _parse_http_date
+
+ETAG = '"0123abcd"'
+LAST_MODIFIED = datetime(2024, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+LAST_MODIFIED_HTTP = "Wed, 01 May 2024 12:30:15 GMT"
+
+
+def request_with(**headers) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "headers": raw})
+
+
+def raises_416(range_header: str, size: int) -> bool:
+    try:
+        _parse_byte_range(range_header, size)
+    except HTTPException as e:
+        assert e.headers["Content-Range"] == f"bytes */{size}"
+        return e.status_code == 416
+    return False
+
+
+def test_parse_byte_range():
+    cases = {
+        "bytes=0-99": (0, 99),
+        "bytes=100-": (100, 999),
+        "bytes=900-5000": (900, 999),
+        "bytes=-100": (900, 999),
+        "bytes=-5000": (0, 999),
+        " bytes=5-5 ": (5, 5),
+        # Ignored: the whole document is sent
+        "bytes=-": None,
+        "bytes=10-5": None,
+        "bytes=0-1,5-9": None,
+        "items=0-9": None,
+        "bytes=a-b": None,
+    }
+    for header, expected in cases.items():
+        assert _parse_byte_range(header, 1000) == expected, header
+
+
+def test_unsatisfiable_ranges():
+    assert raises_416("bytes=1000-", 1000)
+    assert raises_416("bytes=1000-2000", 1000)
+    assert raises_416("bytes=-0", 1000)
+    assert raises_416("bytes=0-", 0)
+    assert raises_416("bytes=-10", 0)
+
+
+def test_parse_http_date_is_utc():
+    for value in (LAST_MODIFIED_HTTP, "Wed, 01 May 2024 12:30:15 -0000", "Wed, 01 May 2024 14:30:15 +0200"):
+        parsed = _parse_http_date(value)
+        assert parsed == LAST_MODIFIED.replace(microsecond=0), value
+        assert parsed.tzinfo is not None, value
+    assert _parse_http_date("yesterday") is None
+    assert _parse_http_date("") is None
+
+
+def test_if_none_match():
+    assert _is_not_modified(request_with(if_none_match=ETAG), ETAG, LAST_MODIFIED)
+    assert _is_not_modified(request_with(if_none_match=f'"other", W/{ETAG}'), ETAG, LAST_MODIFIED)
+    assert _is_not_modified(request_with(if_none_match="*"), ETAG, LAST_MODIFIED)
+    assert not _is_not_modified(request_with(if_none_match='"other"'), ETAG, LAST_MODIFIED)
+    # If-None-Match wins over If-Modified-Since
+    assert not _is_not_modified(
+        request_with(if_none_match='"other"', if_modified_since=LAST_MODIFIED_HTTP), ETAG, LAST_MODIFIED
+    )
+
+
+def test_if_modified_since():
+    assert _is_not_modified(request_with(if_modified_since=LAST_MODIFIED_HTTP), ETAG, LAST_MODIFIED)
+    assert _is_not_modified(request_with(if_modified_since="Wed, 01 May 2024 12:30:15 -0000"), ETAG, LAST_MODIFIED)
+    assert _is_not_modified(request_with(if_modified_since="Thu, 02 May 2024 00:00:00 GMT"), ETAG, LAST_MODIFIED)
+    assert not _is_not_modified(request_with(if_modified_since="Wed, 01 May 2024 12:30:14 GMT"), ETAG, LAST_MODIFIED)
+    assert not _is_not_modified(request_with(if_modified_since="not a date"), ETAG, LAST_MODIFIED)
+    assert not _is_not_modified(request_with(), ETAG, LAST_MODIFIED)
+
+
+def test_if_range():
+    assert _if_range_matches(None, ETAG, LAST_MODIFIED)
+    assert _if_range_matches(ETAG, ETAG, LAST_MODIFIED)
+    assert not _if_range_matches('"other"', ETAG, LAST_MODIFIED)
+    # If-Range needs a strong match
+    assert not _if_range_matches(f"W/{ETAG}", ETAG, LAST_MODIFIED)
+    assert _if_range_matches(LAST_MODIFIED_HTTP, ETAG, LAST_MODIFIED)
+    assert _if_range_matches("Wed, 01 May 2024 12:30:15 -0000", ETAG, LAST_MODIFIED)
+    assert not _if_range_matches("Wed, 01 May 2024 12:30:16 GMT", ETAG, LAST_MODIFIED)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -12,8 +12,35 @@ CREATE TABLE
         ingested_at TIMESTAMP,
         created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-        PRIMARY KEY (document_id),
-        UNIQUE (object_url)
+        PRIMARY KEY (document_id)
+    );
+
+-- Identical uploads share one stored object, so object_url is not unique
+CREATE INDEX idx_protocol_documents_object_url ON protocol_documents (object_url);
+
+CREATE TABLE
+    document_text_cache (
+        content_hash CHAR(64) NOT NULL, -- SHA-256 of the uploaded file
+        object_url VARCHAR(1024) NOT NULL,
+        mime_type VARCHAR(128),
+        byte_size BIGINT,
+        extracted_text TEXT, -- NULL until OCR has finished
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        last_accessed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (content_hash)
+    );
+
+CREATE INDEX idx_document_text_cache_last_accessed_at ON document_text_cache (last_accessed_at);
+
+CREATE TABLE
+    document_page_text_cache (
+        content_hash CHAR(64) NOT NULL,
+        first_page INTEGER NOT NULL, -- 0-based, inclusive
+        last_page INTEGER NOT NULL, -- 0-based, inclusive
+        extracted_text TEXT NOT NULL, -- OCR of just these pages, kept until the whole document succeeds
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (content_hash, first_page, last_page),
+        CONSTRAINT fk_document_page_text_cache_document FOREIGN KEY (content_hash) REFERENCES document_text_cache (content_hash) ON DELETE CASCADE
     );
 
 CREATE TABLE
@@ -29,6 +56,9 @@ CREATE TABLE
         CONSTRAINT fk_protocols_document FOREIGN KEY (document_id) REFERENCES protocol_documents (document_id) ON DELETE RESTRICT ON UPDATE CASCADE
     );
 
+-- Supports keyset pagination of GET /protocols
+CREATE INDEX idx_protocols_created_at_protocol_id ON protocols (created_at DESC, protocol_id DESC);
+
 CREATE TABLE
     protocol_steps (
         protocol_step_id UUID NOT NULL DEFAULT uuid_generate_v4(),
@@ -1,15 +1,35 @@
 import { useState } from 'react'
 import { Link, useNavigate } from 'react-router-dom'
-import { uploadProtocol } from '../services/api'
+import { uploadProtocol, uploadProtocolDirect, getIngestionStatus } from '../services/api'
 import './AddProtocolPage.css'
 
 function AddProtocolPage() {
   const [file, setFile] = useState(null)
   const [uploading, setUploading] = useState(false)
+  const [processing, setProcessing] = useState(false)
   const [error, setError] = useState(null)
   const [dragActive, setDragActive] = useState(false)
   const navigate = useNavigate()
 
+  const POLL_INTERVAL_MS = 2000
+  // Long multi-page scans can take a few minutes; stop waiting well after that
+  const POLL_TIMEOUT_MS = 10 * 60 * 1000
+
+  const waitForIngestion = async (documentId) => {
+    const deadline = Date.now() + POLL_TIMEOUT_MS
+    while (Date.now() < deadline) {
+      const status = await getIngestionStatus(documentId)
+      if (status.ingestion_status === 'ingested') {
+        return status
+      }
+      if (status.ingestion_status === 'failed') {
+        throw new Error('Protocol processing failed. Please try again.')
+      }
+      await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS))
+    }
+    throw new Error('Protocol processing is taking longer than expected. Check the protocol list later or try again.')
+  }
+
   const handleFileChange = (e) => {
     const selectedFile = e.target.files[0]
     if (selectedFile) {
@@ -73,10 +93,18 @@ function AddProtocolPage() {
       setUploading(true)
       setError(null)
       
-      const formData = new FormData()
-      formData.append('file', file)
-      
-      const response = await uploadProtocol(formData)
+      let upload
+      try {
+        upload = await uploadProtocolDirect(file)
+      } catch (directError) {
+        // Storage may not be reachable from the browser; send the file through the API instead
+        console.warn("Direct upload failed, uploading through the API:", directError)
+        const formData = new FormData()
+        formData.append('file', file)
+        upload = await uploadProtocol(formData)
+      }
+      setProcessing(true)
+      const response = await waitForIngestion(upload.document_id)
       navigate('/protocol-preview', { 
         state: { previewData: response } 
       })
@@ -84,6 +112,7 @@ function AddProtocolPage() {
       setError(err.message)
     } finally {
       setUploading(false)
+      setProcessing(false)
     }
   }
 
@@ -159,7 +188,7 @@ function AddProtocolPage() {
                 className="upload-btn"
                 disabled={!file || uploading}
               >
-                {uploading ? 'Uploading...' : 'Upload Protocol'}
+                {processing ? 'Processing...' : uploading ? 'Uploading...' : 'Upload Protocol'}
               </button>
             </div>
           </form>
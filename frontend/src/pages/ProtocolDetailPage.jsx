@@ -1,6 +1,7 @@
 import { useState, useEffect, useRef } from 'react'
 import { useParams, Link } from 'react-router-dom'
-import { getProtocol, getProtocolSteps, startExperiment, stopExperiment, getExperimentsByProtocol } from '../services/api'
+import { getProtocol, getProtocolSteps, startExperiment, stopExperiment, getExperimentsByProtocol, streamVoiceTurn } from '../services/api'
+import { openVoiceStream } from '../services/voiceStream'
 import './ProtocolDetailPage.css'
 
 function ProtocolDetailPage() {
@@ -20,6 +21,8 @@ function ProtocolDetailPage() {
   const [voiceStatus, setVoiceStatus] = useState('')
   const [isListening, setIsListening] = useState(false)
   const experimentActiveRef = useRef(false)
+  const voiceStreamRef = useRef(null)
+  const experimentIdRef = useRef(null)
   
   // Experiment state
   const [currentExperimentId, setCurrentExperimentId] = useState(null)
@@ -138,27 +141,44 @@ function ProtocolDetailPage() {
 
   const sendToBackend = async (audioBlob) => {
     console.log("Sending audio to backend, blob size:", audioBlob.size);
-    const form = new FormData();
-    form.append("file", audioBlob, "turn.webm");
-    const res = await fetch("/api/experiments/voice-turn", { method: "POST", body: form });
-    console.log("Backend response status:", res.status);
-    
-    if (!res.ok) {
-      throw new Error(`Backend error: ${res.status} ${res.statusText}`);
-    }
-    
-    const text = await res.text();
-    console.log("Backend response text:", text);
-    
-    try {
-      const data = JSON.parse(text);
-      console.log("Backend response data:", data);
-      return data.reply;
-    } catch (error) {
-      console.error("JSON parse error:", error);
-      console.error("Response text:", text);
-      throw new Error(`Invalid JSON response: ${text}`);
+    let reply = '';
+    let pending = '';
+    let lastUtterance = Promise.resolve();
+
+    // Speak each sentence as soon as it is complete instead of waiting for the whole reply
+    const speakCompleteSentences = (flush) => {
+      const sentences = pending.match(/[^.!?]+[.!?]+(\s|$)/g) || [];
+      for (const sentence of sentences) {
+        lastUtterance = speak(sentence.trim());
+      }
+      pending = pending.slice(sentences.join('').length);
+      if (flush && pending.trim()) {
+        lastUtterance = speak(pending.trim());
+        pending = '';
+      }
+    };
+
+    const result = await streamVoiceTurn(audioBlob, {
+      experimentId: experimentIdRef.current,
+      onTranscript: (transcript) => {
+        console.log("Transcript:", transcript);
+        setVoiceStatus(`🗣️ ${transcript}`);
+      },
+      onReply: (text) => {
+        reply += text;
+        pending += text;
+        setVoiceStatus(`🤖 ${reply}`);
+        speakCompleteSentences(false);
+      }
+    });
+    speakCompleteSentences(true);
+    console.log("Got reply:", reply);
+    if (result?.timer_seconds) {
+      // Timers are set by the backend's intent router, the countdown runs here
+      setTimeout(() => speak("Timer finished."), result.timer_seconds * 1000);
     }
+    await lastUtterance;
+    return reply;
   }
 
   const speak = (text) => {
@@ -183,10 +203,7 @@ function ProtocolDetailPage() {
       setVoiceStatus("🔄 Processing...");
       setIsListening(false);
       console.log("Sending to backend...");
-      const reply = await sendToBackend(audio);
-      console.log("Got reply:", reply);
-      setVoiceStatus(`🤖 ${reply}`);
-      await speak(reply);
+      await sendToBackend(audio);
       setVoiceStatus("");
       // Wait for user to speak again - don't auto-continue
       console.log("Waiting for user to speak again...");
@@ -200,6 +217,47 @@ function ProtocolDetailPage() {
     }
   }
 
+  const startVoiceStream = async (experimentId) => {
+    let transcript = ''
+    let reply = ''
+    voiceStreamRef.current = await openVoiceStream({
+      experimentId,
+      onMessage: async (message) => {
+        if (message.type === 'transcript') {
+          transcript += message.text
+          setVoiceStatus(`🎤 ${transcript}`)
+        } else if (message.type === 'reply') {
+          reply += message.text
+          setIsListening(false)
+          setVoiceStatus(`🤖 ${reply}`)
+        } else if (message.type === 'turn_complete') {
+          // Don't feed the spoken reply back into the microphone
+          voiceStreamRef.current?.pause()
+          await speak(message.reply)
+          transcript = ''
+          reply = ''
+          if (experimentActiveRef.current) {
+            setVoiceStatus("🎤 Listening...")
+            setIsListening(true)
+            voiceStreamRef.current?.resume()
+          }
+        } else if (message.type === 'error') {
+          console.error("Voice stream error:", message.message)
+        }
+      },
+      onClose: (event) => {
+        console.log("Voice stream closed:", event.code)
+        voiceStreamRef.current = null
+        if (experimentActiveRef.current) {
+          // Fall back to recording whole clips
+          conversationLoop()
+        }
+      }
+    })
+    setVoiceStatus("🎤 Listening...")
+    setIsListening(true)
+  }
+
   const handleStartExperiment = async () => {
     console.log("handleStartExperiment called");
     try {
@@ -214,17 +272,23 @@ function ProtocolDetailPage() {
       console.log("Experiment started:", response);
       
       setCurrentExperimentId(response.experiment_id);
+      experimentIdRef.current = response.experiment_id;
       setExperimentStatus(response.status);
       setIsExperimentActive(true);
       experimentActiveRef.current = true;
       setVoiceStatus("🎤 Starting experiment...");
-      console.log("Starting conversation loop...");
       
       // Refresh experiments list
       const experimentsData = await getExperimentsByProtocol(protocolId);
       setExperiments(experimentsData.experiments || []);
       
-      conversationLoop();
+      try {
+        console.log("Opening voice stream...");
+        await startVoiceStream(response.experiment_id);
+      } catch (streamError) {
+        console.error("Voice stream unavailable, using recorded turns:", streamError);
+        conversationLoop();
+      }
     } catch (error) {
       console.error("Error in handleStartExperiment:", error);
       setVoiceStatus(`❌ Error starting experiment: ${error.message}`);
@@ -243,9 +307,14 @@ function ProtocolDetailPage() {
       
       setIsExperimentActive(false);
       experimentActiveRef.current = false;
+      if (voiceStreamRef.current) {
+        voiceStreamRef.current.stop();
+        voiceStreamRef.current = null;
+      }
       setVoiceStatus("");
       setIsListening(false);
       setCurrentExperimentId(null);
+      experimentIdRef.current = null;
       
       // Refresh experiments list
       const experimentsData = await getExperimentsByProtocol(protocolId);
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { useLocation, useNavigate } from 'react-router-dom'
-import { createProtocol } from '../services/api'
+import { createProtocol, getDocumentDownloadUrl, getProtocolDocumentUrl } from '../services/api'
 import './ProtocolPreviewPage.css'
 
 function ProtocolPreviewPage() {
@@ -15,6 +15,7 @@ function ProtocolPreviewPage() {
   const [description, setDescription] = useState('')
   const [steps, setSteps] = useState([])
   const [saving, setSaving] = useState(false)
+  const [documentUrl, setDocumentUrl] = useState(null)
 
   useEffect(() => {
     // Get preview data from navigation state
@@ -30,6 +31,18 @@ function ProtocolPreviewPage() {
     }
   }, [location.state])
 
+  useEffect(() => {
+    // The bucket isn't public, so the preview loads through a short-lived presigned URL
+    const documentId = previewData?.protocol?.document_id
+    if (!documentId) return
+    getDocumentDownloadUrl(documentId)
+      .then(setDocumentUrl)
+      .catch((err) => {
+        console.warn("Falling back to streaming the document through the API:", err)
+        setDocumentUrl(getProtocolDocumentUrl(previewData.protocol.protocol_id))
+      })
+  }, [previewData])
+
   const handleStepChange = (index, field, value) => {
     const updatedSteps = [...steps]
     updatedSteps[index] = { ...updatedSteps[index], [field]: value }
@@ -148,9 +161,9 @@ function ProtocolPreviewPage() {
         <div className="file-preview-section">
           <h3>Document Preview</h3>
           <div className="file-viewer">
-            {previewData.protocol?.document_id && (
+            {documentUrl && (
               <iframe
-                src={previewData.object_url}
+                src={documentUrl}
                 title="Document Preview"
                 className="document-iframe"
               />
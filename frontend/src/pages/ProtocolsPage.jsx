@@ -8,13 +8,19 @@ function ProtocolsPage() {
   const [protocols, setProtocols] = useState([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+
+  // The card only renders these, so skip the rest of each row
+  const cardFields = ['protocol_id', 'protocol_name', 'description', 'created_at']
 
   useEffect(() => {
     const fetchProtocols = async () => {
       try {
         setLoading(true)
-        const data = await getProtocols()
-        setProtocols(data)
+        const page = await getProtocols({ fields: cardFields })
+        setProtocols(page.protocols)
+        setNextCursor(page.next_cursor)
       } catch (err) {
         setError(err.message)
       } finally {
@@ -25,6 +31,19 @@ function ProtocolsPage() {
     fetchProtocols()
   }, [])
 
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true)
+      const page = await getProtocols({ cursor: nextCursor, fields: cardFields })
+      setProtocols((current) => [...current, ...page.protocols])
+      setNextCursor(page.next_cursor)
+    } catch (err) {
+      setError(err.message)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   if (loading) {
     return (
       <div className="protocols-page">
@@ -70,6 +89,13 @@ function ProtocolsPage() {
           ))
         )}
       </main>
+      {nextCursor && (
+        <div className="load-more">
+          <button onClick={loadMore} disabled={loadingMore} className="load-more-btn">
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        </div>
+      )}
     </div>
   )
 }
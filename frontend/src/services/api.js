@@ -13,9 +13,18 @@ const uploadApi = axios.create({
   baseURL: API_BASE_URL,
 })
 
-export const getProtocols = async () => {
+export const PROTOCOLS_PAGE_SIZE = 50
+
+export const getProtocols = async ({ pageSize = PROTOCOLS_PAGE_SIZE, cursor = null, fields = null } = {}) => {
   try {
-    const response = await api.get('/protocols')
+    const params = { limit: pageSize }
+    if (cursor) {
+      params.cursor = cursor
+    }
+    if (fields) {
+      params.fields = fields.join(',')
+    }
+    const response = await api.get('/protocols', { params })
     return response.data
   } catch (error) {
     throw new Error(`Failed to fetch protocols: ${error.message}`)
@@ -44,6 +53,49 @@ export const uploadProtocol = async (formData) => {
   }
 }
 
+// Uploads straight to object storage through a presigned URL, so the file doesn't pass through the API
+export const uploadProtocolDirect = async (file) => {
+  try {
+    const { data: presigned } = await api.post('/protocols/uploads/presign', { filename: file.name })
+    const upload = await fetch(presigned.upload_url, {
+      method: 'PUT',
+      headers: { 'Content-Type': presigned.content_type },
+      body: file,
+    })
+    if (!upload.ok) {
+      throw new Error(`${upload.status} ${upload.statusText}`)
+    }
+    const response = await api.post('/protocols/uploads/ingest', {
+      object_name: presigned.object_name,
+      filename: file.name,
+    })
+    return response.data
+  } catch (error) {
+    throw new Error(`Failed to upload protocol: ${error.message}`)
+  }
+}
+
+// Streamed by the API with Range support, so PDF viewers can fetch it a page at a time
+export const getProtocolDocumentUrl = (protocolId) => `${API_BASE_URL}/protocols/${protocolId}/document`
+
+export const getDocumentDownloadUrl = async (documentId) => {
+  try {
+    const response = await api.get(`/protocols/documents/${documentId}/download-url`)
+    return response.data.download_url
+  } catch (error) {
+    throw new Error(`Failed to get document URL: ${error.message}`)
+  }
+}
+
+export const getIngestionStatus = async (documentId) => {
+  try {
+    const response = await api.get(`/protocols/documents/${documentId}/status`)
+    return response.data
+  } catch (error) {
+    throw new Error(`Failed to fetch ingestion status: ${error.message}`)
+  }
+}
+
 export const createProtocol = async (protocol, protocolSteps) => {
   try {
     const response = await api.post('/protocols/create', {
@@ -89,10 +141,13 @@ export const stopExperiment = async (experimentId, endTime = null) => {
   }
 }
 
-export const voiceTurn = async (audioFile) => {
+export const voiceTurn = async (audioFile, experimentId = null) => {
   try {
     const formData = new FormData()
     formData.append('file', audioFile, 'turn.webm')
+    if (experimentId) {
+      formData.append('experiment_id', experimentId)
+    }
     
     const response = await uploadApi.post('/experiments/voice-turn', formData, {
       headers: {
@@ -105,6 +160,47 @@ export const voiceTurn = async (audioFile) => {
   }
 }
 
+// Streams a voice turn as Server-Sent Events; axios can't read a response body incrementally
+export const streamVoiceTurn = async (audioFile, { experimentId = null, onTranscript, onReply } = {}) => {
+  const formData = new FormData()
+  formData.append('file', audioFile, 'turn.webm')
+  if (experimentId) {
+    formData.append('experiment_id', experimentId)
+  }
+
+  const response = await fetch(`${API_BASE_URL}/experiments/voice-turn/stream`, { method: 'POST', body: formData })
+  if (!response.ok) {
+    throw new Error(`Failed to process voice turn: ${response.status} ${response.statusText}`)
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+  let buffer = ''
+  let result = null
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) {
+      break
+    }
+    buffer += value
+    const events = buffer.split('\n\n')
+    buffer = events.pop()
+    for (const rawEvent of events) {
+      const name = rawEvent.match(/^event: (.*)$/m)?.[1]
+      const data = JSON.parse(rawEvent.match(/^data: (.*)$/m)?.[1] || '{}')
+      if (name === 'transcript' && onTranscript) {
+        onTranscript(data.text)
+      } else if (name === 'reply' && onReply) {
+        onReply(data.text)
+      } else if (name === 'done') {
+        result = data
+      } else if (name === 'error') {
+        throw new Error(`Failed to process voice turn: ${data.message}`)
+      }
+    }
+  }
+  return result
+}
+
 export const getExperimentsByProtocol = async (protocolId) => {
   try {
     const response = await api.get(`/experiments/protocol/${protocolId}`)
@@ -0,0 +1,145 @@
+// Streams microphone audio to /experiments/{id}/voice-stream as 16 kHz mono
+// 16-bit PCM and hands the server's JSON messages to onMessage.
+
+const TARGET_SAMPLE_RATE = 16000
+const FRAME_DURATION_SECONDS = 0.1
+
+const captureWorkletSource = `
+class PcmCaptureProcessor extends AudioWorkletProcessor {
+  process(inputs) {
+    const channel = inputs[0][0]
+    if (channel) {
+      this.port.postMessage(channel.slice(0))
+    }
+    return true
+  }
+}
+registerProcessor('pcm-capture', PcmCaptureProcessor)
+`
+
+const downsampleToInt16 = (input, inputRate) => {
+  const ratio = inputRate / TARGET_SAMPLE_RATE
+  const length = Math.floor(input.length / ratio)
+  const output = new Int16Array(length)
+  for (let i = 0; i < length; i++) {
+    // Average the input samples that fall into this output sample
+    const start = Math.floor(i * ratio)
+    const end = Math.min(Math.floor((i + 1) * ratio), input.length)
+    let sum = 0
+    for (let j = start; j < end; j++) {
+      sum += input[j]
+    }
+    const sample = Math.max(-1, Math.min(1, sum / Math.max(end - start, 1)))
+    output[i] = sample < 0 ? sample * 0x8000 : sample * 0x7fff
+  }
+  return output
+}
+
+export const openVoiceStream = async ({ experimentId, onMessage, onClose }) => {
+  const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws'
+  const socket = new WebSocket(`${scheme}://${window.location.host}/api/experiments/${experimentId}/voice-stream`)
+  socket.binaryType = 'arraybuffer'
+
+  await new Promise((resolve, reject) => {
+    socket.onopen = resolve
+    socket.onerror = () => reject(new Error('Could not open voice stream'))
+  })
+
+  let stream
+  let audioContext
+  try {
+    stream = await navigator.mediaDevices.getUserMedia({
+      audio: {
+        echoCancellation: true,
+        noiseSuppression: true,
+        autoGainControl: true,
+        channelCount: 1
+      }
+    })
+
+    audioContext = new AudioContext()
+    const workletUrl = URL.createObjectURL(new Blob([captureWorkletSource], { type: 'application/javascript' }))
+    await audioContext.audioWorklet.addModule(workletUrl)
+    URL.revokeObjectURL(workletUrl)
+  } catch (error) {
+    socket.close()
+    stream?.getTracks().forEach(track => track.stop())
+    audioContext?.close()
+    throw error
+  }
+
+  const source = audioContext.createMediaStreamSource(stream)
+  const capture = new AudioWorkletNode(audioContext, 'pcm-capture')
+  // Keep the node pulled by the graph without playing the microphone back
+  const mute = audioContext.createGain()
+  mute.gain.value = 0
+  source.connect(capture).connect(mute).connect(audioContext.destination)
+
+  const frameLength = Math.round(audioContext.sampleRate * FRAME_DURATION_SECONDS)
+  let buffered = []
+  let bufferedLength = 0
+  let paused = false
+
+  capture.port.onmessage = (event) => {
+    if (paused || socket.readyState !== WebSocket.OPEN) {
+      return
+    }
+    buffered.push(event.data)
+    bufferedLength += event.data.length
+    if (bufferedLength < frameLength) {
+      return
+    }
+
+    const frame = new Float32Array(bufferedLength)
+    let offset = 0
+    for (const chunk of buffered) {
+      frame.set(chunk, offset)
+      offset += chunk.length
+    }
+    buffered = []
+    bufferedLength = 0
+    socket.send(downsampleToInt16(frame, audioContext.sampleRate).buffer)
+  }
+
+  socket.onmessage = (event) => onMessage(JSON.parse(event.data))
+  let released = false
+  const release = () => {
+    if (released) {
+      return
+    }
+    released = true
+    stream.getTracks().forEach(track => track.stop())
+    audioContext.close()
+  }
+
+  socket.onclose = (event) => {
+    release()
+    if (onClose) {
+      onClose(event)
+    }
+  }
+
+  const sendControl = (type) => {
+    if (socket.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify({ type }))
+    }
+  }
+
+  return {
+    // Stop sending audio, e.g. while the reply is being spoken
+    pause: () => {
+      paused = true
+      buffered = []
+      bufferedLength = 0
+      sendControl('audio_stream_end')
+    },
+    resume: () => {
+      paused = false
+    },
+    stop: () => {
+      sendControl('stop')
+      socket.close()
+      release()
+    }
+  }
+}